@@ -1,29 +1,38 @@
 from http.server import BaseHTTPRequestHandler
 import json
 import os
+import sys
 from urllib.parse import parse_qs, urlparse
 
-# Try to import supabase
-supabase = None
-try:
-    from supabase import create_client
-    SUPABASE_URL = os.environ.get("SUPABASE_URL")
-    SUPABASE_SERVICE_ROLE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
-    if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
-        supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-except Exception as e:
-    print(f"Supabase init error: {e}")
-
-# Sector mapping
-SECTOR_MAP = {
-    "AAPL": "Technology", "GOOGL": "Technology", "MSFT": "Technology",
-    "AMZN": "Consumer Cyclical", "TSLA": "Automotive", "META": "Technology",
-    "NVDA": "Technology", "JPM": "Financial", "V": "Financial",
-    "JNJ": "Healthcare", "SPY": "ETF", "QQQ": "ETF",
-}
+_supabase = None
+
+
+def get_supabase():
+    """Supabase client, created on first use so requests that never touch the database do not import it."""
+    global _supabase
+    if _supabase is None:
+        try:
+            from supabase import create_client
+            SUPABASE_URL = os.environ.get("SUPABASE_URL")
+            SUPABASE_SERVICE_ROLE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+            if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
+                _supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+        except Exception as e:
+            print(f"Supabase init error: {e}")
+    return _supabase
+
+# Sector mapping and the analytics kernel are shared with the backend; they
+# are imported on first use so cold starts do not pay for numpy
+_BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+if _BACKEND not in sys.path:
+    sys.path.append(_BACKEND)
 
 
 def analyze_portfolio(user_id):
+    from app.services.recommendation_data import SECTOR_MAP
+    from app.services.portfolio_analytics import analyze_holdings, encode_labels
+
+    supabase = get_supabase()
     if not supabase:
         return {"error": "Supabase not configured", "summary": "Analytics unavailable"}
     
@@ -34,37 +43,36 @@ def analyze_portfolio(user_id):
         if not assets:
             return {"error": "No assets found"}
         
-        total_value = 0
-        sectors = {}
-        assets_analysis = []
+        symbols = [asset.get("symbol", "").upper() for asset in assets]
+        amounts = [float(asset.get("amount", 0)) for asset in assets]
+        prices = [float(asset.get("price", 0)) for asset in assets]
+        sector_codes, sector_names = encode_labels(SECTOR_MAP.get(symbol, "Other") for symbol in symbols)
+        analytics = analyze_holdings(amounts, prices, prices, sector_codes, n_sectors=len(sector_names))
+        total_value = float(analytics.total_value[0])
         
-        for asset in assets:
-            symbol = asset.get("symbol", "").upper()
-            amount = float(asset.get("amount", 0))
-            price = float(asset.get("price", 0))
-            value = amount * price
-            total_value += value
-            
-            sector = SECTOR_MAP.get(symbol, "Other")
-            if sector not in sectors:
-                sectors[sector] = {"value": 0, "count": 0}
-            sectors[sector]["value"] += value
-            sectors[sector]["count"] += 1
-            
-            assets_analysis.append({
+        assets_analysis = [
+            {
                 "symbol": symbol,
                 "name": asset.get("name", symbol),
-                "sector": sector,
-                "value": round(value, 2),
+                "sector": sector_names[code],
+                "value": round(float(value), 2),
                 "profit_loss": 0,
-                "profit_loss_percent": 0
-            })
-        
-        # Calculate weights
-        for a in assets_analysis:
-            a["weight"] = round((a["value"] / total_value * 100) if total_value > 0 else 0, 1)
+                "profit_loss_percent": 0,
+                "weight": round(float(weight), 1)
+            }
+            for asset, symbol, code, value, weight in zip(assets, symbols, sector_codes, analytics.value, analytics.weight)
+        ]
         
-        sectors_list = [{"sector": k, "weight": round((v["value"]/total_value*100) if total_value > 0 else 0, 1), "value": round(v["value"], 2), "count": v["count"]} for k, v in sectors.items()]
+        sectors = sector_names
+        sectors_list = [
+            {
+                "sector": name,
+                "weight": round(float(analytics.sector_weight[0, code]), 1),
+                "value": round(float(analytics.sector_value[0, code]), 2),
+                "count": int(analytics.sector_count[0, code])
+            }
+            for code, name in enumerate(sector_names)
+        ]
         
         # Build detailed analysis text
         sector_lines = "\n".join([f"- **{s['sector']}**: {s['weight']}% (${s['value']:,.2f})" for s in sectors_list])
@@ -101,7 +109,7 @@ Your portfolio contains **{len(assets)} assets** with a total value of **${total
             "risk_metrics": {
                 "diversification_score": diversification_score,
                 "concentration_risk": "Low" if len(assets) >= 5 else "High",
-                "top_holding_weight": max([a["weight"] for a in assets_analysis]) if assets_analysis else 0,
+                "top_holding_weight": round(float(analytics.top_holding_weight[0]), 1),
                 "sector_count": len(sectors),
                 "asset_count": len(assets)
             },
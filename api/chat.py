@@ -3,20 +3,31 @@ import json
 import os
 from urllib.parse import parse_qs, urlparse
 
-# Try to import dependencies
-supabase = None
-httpx = None
-try:
-    from supabase import create_client
-    import httpx as httpx_module
-    httpx = httpx_module
-    
-    SUPABASE_URL = os.environ.get("SUPABASE_URL")
-    SUPABASE_SERVICE_ROLE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
-    if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
-        supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-except Exception as e:
-    print(f"Init error: {e}")
+_supabase = None
+
+
+def get_supabase():
+    """Supabase client, created on first use so requests that never touch the database do not import it."""
+    global _supabase
+    if _supabase is None:
+        try:
+            from supabase import create_client
+            SUPABASE_URL = os.environ.get("SUPABASE_URL")
+            SUPABASE_SERVICE_ROLE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+            if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
+                _supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+        except Exception as e:
+            print(f"Supabase init error: {e}")
+    return _supabase
+
+
+def get_httpx():
+    """httpx, imported on first use; None if it is not installed."""
+    try:
+        import httpx
+        return httpx
+    except ImportError:
+        return None
 
 # OpenAI API Configuration - using gpt-4o-mini (cheapest, fastest model)
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
@@ -40,6 +51,7 @@ CRITICAL FORMATTING RULES - YOU MUST FOLLOW THESE:
 
 def get_user_portfolio(user_id):
     """Fetch user portfolio from Supabase."""
+    supabase = get_supabase()
     if not supabase or not user_id:
         return None
     
@@ -164,6 +176,7 @@ class handler(BaseHTTPRequestHandler):
                 if portfolio_data:
                     portfolio_context = build_context_prompt(portfolio_data)
             
+            httpx = get_httpx()
             if not OPENAI_API_KEY or not httpx:
                 response_text = "🤖 The AI chatbot requires an OpenAI API key configured in Vercel environment variables (OPENAI_API_KEY)."
             else:
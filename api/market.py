@@ -1,53 +1,43 @@
 from http.server import BaseHTTPRequestHandler
 import json
 import os
+import sys
 from urllib.parse import parse_qs, urlparse
 
-# Try to import httpx for API calls
-httpx = None
+# Share the backend's market data providers (see backend/app/services/market_providers.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+provider = None
 try:
-    import httpx as httpx_module
-    httpx = httpx_module
+    from app.services.market_providers import build_provider, get_prices_chunked
+    provider = build_provider(
+        os.environ.get("MARKET_DATA_PROVIDERS", "yahoo_chart").split(","),
+        os.environ.get("MARKET_DATA_FIXTURE_DIR"),
+    )
 except Exception as e:
-    print(f"httpx import error: {e}")
+    print(f"Market provider init error: {e}")
 
 
-def get_yahoo_price(symbol):
-    """Fetch real-time price from Yahoo Finance API."""
-    if not httpx:
+def get_live_price(symbol):
+    """Fetch the current price through the configured market data provider."""
+    if not provider:
         return None
     
     try:
-        # Use Yahoo Finance v8 API (free, no auth needed)
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1d&range=1d"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        
-        with httpx.Client(timeout=10.0) as client:
-            resp = client.get(url, headers=headers)
-            if resp.status_code == 200:
-                data = resp.json()
-                result = data.get("chart", {}).get("result", [])
-                if result and len(result) > 0:
-                    meta = result[0].get("meta", {})
-                    price = meta.get("regularMarketPrice")
-                    if price:
-                        return round(float(price), 2)
-        return None
+        price = provider.get_price(symbol)
+        return round(price, 2) if price is not None else None
     except Exception as e:
-        print(f"Yahoo API error for {symbol}: {e}")
+        print(f"Market data error for {symbol}: {e}")
         return None
 
 
-def get_multiple_yahoo_prices(symbols):
-    """Fetch prices for multiple symbols."""
-    prices = {}
-    for symbol in symbols[:20]:  # Limit to 20 to avoid rate limits
-        symbol = symbol.upper()
-        price = get_yahoo_price(symbol)
-        prices[symbol] = price
-    return prices
+def get_multiple_live_prices(symbols):
+    """Fetch prices for multiple symbols in concurrent provider-sized batches."""
+    symbols = [symbol.upper() for symbol in symbols]
+    if not provider:
+        return {symbol: None for symbol in symbols}
+    
+    prices = get_prices_chunked(provider, symbols)
+    return {symbol: round(price, 2) if price is not None else None for symbol, price in prices.items()}
 
 
 # Fallback mock data (only used if Yahoo API fails)
@@ -83,13 +73,13 @@ class handler(BaseHTTPRequestHandler):
             
             if symbol:
                 symbol = symbol.upper()
-                # Try real Yahoo price first
-                price = get_yahoo_price(symbol)
+                # Try the live price first
+                price = get_live_price(symbol)
                 if price is None:
                     # Fallback to mock if available
                     price = MOCK_PRICES.get(symbol)
                 
-                result = {"symbol": symbol, "price": price, "source": "yahoo" if price else "unavailable"}
+                result = {"symbol": symbol, "price": price, "source": provider.name if price and provider else "unavailable"}
             else:
                 result = {"available_symbols": list(MOCK_PRICES.keys())}
             
@@ -112,14 +102,12 @@ class handler(BaseHTTPRequestHandler):
             data = json.loads(body) if body else {}
             
             symbols = data.get('symbols', [])
-            prices = {}
+            prices = get_multiple_live_prices(symbols)
             
-            for sym in symbols[:20]:
-                sym = sym.upper()
-                price = get_yahoo_price(sym)
+            for sym, price in prices.items():
                 if price is None:
-                    price = MOCK_PRICES.get(sym)
-                prices[sym] = price
+                    # Fallback to mock if available
+                    prices[sym] = MOCK_PRICES.get(sym)
             
             self.send_response(200)
             self.send_header('Content-Type', 'application/json')
@@ -1,51 +1,63 @@
 from http.server import BaseHTTPRequestHandler
 import json
 import os
+import sys
 from urllib.parse import parse_qs, urlparse
 
-# Try to import dependencies
-supabase = None
-httpx = None
-try:
-    from supabase import create_client
-    import httpx as httpx_module
-    httpx = httpx_module
-    
-    SUPABASE_URL = os.environ.get("SUPABASE_URL")
-    SUPABASE_SERVICE_ROLE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
-    if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
-        supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-except Exception as e:
-    print(f"Init error: {e}")
+_supabase = None
+
+
+def get_supabase():
+    """Supabase client, created on first use so requests that never touch the database do not import it."""
+    global _supabase
+    if _supabase is None:
+        try:
+            from supabase import create_client
+            SUPABASE_URL = os.environ.get("SUPABASE_URL")
+            SUPABASE_SERVICE_ROLE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+            if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
+                _supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+        except Exception as e:
+            print(f"Supabase init error: {e}")
+    return _supabase
+
+# Share the backend's market data providers (see backend/app/services/market_providers.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+_provider = None
 
 
-def get_yahoo_price(symbol):
-    """Fetch real-time price from Yahoo Finance API."""
-    if not httpx:
+def get_provider():
+    """Market data provider, built on first use."""
+    global _provider
+    if _provider is None:
+        try:
+            from app.services.market_providers import build_provider
+            _provider = build_provider(
+                os.environ.get("MARKET_DATA_PROVIDERS", "yahoo_chart").split(","),
+                os.environ.get("MARKET_DATA_FIXTURE_DIR"),
+            )
+        except Exception as e:
+            print(f"Market provider init error: {e}")
+    return _provider
+
+
+def get_live_price(symbol):
+    """Fetch the current price through the configured market data provider."""
+    provider = get_provider()
+    if not provider:
         return None
     
     try:
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}?interval=1d&range=1d"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        
-        with httpx.Client(timeout=10.0) as client:
-            resp = client.get(url, headers=headers)
-            if resp.status_code == 200:
-                data = resp.json()
-                result = data.get("chart", {}).get("result", [])
-                if result and len(result) > 0:
-                    meta = result[0].get("meta", {})
-                    price = meta.get("regularMarketPrice")
-                    if price:
-                        return round(float(price), 2)
-        return None
+        price = provider.get_price(symbol)
+        return round(price, 2) if price is not None else None
     except Exception as e:
-        print(f"Yahoo API error for {symbol}: {e}")
+        print(f"Market data error for {symbol}: {e}")
         return None
 
 
 def get_portfolio_history(user_id):
     """Get portfolio history for user."""
+    supabase = get_supabase()
     if not supabase:
         # Return mock data if Supabase not configured
         return {
@@ -109,6 +121,7 @@ def get_portfolio_history(user_id):
 
 def add_asset(data):
     """Add a new asset to user's portfolio."""
+    supabase = get_supabase()
     if not supabase:
         return {"error": "Supabase not configured", "success": False}
     
@@ -122,10 +135,10 @@ def add_asset(data):
         if not user_id or not ticker:
             return {"error": "user_id and ticker are required", "success": False}
         
-        # Fetch REAL price from Yahoo instead of using mock data
-        real_price = get_yahoo_price(ticker)
+        # Fetch REAL price from the market data provider instead of using mock data
+        real_price = get_live_price(ticker)
         if real_price is None:
-            # Fallback to provided price if Yahoo fails
+            # Fallback to provided price if the provider fails
             real_price = float(data.get("price", 0))
         
         # Normalize type to match schema CHECK constraint
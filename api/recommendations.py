@@ -2,7 +2,6 @@ from http.server import BaseHTTPRequestHandler
 import json
 import os
 from urllib.parse import parse_qs, urlparse
-from supabase import create_client
 
 # Risk profile allocations
 ALLOCATIONS = {
@@ -102,49 +101,16 @@ class handler(BaseHTTPRequestHandler):
                     supabase_key = os.environ.get("VITE_SUPABASE_ANON_KEY") or os.environ.get("SUPABASE_ANON_KEY")
                     
                     if user_id and supabase_url and supabase_key:
+                        from supabase import create_client
                         supabase = create_client(supabase_url, supabase_key)
                         
-                        # 1. Fetch Profile
-                        profile_response = supabase.from_("user_profiles").select("initial_investment, monthly_budget, created_at").eq("user_id", user_id).execute()
+                        # Cash injected minus invested cost plus realized gains, in one call
+                        # (supabase/migrations/20261016_create_user_financial_snapshot.sql)
+                        snapshot_response = supabase.rpc("get_user_financial_snapshot", {"p_user_id": user_id}).execute()
+                        snapshot = snapshot_response.data[0] if isinstance(snapshot_response.data, list) else snapshot_response.data
                         
-                        if profile_response.data:
-                            user_profile = profile_response.data[0]
-                            initial_investment = float(user_profile.get("initial_investment") or 0)
-                            monthly_budget = float(user_profile.get("monthly_budget") or 0)
-                            created_at_str = user_profile.get("created_at")
-                            
-                            # Calculate total cash injected
-                            total_cash_injected = initial_investment
-                            if created_at_str:
-                                from datetime import datetime
-                                from dateutil.relativedelta import relativedelta
-                                try:
-                                    created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
-                                    now = datetime.now(created_at.tzinfo)
-                                    
-                                    current_check = created_at
-                                    # Logic to move to next month 1st - Simplified for serverless
-                                    current_check = current_check + relativedelta(months=1)
-                                    current_check = current_check.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                                    
-                                    months_passed = 0
-                                    while current_check <= now:
-                                        months_passed += 1
-                                        current_check = current_check + relativedelta(months=1)
-                                    
-                                    total_cash_injected += (monthly_budget * months_passed)
-                                except:
-                                    pass # Fallback to initial only on date parse error
-
-                            # 2. Fetch Assets for Total Invested
-                            assets_response = supabase.from_("assets").select("amount, price").eq("user_id", user_id).execute()
-                            total_invested = sum(float(a["amount"]) * float(a["price"]) for a in assets_response.data)
-
-                            # 3. Fetch Realized Gains
-                            transactions_response = supabase.from_("transactions").select("profit_loss").eq("user_id", user_id).execute()
-                            realized_gains = sum(float(t["profit_loss"] or 0) for t in transactions_response.data)
-                            
-                            remaining_budget = max(0, total_cash_injected - total_invested + realized_gains)
+                        if snapshot and snapshot.get("has_profile"):
+                            remaining_budget = float(snapshot.get("remaining_budget") or 0)
                 except Exception as e:
                     print(f"Error calculating budget in Vercel function: {e}")
                     # Keep default 1000 or set to -1?
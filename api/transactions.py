@@ -4,20 +4,27 @@ import os
 from datetime import datetime
 from urllib.parse import parse_qs, urlparse
 
-# Try to import supabase
-supabase = None
-try:
-    from supabase import create_client
-    SUPABASE_URL = os.environ.get("SUPABASE_URL")
-    SUPABASE_SERVICE_ROLE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
-    if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
-        supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-except Exception as e:
-    print(f"Supabase init error: {e}")
+_supabase = None
+
+
+def get_supabase():
+    """Supabase client, created on first use so requests that never touch the database do not import it."""
+    global _supabase
+    if _supabase is None:
+        try:
+            from supabase import create_client
+            SUPABASE_URL = os.environ.get("SUPABASE_URL")
+            SUPABASE_SERVICE_ROLE_KEY = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+            if SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY:
+                _supabase = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+        except Exception as e:
+            print(f"Supabase init error: {e}")
+    return _supabase
 
 
 def get_transactions(user_id):
     """Get closed position transactions for user."""
+    supabase = get_supabase()
     if not supabase:
         return {
             "transactions": [],
@@ -49,6 +56,7 @@ def get_transactions(user_id):
 
 def close_position(data):
     """Close a position and record as transaction."""
+    supabase = get_supabase()
     if not supabase:
         return {"error": "Supabase not configured", "success": False}
     
@@ -1,22 +1,53 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import auth, portfolio, investment, market, transactions, analytics, chat
 from app.config import get_settings
+from app.services.dataloader import RequestScopeMiddleware
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background_tasks = []
+    if settings.PRICE_PREFETCH_ENABLED:
+        from app.services.price_prefetcher import run_price_prefetcher
+        background_tasks.append(asyncio.create_task(run_price_prefetcher()))
+    if settings.METADATA_REFRESH_ENABLED:
+        from app.services.metadata_store import run_metadata_refresher
+        background_tasks.append(asyncio.create_task(run_metadata_refresher()))
+    from app.services.chart_renderer import shutdown_render_pool, start_render_pool
+    start_render_pool()
+    if settings.WARMUP_ENABLED:
+        from app.services.warmup import warm_up
+        background_tasks.append(asyncio.create_task(warm_up()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    shutdown_render_pool()
+    from app.services.database import close_client
+    await close_client()
+
+
 app = FastAPI(
     title="BegInvest API",
     description="Backend API for BegInvest - Smart Growth Investing",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
+# Each request gets its own DataLoaders for user_profiles/assets/transactions
+app.add_middleware(RequestScopeMiddleware)
+
 # CORS Configuration
 app.add_middleware(
     CORSMiddleware,
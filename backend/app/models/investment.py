@@ -1,5 +1,17 @@
-from pydantic import BaseModel, Field, field_validator
-from typing import List
+import itertools
+import math
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Literal, Optional, Union
+
+MAX_SCENARIOS = 10000
+
+# Allowed range of each calculator input, as enforced on InvestmentRequest
+SCENARIO_BOUNDS = {
+    "monthly_amount": (100, 50000),
+    "years": (1, 30),
+    "annual_return": (2, 15),
+    "initial_investment": (0, 100000),
+}
 
 class InvestmentRequest(BaseModel):
     """
@@ -9,6 +21,9 @@ class InvestmentRequest(BaseModel):
     years: int = Field(..., description="Investment period in years", ge=1, le=30)
     annual_return: float = Field(..., description="Expected annual return percentage", ge=2, le=15)
     initial_investment: float = Field(default=0, description="Initial lump sum investment in ILS", ge=0, le=100000)
+    simulate: bool = Field(default=False, description="Also run a Monte Carlo projection")
+    risk_profile: Optional[int] = Field(default=None, description="Risk profile (1-4) whose volatility the simulation uses", ge=1, le=4)
+    simulations: int = Field(default=10000, description="Number of simulated paths", ge=1000, le=100000)
 
     @field_validator('monthly_amount')
     def validate_amount(cls, v):
@@ -28,6 +43,19 @@ class InvestmentRequest(BaseModel):
             raise ValueError('Annual return must be between 2% and 15%')
         return v
 
+class SimulationResult(BaseModel):
+    """
+    Percentile bands of simulated portfolio values at the end of each year.
+    """
+    simulations: int = Field(..., description="Number of simulated paths")
+    volatility: float = Field(..., description="Annual volatility percentage used")
+    p5: List[float]
+    p25: List[float]
+    p50: List[float]
+    p75: List[float]
+    p95: List[float]
+    probability_of_loss: float = Field(..., description="Share of paths ending below the total contributed")
+
 class InvestmentResponse(BaseModel):
     """
     Response model for investment calculation results.
@@ -36,3 +64,143 @@ class InvestmentResponse(BaseModel):
     total_contributed: float = Field(..., description="Sum of all monthly contributions")
     total_earnings: float = Field(..., description="Investment gains")
     yearly_breakdown: List[float] = Field(..., description="Array showing portfolio value at end of each year")
+    simulation: Optional[SimulationResult] = Field(default=None, description="Monte Carlo bands, when requested")
+
+
+class ValueRange(BaseModel):
+    """
+    Evenly spaced values from start to stop, both included.
+    """
+    start: float
+    stop: float
+    step: float = Field(..., gt=0)
+
+    @model_validator(mode='after')
+    def validate_order(self):
+        if self.stop < self.start:
+            raise ValueError("stop must not be less than start")
+        return self
+
+    def count(self) -> int:
+        """Number of values in the range, without building them."""
+        return max(math.floor((self.stop - self.start) / self.step + 1e-9) + 1, 0)
+
+    def last(self) -> float:
+        return round(self.start + (self.count() - 1) * self.step, 10)
+
+    def values(self) -> List[float]:
+        return [round(self.start + i * self.step, 10) for i in range(self.count())]
+
+
+class Scenario(BaseModel):
+    """
+    One set of calculator inputs.
+    """
+    monthly_amount: float = Field(..., ge=100, le=50000)
+    years: int = Field(..., ge=1, le=30)
+    annual_return: float = Field(..., ge=2, le=15)
+    initial_investment: float = Field(default=0, ge=0, le=100000)
+
+
+class ScenarioBatchRequest(BaseModel):
+    """
+    Explicit scenarios and/or a grid: every combination of the listed values
+    or ranges. A grid needs monthly_amount, years and annual_return;
+    initial_investment defaults to 0.
+    """
+    scenarios: List[Scenario] = Field(default_factory=list)
+    monthly_amount: Optional[Union[List[float], ValueRange]] = None
+    years: Optional[Union[List[int], ValueRange]] = None
+    annual_return: Optional[Union[List[float], ValueRange]] = None
+    initial_investment: Optional[Union[List[float], ValueRange]] = None
+
+    @model_validator(mode='after')
+    def validate_grid(self):
+        axes = {name: getattr(self, name) for name in SCENARIO_BOUNDS}
+        if any(values is not None for values in axes.values()):
+            missing = [name for name in ("monthly_amount", "years", "annual_return") if axes[name] is None]
+            if missing:
+                raise ValueError(f"Grid is missing values for: {', '.join(missing)}")
+            # Ranges are checked from their endpoints and length so that an
+            # oversized grid is rejected before any of its values are built
+            size = 1
+            for name, values in axes.items():
+                low, high = SCENARIO_BOUNDS[name]
+                if isinstance(values, ValueRange):
+                    count = values.count()
+                    ends = [values.start, values.last()] if count else []
+                    whole = values.start == int(values.start) and values.step == int(values.step)
+                else:
+                    values = values or [0]
+                    count, ends = len(values), values
+                    whole = all(v == int(v) for v in values)
+                if not count or min(ends) < low or max(ends) > high:
+                    raise ValueError(f"{name} values must be between {low} and {high}")
+                if name == "years" and not whole:
+                    raise ValueError("years values must be whole numbers")
+                size *= count
+            if size + len(self.scenarios) > MAX_SCENARIOS:
+                raise ValueError(f"At most {MAX_SCENARIOS} scenarios per request")
+        elif not self.scenarios:
+            raise ValueError("Provide scenarios or a grid")
+        elif len(self.scenarios) > MAX_SCENARIOS:
+            raise ValueError(f"At most {MAX_SCENARIOS} scenarios per request")
+        return self
+
+    def expand(self) -> List[tuple]:
+        """All scenarios as (monthly_amount, years, annual_return, initial_investment) tuples."""
+        rows = [(s.monthly_amount, s.years, s.annual_return, s.initial_investment) for s in self.scenarios]
+        if self.monthly_amount is not None:
+            axes = []
+            for name in SCENARIO_BOUNDS:
+                values = getattr(self, name)
+                axes.append(values.values() if isinstance(values, ValueRange) else (values or [0]))
+            rows.extend(itertools.product(*axes))
+        return rows
+
+
+class ScenarioBatchResponse(BaseModel):
+    """
+    Results for every scenario, row-aligned with `scenarios`.
+    """
+    columns: List[str] = Field(..., description="Names of the values in each scenario row")
+    scenarios: List[List[float]]
+    future_value: List[float]
+    total_contributed: List[float]
+    total_earnings: List[float]
+    yearly_breakdown: List[List[Optional[float]]] = Field(..., description="Year-end values per scenario, null past its horizon")
+
+
+class GoalSeekRequest(BaseModel):
+    """
+    Solve for one calculator input so the future value reaches a target.
+    The other inputs are required.
+    """
+    solve_for: Literal["monthly_amount", "years", "annual_return"]
+    target_value: float = Field(..., description="Target future value in ILS", gt=0, le=1e9)
+    monthly_amount: Optional[float] = Field(default=None, description="Monthly contribution in ILS", ge=0, le=50000)
+    years: Optional[int] = Field(default=None, description="Investment period in years", ge=1, le=30)
+    annual_return: Optional[float] = Field(default=None, description="Expected annual return percentage", ge=0, le=15)
+    initial_investment: float = Field(default=0, description="Initial lump sum investment in ILS", ge=0, le=100000)
+
+    @model_validator(mode='after')
+    def validate_inputs(self):
+        required = {"monthly_amount", "years", "annual_return"} - {self.solve_for}
+        missing = sorted(name for name in required if getattr(self, name) is None)
+        if missing:
+            raise ValueError(f"Missing inputs to solve for {self.solve_for}: {', '.join(missing)}")
+        return self
+
+
+class GoalSeekResponse(BaseModel):
+    """
+    The solved input together with the full set of inputs it implies.
+    """
+    solve_for: str
+    value: float = Field(..., description="Solved value of the requested input")
+    monthly_amount: float
+    years: float = Field(..., description="May be fractional when solving for years")
+    annual_return: float
+    initial_investment: float
+    target_value: float
+    projected_value: float = Field(..., description="Future value with the solved inputs")
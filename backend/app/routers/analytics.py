@@ -1,12 +1,18 @@
+import asyncio
+from datetime import date, timedelta
+import numpy as np
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Dict, Optional
-import yfinance as yf
-from supabase import create_client, Client
-from app.config import get_settings
+from app.services.database import fetch_assets
+from app.services.market_service import get_multiple_prices_async
+from app.services.metadata_store import PENDING_SECTOR, UNKNOWN_SECTOR, get_sectors
+from app.services.portfolio_analytics import analyze_holdings, encode_labels
+from app.services.covariance_service import DEFAULT_WINDOW, get_correlation
+from app.services.history_store import DEFAULT_LOOKBACK
+from app.services.risk_metrics import DEFAULT_BENCHMARK, DEFAULT_RISK_FREE_RATE, load_closes, portfolio_risk
 
-settings = get_settings()
-supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+MAX_RISK_YEARS = DEFAULT_LOOKBACK.days // 365  # The history store holds no more than this
 
 router = APIRouter(
     prefix="/analytics",
@@ -34,6 +40,7 @@ class RiskMetrics(BaseModel):
     top_holding_weight: float
     sector_count: int
     asset_count: int
+    hhi: float = 0  # Herfindahl-Hirschman index of holding weights, 0-10,000
 
 class PortfolioAnalysisResponse(BaseModel):
     summary: str
@@ -46,6 +53,37 @@ class PortfolioAnalysisResponse(BaseModel):
     risk_metrics: RiskMetrics
     recommendations: List[str]
     detailed_analysis: str
+    pending_sector_symbols: List[str] = []  # sectors still being looked up; scored as "Other" meanwhile
+
+class HoldingRisk(BaseModel):
+    symbol: str
+    weight: float  # percent of current value
+    volatility: float  # annualized, percent
+    beta: Optional[float]
+
+class HistoricalRiskResponse(BaseModel):
+    start: str
+    end: str
+    observations: int  # daily returns used
+    volatility: float  # annualized, percent
+    sharpe_ratio: float
+    beta: Optional[float]  # against the benchmark
+    max_drawdown: float  # percent
+    var_historical: float  # one-day, percent of portfolio value
+    var_parametric: float  # one-day, percent of portfolio value
+    confidence: float
+    benchmark: str
+    holdings: List[HoldingRisk]
+    missing_symbols: List[str]  # holdings without stored price history
+
+class CorrelationResponse(BaseModel):
+    symbols: List[str]
+    matrix: List[List[float]]  # matrix[i][j] is the correlation of symbols[i] and symbols[j]
+    window: int  # trading days in the rolling window
+    observations: int  # daily returns currently in the window
+    symbol_observations: List[int] = []  # days in the window each symbol has a return; pairs use their overlap
+    as_of: Optional[str]
+    missing_symbols: List[str]  # holdings without stored price history
 
 @router.get("/portfolio", response_model=PortfolioAnalysisResponse)
 async def analyze_portfolio(user_id: str = Query(..., description="User ID")):
@@ -55,96 +93,70 @@ async def analyze_portfolio(user_id: str = Query(..., description="User ID")):
     """
     try:
         # 1. Fetch user's assets
-        assets_response = supabase_admin.table("assets").select("*").eq("user_id", user_id).execute()
+        raw_assets = await fetch_assets(user_id)
         
-        if not assets_response.data or len(assets_response.data) == 0:
+        if not raw_assets:
             raise HTTPException(status_code=404, detail="No assets found in portfolio")
         
-        raw_assets = assets_response.data
-        
-        # 2. Fetch sector info for each asset using yfinance
-        assets_analysis = []
-        sector_map = {}
-        total_value = 0
-        total_invested = 0
+        # 2. Resolve prices and sectors once per distinct symbol, in one batch
+        symbols = list(dict.fromkeys(asset["symbol"].upper() for asset in raw_assets))
+        try:
+            prices = await get_multiple_prices_async(symbols)
+        except Exception as e:
+            print(f"Error fetching prices for analysis: {e}")
+            prices = {}
+        sectors_by_symbol = get_sectors(symbols)
+        # A sector still being looked up must not count as a sector of its own
+        pending = [s for s in symbols if sectors_by_symbol[s] == PENDING_SECTOR]
+        scored_sectors = {s: UNKNOWN_SECTOR if s in pending else sector for s, sector in sectors_by_symbol.items()}
         
-        for asset in raw_assets:
-            symbol = asset["symbol"]
-            amount = float(asset["amount"])
-            purchase_price = float(asset["price"])
-            
-            # Get current price and sector info
-            try:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
-                current_price = info.get("currentPrice") or info.get("regularMarketPrice") or purchase_price
-                sector = info.get("sector", "Other")
-            except:
-                current_price = purchase_price
-                sector = "Other"
-            
-            value = amount * current_price
-            cost = amount * purchase_price
-            profit_loss = value - cost
-            profit_loss_percent = (profit_loss / cost * 100) if cost > 0 else 0
-            
-            total_value += value
-            total_invested += cost
-            
-            assets_analysis.append({
-                "symbol": symbol,
-                "name": asset["name"],
-                "sector": sector,
-                "value": value,
-                "cost": cost,
-                "profit_loss": profit_loss,
-                "profit_loss_percent": profit_loss_percent
-            })
-            
-            # Aggregate by sector
-            if sector not in sector_map:
-                sector_map[sector] = {"value": 0, "count": 0}
-            sector_map[sector]["value"] += value
-            sector_map[sector]["count"] += 1
+        # 3. Compute values, weights and sector sums over columnar arrays
+        sector_codes, sector_names = encode_labels(scored_sectors[a["symbol"].upper()] for a in raw_assets)
+        current_prices = [prices.get(a["symbol"].upper()) or float(a["price"]) for a in raw_assets]
+        analytics = analyze_holdings(
+            quantity=[float(a["amount"]) for a in raw_assets],
+            cost_price=[float(a["price"]) for a in raw_assets],
+            price=current_prices,
+            sector_code=sector_codes,
+            n_sectors=len(sector_names),
+        )
+        total_value = float(analytics.total_value[0])
+        total_invested = float(analytics.total_cost[0])
         
-        # 3. Calculate weights and build response objects
-        assets_with_weight = []
-        for a in assets_analysis:
-            weight = (a["value"] / total_value * 100) if total_value > 0 else 0
-            assets_with_weight.append(AssetAnalysis(
-                symbol=a["symbol"],
-                name=a["name"],
-                sector=a["sector"],
-                weight=round(weight, 1),
-                value=round(a["value"], 2),
-                profit_loss=round(a["profit_loss"], 2),
-                profit_loss_percent=round(a["profit_loss_percent"], 2)
-            ))
+        assets_with_weight = [
+            AssetAnalysis(
+                symbol=asset["symbol"],
+                name=asset["name"],
+                sector=sectors_by_symbol[asset["symbol"].upper()],
+                weight=round(float(weight), 1),
+                value=round(float(value), 2),
+                profit_loss=round(float(profit_loss), 2),
+                profit_loss_percent=round(float(profit_loss_percent), 2)
+            )
+            for asset, weight, value, profit_loss, profit_loss_percent in zip(
+                raw_assets, analytics.weight, analytics.value,
+                analytics.profit_loss, analytics.profit_loss_percent
+            )
+        ]
         
         # Sort by weight descending
         assets_with_weight.sort(key=lambda x: x.weight, reverse=True)
         
         # 4. Build sector breakdown
-        sectors = []
-        for sector, data in sector_map.items():
-            weight = (data["value"] / total_value * 100) if total_value > 0 else 0
-            sectors.append(SectorBreakdown(
-                sector=sector,
-                weight=round(weight, 1),
-                value=round(data["value"], 2),
-                count=data["count"]
-            ))
+        sectors = [
+            SectorBreakdown(
+                sector=name,
+                weight=round(float(analytics.sector_weight[0, code]), 1),
+                value=round(float(analytics.sector_value[0, code]), 2),
+                count=int(analytics.sector_count[0, code])
+            )
+            for code, name in enumerate(sector_names)
+        ]
         sectors.sort(key=lambda x: x.weight, reverse=True)
         
         # 5. Calculate risk metrics
-        top_holding_weight = assets_with_weight[0].weight if assets_with_weight else 0
-        
-        # Diversification score (higher is better)
-        # Based on number of assets, sectors, and concentration
-        asset_score = min(len(assets_with_weight) * 10, 40)  # Max 40 points for 4+ assets
-        sector_score = min(len(sectors) * 15, 30)  # Max 30 points for 2+ sectors
-        concentration_score = max(0, 30 - top_holding_weight)  # Lower concentration = higher score
-        diversification_score = asset_score + sector_score + concentration_score
+        top_holding_weight = float(analytics.top_holding_weight[0])
+        diversification_score = float(analytics.diversification_score[0])
         
         if top_holding_weight > 50:
             concentration_risk = "High"
@@ -154,11 +166,12 @@ async def analyze_portfolio(user_id: str = Query(..., description="User ID")):
             concentration_risk = "Low"
         
         risk_metrics = RiskMetrics(
-            diversification_score=round(min(diversification_score, 100), 0),
+            diversification_score=round(diversification_score, 0),
             concentration_risk=concentration_risk,
             top_holding_weight=round(top_holding_weight, 1),
             sector_count=len(sectors),
-            asset_count=len(assets_with_weight)
+            asset_count=len(assets_with_weight),
+            hhi=round(float(analytics.hhi[0]), 0)
         )
         
         # 6. Generate recommendations
@@ -204,7 +217,8 @@ async def analyze_portfolio(user_id: str = Query(..., description="User ID")):
             sectors=sectors,
             risk_metrics=risk_metrics,
             recommendations=recommendations,
-            detailed_analysis=detailed_analysis
+            detailed_analysis=detailed_analysis,
+            pending_sector_symbols=pending
         )
         
     except HTTPException:
@@ -214,6 +228,107 @@ async def analyze_portfolio(user_id: str = Query(..., description="User ID")):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/risk", response_model=HistoricalRiskResponse)
+async def analyze_risk(
+    user_id: str = Query(..., description="User ID"),
+    years: int = Query(3, ge=1, le=MAX_RISK_YEARS, description="Length of the history window"),
+    confidence: float = Query(0.95, gt=0.5, lt=1, description="VaR confidence level"),
+    risk_free_rate: float = Query(DEFAULT_RISK_FREE_RATE, description="Annual risk-free rate for the Sharpe ratio"),
+    benchmark: str = Query(DEFAULT_BENCHMARK, description="Benchmark symbol for beta")
+):
+    """
+    Realized risk of the current holdings over their daily price history:
+    volatility, Sharpe ratio, beta, max drawdown and one-day VaR.
+    """
+    try:
+        assets = await fetch_assets(user_id, "symbol, amount")
+        
+        if not assets:
+            raise HTTPException(status_code=404, detail="No assets found in portfolio")
+        
+        quantities: Dict[str, float] = {}
+        for asset in assets:
+            symbol = asset["symbol"].upper()
+            quantities[symbol] = quantities.get(symbol, 0) + float(asset["amount"])
+        
+        benchmark = benchmark.upper()
+        end = date.today()
+        start = end - timedelta(days=365 * years)
+        closes = await asyncio.to_thread(load_closes, list(quantities) + [benchmark], start, end)
+        benchmark_closes = closes.pop(benchmark, None) if benchmark not in quantities else closes.get(benchmark)
+        
+        report = portfolio_risk(closes, quantities, benchmark_closes, risk_free_rate, confidence)
+        if report is None:
+            raise HTTPException(status_code=422, detail="Not enough price history to compute risk metrics")
+        
+        return HistoricalRiskResponse(
+            start=report["start"],
+            end=report["end"],
+            observations=report["observations"],
+            volatility=round(report["volatility"] * 100, 2),
+            sharpe_ratio=round(report["sharpe_ratio"], 2),
+            beta=round(report["beta"], 2) if report["beta"] is not None else None,
+            max_drawdown=round(report["max_drawdown"] * 100, 2),
+            var_historical=round(report["var_historical"] * 100, 2),
+            var_parametric=round(report["var_parametric"] * 100, 2),
+            confidence=confidence,
+            benchmark=benchmark,
+            holdings=[
+                HoldingRisk(
+                    symbol=h["symbol"],
+                    weight=round(h["weight"] * 100, 1),
+                    volatility=round(h["volatility"] * 100, 2),
+                    beta=round(h["beta"], 2) if h["beta"] is not None else None
+                )
+                for h in report["holdings"]
+            ],
+            missing_symbols=sorted(s for s in quantities if s not in closes)
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error computing risk metrics: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/correlation", response_model=CorrelationResponse)
+async def correlation_heatmap(
+    user_id: str = Query(..., description="User ID"),
+    window: int = Query(DEFAULT_WINDOW, ge=20, le=1260, description="Rolling window in trading days")
+):
+    """
+    Pairwise correlations of daily returns between the user's holdings,
+    served from the shared rolling covariance model.
+    """
+    try:
+        assets = await fetch_assets(user_id, "symbol")
+        
+        if not assets:
+            raise HTTPException(status_code=404, detail="No assets found in portfolio")
+        
+        symbols = list(dict.fromkeys(asset["symbol"].upper() for asset in assets))
+        covered, matrix, info = await asyncio.to_thread(get_correlation, symbols, window)
+        if info["observations"] < 2:
+            raise HTTPException(status_code=422, detail="Not enough price history to compute correlations")
+        
+        return CorrelationResponse(
+            symbols=covered,
+            matrix=np.round(matrix, 4).tolist(),
+            window=info["window"],
+            observations=info["observations"],
+            symbol_observations=info["symbol_observations"],
+            as_of=info["as_of"].isoformat() if info["as_of"] else None,
+            missing_symbols=[s for s in symbols if s not in covered]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error computing correlations: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 def generate_detailed_analysis(assets, sectors, risk_metrics, total_value, total_invested, total_gain, total_gain_percent):
     """Generate a detailed, human-readable analysis of the portfolio."""
     
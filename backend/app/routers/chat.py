@@ -1,12 +1,12 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List
 import httpx
-from supabase import create_client, Client
 from app.config import get_settings
+from app.services.database import fetch_assets, fetch_transactions, fetch_user_profile
 
 settings = get_settings()
-supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
 
 GEMINI_API_KEY = settings.GEMINI_API_KEY
 GEMINI_URL = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={GEMINI_API_KEY}"
@@ -29,23 +29,16 @@ class ChatResponse(BaseModel):
     response: str
     suggestions: List[str]
 
-def get_portfolio_context(user_id: str) -> str:
+async def get_portfolio_context(user_id: str) -> str:
     """Fetch user's portfolio data to provide context to the chatbot."""
     try:
-        # Get user profile (without risk_level which doesn't exist)
-        profile_response = supabase_admin.table("user_profiles").select(
-            "initial_investment, monthly_budget"
-        ).eq("user_id", user_id).execute()
-        
-        profile = profile_response.data[0] if profile_response.data else {}
-        
-        # Get assets
-        assets_response = supabase_admin.table("assets").select("*").eq("user_id", user_id).execute()
-        assets = assets_response.data or []
-        
-        # Get transactions
-        tx_response = supabase_admin.table("transactions").select("*").eq("user_id", user_id).execute()
-        transactions = tx_response.data or []
+        # Get user profile (without risk_level which doesn't exist), assets and transactions together
+        profile, assets, transactions = await asyncio.gather(
+            fetch_user_profile(user_id, "initial_investment, monthly_budget"),
+            fetch_assets(user_id),
+            fetch_transactions(user_id),
+        )
+        profile = profile or {}
         
         # Build context string
         context = f"""
@@ -106,7 +99,7 @@ async def send_message(request: ChatRequest):
     """
     try:
         # Get portfolio context
-        portfolio_context = get_portfolio_context(request.user_id)
+        portfolio_context = await get_portfolio_context(request.user_id)
         
         # Build conversation history for Gemini
         full_prompt = f"{SYSTEM_PROMPT}\n\n{portfolio_context}\n\n"
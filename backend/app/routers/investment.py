@@ -1,18 +1,42 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query
 from fastapi.responses import Response
-from app.models.investment import InvestmentRequest, InvestmentResponse
-from app.services.investment_calculator import calculate_compound_interest
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-import io
+from app.models.investment import (
+    GoalSeekRequest, GoalSeekResponse, InvestmentRequest, InvestmentResponse,
+    ScenarioBatchRequest, ScenarioBatchResponse, SCENARIO_BOUNDS,
+)
+from app.services.investment_calculator import (
+    calculate_compound_interest, calculate_scenarios, future_value, growth_series, simulate_investment,
+    solve_annual_return, solve_monthly_amount, solve_years,
+)
+from app.services.portfolio_service import get_portfolio_recommendation
+from app.services.chart_cache import chart_key, get_chart_cache
+from app.services.chart_renderer import RenderQueueFull, render_chart
+from app.services.chart_svg import render_investment_svg
+from typing import Literal, Optional
+import asyncio
 import base64
+import numpy as np
+
+CHART_MAX_AGE_SECONDS = 86400  # Charts are content-addressed, so they never go stale
+CHART_RETRY_AFTER_SECONDS = 2
 
 router = APIRouter(
     prefix="/investment",
     tags=["investment"]
 )
 
+
+def _profile_volatility(risk_profile, annual_return: float) -> float:
+    """
+    Volatility of the given risk profile, or of the profile whose expected
+    return is closest to `annual_return` when none is given.
+    """
+    if risk_profile is not None:
+        return get_portfolio_recommendation(risk_profile)["volatility"]
+    profiles = [get_portfolio_recommendation(p) for p in range(1, 5)]
+    closest = min(profiles, key=lambda p: abs(p["expected_return"] - annual_return))
+    return closest["volatility"]
+
 @router.post("/calculate", response_model=InvestmentResponse, summary="Calculate Compound Interest")
 async def calculate_investment(request: InvestmentRequest):
     """
@@ -22,7 +46,12 @@ async def calculate_investment(request: InvestmentRequest):
     - **years**: Duration of the investment (in years)
     - **annual_return**: Expected annual return rate (in percentage)
     
+    - **simulate**: Also run a Monte Carlo projection (optional)
+    - **risk_profile**: Risk profile (1-4) whose volatility the simulation uses (optional)
+    - **simulations**: Number of simulated paths (optional)
+    
     Returns future value, total contributions, earnings, and a year-by-year breakdown.
+    With **simulate**, also returns p5/p25/p50/p75/p95 value bands per year.
     """
     try:
         result = calculate_compound_interest(
@@ -31,6 +60,17 @@ async def calculate_investment(request: InvestmentRequest):
             annual_return=request.annual_return,
             initial_investment=request.initial_investment
         )
+        if request.simulate:
+            # Large simulations take a noticeable fraction of a second; keep them off the event loop
+            result["simulation"] = await asyncio.to_thread(
+                simulate_investment,
+                monthly_amount=request.monthly_amount,
+                years=request.years,
+                annual_return=request.annual_return,
+                annual_volatility=_profile_volatility(request.risk_profile, request.annual_return),
+                initial_investment=request.initial_investment,
+                simulations=request.simulations
+            )
         return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -38,88 +78,184 @@ async def calculate_investment(request: InvestmentRequest):
         raise HTTPException(status_code=500, detail="An error occurred during calculation")
 
 
+@router.post("/scenarios", response_model=ScenarioBatchResponse, summary="Calculate Many Scenarios")
+async def calculate_scenario_batch(request: ScenarioBatchRequest):
+    """
+    Evaluate many compound-interest scenarios in one request.
+    
+    - **scenarios**: Explicit list of scenarios (optional)
+    - **monthly_amount**, **years**, **annual_return**, **initial_investment**:
+      Lists of values or `{start, stop, step}` ranges; every combination is evaluated
+    
+    Returns one row per scenario with the same figures as /calculate.
+    """
+    try:
+        rows = request.expand()
+        columns = list(SCENARIO_BOUNDS)
+        inputs = np.array(rows, dtype=float).reshape(-1, len(columns))
+        result = calculate_scenarios(*inputs.T)
+        yearly = np.round(result["yearly_breakdown"], 2)
+        return {
+            "columns": columns,
+            "scenarios": inputs.tolist(),
+            "future_value": np.round(result["future_value"], 2).tolist(),
+            "total_contributed": np.round(result["total_contributed"], 2).tolist(),
+            "total_earnings": np.round(result["total_earnings"], 2).tolist(),
+            "yearly_breakdown": [row[:int(n)].tolist() + [None] * (yearly.shape[1] - int(n)) for row, n in zip(yearly, inputs[:, 1])]
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="An error occurred during calculation")
+
+
+@router.post("/goal-seek", response_model=GoalSeekResponse, summary="Solve for a Target Value")
+async def goal_seek(request: GoalSeekRequest):
+    """
+    Find the monthly amount, number of years or annual return needed to reach
+    a target future value.
+    
+    - **solve_for**: `monthly_amount`, `years` or `annual_return`
+    - **target_value**: Future value to reach (in ILS)
+    - the remaining inputs of /calculate
+    """
+    try:
+        inputs = {
+            "monthly_amount": request.monthly_amount,
+            "years": request.years,
+            "annual_return": request.annual_return,
+            "initial_investment": request.initial_investment,
+        }
+        if request.solve_for == "monthly_amount":
+            value = solve_monthly_amount(request.target_value, request.years, request.annual_return, request.initial_investment)
+        elif request.solve_for == "years":
+            value = solve_years(request.target_value, request.monthly_amount, request.annual_return, request.initial_investment)
+        else:
+            value = solve_annual_return(request.target_value, request.monthly_amount, request.years, request.initial_investment)
+        inputs[request.solve_for] = value
+        
+        return {
+            "solve_for": request.solve_for,
+            "value": round(value, 4),
+            **inputs,
+            "target_value": request.target_value,
+            "projected_value": round(future_value(**inputs), 2)
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="An error occurred during calculation")
+
+
+def _chart_params(request: InvestmentRequest) -> dict:
+    return {
+        "monthly_amount": request.monthly_amount,
+        "years": request.years,
+        "annual_return": request.annual_return,
+        "initial_investment": request.initial_investment,
+    }
+
+
+async def _chart_png(request: InvestmentRequest) -> bytes:
+    """
+    Rendered growth chart for the request's inputs, from the chart cache when
+    possible. Answers 503 when the render pool is saturated.
+    """
+    params = _chart_params(request)
+    try:
+        return await get_chart_cache().get_or_render_async(
+            chart_key("investment_growth", params), lambda: render_chart(**params)
+        )
+    except RenderQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Chart renderer is busy, please retry shortly",
+            headers={"Retry-After": str(CHART_RETRY_AFTER_SECONDS)},
+        )
+
+
 @router.post("/chart", summary="Generate Investment Chart")
-async def generate_chart(request: InvestmentRequest):
+async def generate_chart(
+    request: InvestmentRequest,
+    format: Literal["png", "data", "svg"] = Query("png", description="png: base64 image, data: plot series, svg: vector image"),
+):
     """
-    Generate a matplotlib chart showing investment growth over time.
-    Returns the chart as a base64 encoded PNG image.
+    Chart of investment growth over time, in one of three forms:
+
+    - data: the yearly contributed/value series for the client to plot
+    - svg: a small vector rendering of the same chart
+    - png: a matplotlib rendering as a base64 data URI. Prefer GET
+      /investment/chart.png, which serves the image itself with an ETag.
     """
     try:
-        result = calculate_compound_interest(
+        series = growth_series(
             monthly_amount=request.monthly_amount,
             years=request.years,
             annual_return=request.annual_return,
             initial_investment=request.initial_investment
         )
-        
-        yearly_breakdown = result["yearly_breakdown"]
-        years_range = list(range(len(yearly_breakdown) + 1))
-        
-        # Build data
-        contributed = [request.initial_investment]
-        values = [request.initial_investment]
-        
-        for i, val in enumerate(yearly_breakdown):
-            year = i + 1
-            contrib = request.initial_investment + (request.monthly_amount * 12 * year)
-            contributed.append(contrib)
-            values.append(val)
-        
-        # Create the figure
-        fig, ax = plt.subplots(figsize=(10, 6), dpi=100)
-        
-        # Plot lines
-        ax.plot(years_range, contributed, 'b-', linewidth=2.5, marker='o', markersize=6, label='Total Contributed')
-        ax.plot(years_range, values, 'g-', linewidth=2.5, marker='o', markersize=6, label='Total Value (with gains)')
-        
-        # Fill between
-        ax.fill_between(years_range, contributed, alpha=0.2, color='blue')
-        ax.fill_between(years_range, values, alpha=0.2, color='green')
-        
-        # Formatting
-        ax.set_xlabel('Years', fontsize=12, fontweight='bold')
-        ax.set_ylabel('Amount ($)', fontsize=12, fontweight='bold')
-        ax.set_title(f'Investment Growth Over {request.years} Years (at {request.annual_return}% annual return)', 
-                     fontsize=14, fontweight='bold', pad=15)
-        
-        # Format y-axis as currency
-        def format_ils(x, pos):
-            if x >= 1000000:
-                return f'${x/1000000:.1f}M'
-            elif x >= 1000:
-                return f'${x/1000:.0f}k'
-            return f'${x:.0f}'
-        
-        ax.yaxis.set_major_formatter(plt.FuncFormatter(format_ils))
-        
-        # Grid and legend
-        ax.grid(True, linestyle='--', alpha=0.7)
-        ax.legend(loc='upper left', fontsize=11)
-        
-        # Set x-axis ticks to show all years
-        ax.set_xticks(years_range)
-        ax.set_xlim(0, request.years)
-        ax.set_ylim(0, max(values) * 1.1)
-        
-        # Tight layout
-        plt.tight_layout()
-        
-        # Save to bytes
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', facecolor='white', edgecolor='none')
-        buf.seek(0)
-        plt.close(fig)
-        
+        totals = {
+            "future_value": series["future_value"],
+            "total_contributed": series["total_contributed"],
+            "total_earnings": series["total_earnings"]
+        }
+        if format == "data":
+            return {
+                "years": series["years"],
+                "contributed": series["contributed"],
+                "value": series["value"],
+                **totals
+            }
+        if format == "svg":
+            return {"chart_svg": render_investment_svg(series, request.annual_return), **totals}
+
+        png = await _chart_png(request)
+
         # Encode to base64
-        img_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
+        img_base64 = base64.b64encode(png).decode('utf-8')
         
         return {
             "chart_image": f"data:image/png;base64,{img_base64}",
-            "future_value": result["future_value"],
-            "total_contributed": result["total_contributed"],
-            "total_earnings": result["total_earnings"]
+            **totals
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating chart: {str(e)}")
 
+
+@router.get("/chart.png", summary="Investment Chart Image")
+async def get_chart_image(
+    monthly_amount: float = Query(..., ge=100, le=50000, description="Monthly contribution in ILS"),
+    years: int = Query(..., ge=1, le=30, description="Investment period in years"),
+    annual_return: float = Query(..., ge=2, le=15, description="Expected annual return percentage"),
+    initial_investment: float = Query(0, ge=0, le=100000, description="Initial lump sum investment in ILS"),
+    if_none_match: Optional[str] = Header(default=None),
+):
+    """
+    Investment growth chart as a PNG.
+
+    The ETag is the hash of the chart's inputs, so a browser revalidating
+    with If-None-Match gets a 304 without the chart being rendered or sent.
+    """
+    request = InvestmentRequest(
+        monthly_amount=monthly_amount,
+        years=years,
+        annual_return=annual_return,
+        initial_investment=initial_investment,
+    )
+    key = chart_key("investment_growth", _chart_params(request))
+    etag = f'"{key}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={CHART_MAX_AGE_SECONDS}"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        png = await _chart_png(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error generating chart: {e}")
+        raise HTTPException(status_code=500, detail="Error generating chart")
+    return Response(content=png, media_type="image/png", headers=headers)
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, HTTPException
+import json
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Optional
-from app.services.market_service import get_current_price, get_multiple_prices, get_stock_info
+from app.services.market_service import get_current_price_async, get_multiple_prices_async, get_stock_info_async, get_cache_stats
+from app.services.quote_stream import HEARTBEAT_SECONDS, get_quote_stream
 
 router = APIRouter(
     prefix="/market",
     tags=["Market Data"]
 )
 
+MAX_SYMBOLS_PER_REQUEST = 5000  # Matches the price cache size
+
 
 class PriceRequest(BaseModel):
     symbols: List[str]
@@ -42,7 +47,7 @@ async def get_price(symbol: str):
     
     For Israeli stocks, add .TA suffix (e.g., TEVA.TA)
     """
-    price = get_current_price(symbol)
+    price = await get_current_price_async(symbol)
     
     if price is None:
         raise HTTPException(
@@ -61,22 +66,61 @@ async def get_prices(request: PriceRequest):
     """
     Get current market prices for multiple stock symbols at once.
     
-    - **symbols**: List of stock ticker symbols
+    - **symbols**: List of stock ticker symbols (up to 5000)
     
+    Large lists are split into provider-sized batches fetched in parallel.
     Returns a dictionary mapping each symbol to its current price.
     Symbols that couldn't be found will have null value.
     """
     if not request.symbols:
         raise HTTPException(status_code=400, detail="Please provide at least one symbol")
     
-    if len(request.symbols) > 50:
-        raise HTTPException(status_code=400, detail="Maximum 50 symbols per request")
+    if len(request.symbols) > MAX_SYMBOLS_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_SYMBOLS_PER_REQUEST} symbols per request")
     
-    prices = get_multiple_prices(request.symbols)
+    prices = await get_multiple_prices_async(request.symbols)
     
     return {"prices": prices}
 
 
+@router.get("/stream", summary="Stream live prices for multiple symbols")
+async def stream_prices(request: Request, symbols: str = Query(..., description="Comma-separated ticker symbols")):
+    """
+    Server-sent event stream of price changes.
+    
+    - **symbols**: Comma-separated stock ticker symbols (e.g., AAPL,MSFT,BTC-USD)
+    
+    Sends a `prices` event with the latest known prices first, then one
+    whenever any of the symbols changes. All clients share a single
+    upstream refresh.
+    """
+    symbol_list = list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+    if not symbol_list:
+        raise HTTPException(status_code=400, detail="Please provide at least one symbol")
+    
+    if len(symbol_list) > MAX_SYMBOLS_PER_REQUEST:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_SYMBOLS_PER_REQUEST} symbols per request")
+    
+    async def events():
+        stream = get_quote_stream()
+        subscription = stream.subscribe(symbol_list)
+        try:
+            while not await request.is_disconnected():
+                prices = await subscription.next_update(HEARTBEAT_SECONDS)
+                if prices:
+                    yield f"event: prices\ndata: {json.dumps(prices)}\n\n"
+                else:
+                    yield ": heartbeat\n\n"
+        finally:
+            stream.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/info/{symbol}", summary="Get detailed stock information")
 async def get_info(symbol: str):
     """
@@ -86,7 +130,7 @@ async def get_info(symbol: str):
     
     Returns company info, market data, and key statistics.
     """
-    info = get_stock_info(symbol)
+    info = await get_stock_info_async(symbol)
     
     if info is None:
         raise HTTPException(
@@ -95,3 +139,11 @@ async def get_info(symbol: str):
         )
     
     return info
+
+
+@router.get("/cache/stats", summary="Get price cache statistics")
+async def cache_stats():
+    """
+    Get hit, miss and stale-serve counters for the in-memory price cache.
+    """
+    return get_cache_stats()
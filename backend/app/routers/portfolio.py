@@ -56,7 +56,7 @@ async def get_stocks(
     Get a list of specific stock recommendations for the risk profile.
     If user_id is provided, filters stocks based on affordability (Initial Investment - Current Holdings).
     """
-    result = get_stock_recommendations(profile, user_id)
+    result = await get_stock_recommendations(profile, user_id)
     # result is a dict matching RecommendationResponse
     if not result["recommendations"] and user_id:
          # Loophole: if filtering removed everything, we still return empty list + budget info
@@ -70,7 +70,7 @@ async def add_asset(request: AcceptRecommendationRequest):
     Accept a recommendation and add it to user's assets.
     """
     try:
-        result = add_asset_to_portfolio(request)
+        result = await add_asset_to_portfolio(request)
         return {"message": "Asset added successfully", "asset": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
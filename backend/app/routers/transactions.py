@@ -1,12 +1,11 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
-from supabase import create_client, Client
-from app.config import get_settings
-
-settings = get_settings()
-supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
+from app.services.database import (
+    delete_asset, fetch_asset, fetch_financial_snapshot, fetch_transactions, insert_transaction,
+)
 
 router = APIRouter(
     prefix="/portfolio",
@@ -47,15 +46,13 @@ async def close_position(request: ClosePositionRequest):
     
     try:
         # 1. Fetch the asset
-        asset_response = supabase_admin.table("assets").select("*").eq("id", request.asset_id).eq("user_id", request.user_id).execute()
-        print(f"[CLOSE] Asset query result: {asset_response.data}")
+        asset = await fetch_asset(request.asset_id, request.user_id)
+        print(f"[CLOSE] Asset query result: {asset}")
         
-        if not asset_response.data:
+        if not asset:
             print(f"[CLOSE] Asset not found!")
             raise HTTPException(status_code=404, detail="Asset not found")
         
-        asset = asset_response.data[0]
-        
         # 2. Create transaction record
         quantity = float(asset["amount"])
         purchase_price = float(asset["price"])
@@ -81,20 +78,20 @@ async def close_position(request: ClosePositionRequest):
         }
         print(f"[CLOSE] Transaction data to insert: {transaction_data}")
         
-        tx_response = supabase_admin.table("transactions").insert(transaction_data).execute()
-        print(f"[CLOSE] Transaction insert result: {tx_response.data}")
+        transaction = await insert_transaction(transaction_data)
+        print(f"[CLOSE] Transaction insert result: {transaction}")
         
-        if not tx_response.data:
+        if not transaction:
             print(f"[CLOSE] Transaction insert failed - no data returned")
             raise HTTPException(status_code=500, detail="Failed to create transaction")
         
         # 3. Delete the asset from portfolio
-        delete_response = supabase_admin.table("assets").delete().eq("id", request.asset_id).execute()
-        print(f"[CLOSE] Asset deleted: {delete_response}")
+        deleted = await delete_asset(request.asset_id)
+        print(f"[CLOSE] Asset deleted: {deleted}")
         
         return {
             "message": "Position closed successfully",
-            "transaction": tx_response.data[0],
+            "transaction": transaction,
             "profit_loss": round(profit_loss, 2),
             "profit_loss_percent": round(profit_loss_percent, 2)
         }
@@ -115,12 +112,12 @@ async def get_transactions(
     Get all transactions (closed positions) for a user.
     """
     try:
-        response = supabase_admin.table("transactions").select("*").eq("user_id", user_id).order("sale_date", desc=True).execute()
+        rows = await fetch_transactions(user_id, newest_first=True)
         
         transactions = []
         total_realized_gains = 0.0
         
-        for tx in response.data:
+        for tx in rows:
             profit_loss = float(tx.get("profit_loss", 0) or 0)
             total_realized_gains += profit_loss
             
@@ -175,36 +172,27 @@ async def get_portfolio_history(
         from datetime import datetime, timedelta
         from dateutil.relativedelta import relativedelta
         
-        # 1. Get user profile for initial investment and monthly budget
-        profile_response = supabase_admin.table("user_profiles").select(
-            "initial_investment, monthly_budget, created_at"
-        ).eq("user_id", user_id).execute()
+        # 1. Get the financial snapshot (profile, cost of current assets, realized gains) and
+        #    transactions (closed positions with their dates and P/L) together
+        snapshot, transactions = await asyncio.gather(
+            fetch_financial_snapshot(user_id),
+            fetch_transactions(user_id),
+        )
         
-        initial_investment = 0.0
-        monthly_budget = 0.0
+        initial_investment = snapshot["initial_investment"]
+        monthly_budget = snapshot["monthly_budget"]
         account_created = datetime.now()
         
-        if profile_response.data:
-            profile = profile_response.data[0]
-            initial_investment = float(profile.get("initial_investment") or 0)
-            monthly_budget = float(profile.get("monthly_budget") or 0)
-            account_created = datetime.fromisoformat(profile["created_at"].replace("Z", "+00:00"))
-        
-        # 2. Get all transactions (closed positions with their dates and P/L)
-        tx_response = supabase_admin.table("transactions").select("*").eq("user_id", user_id).execute()
-        transactions = tx_response.data or []
-        
-        # 3. Get current assets
-        assets_response = supabase_admin.table("assets").select("*").eq("user_id", user_id).execute()
-        current_assets = assets_response.data or []
+        if snapshot["created_at"]:
+            account_created = datetime.fromisoformat(snapshot["created_at"].replace("Z", "+00:00"))
         
-        # Calculate current portfolio value
-        current_value = sum(float(a["amount"]) * float(a["price"]) for a in current_assets)
+        # Current portfolio value
+        current_value = snapshot["invested_cost"]
         
-        # Add realized gains from transactions
-        realized_gains = sum(float(tx.get("profit_loss") or 0) for tx in transactions)
+        # Realized gains from transactions
+        realized_gains = snapshot["realized_gains"]
         
-        # 4. Build monthly history (last 6 months)
+        # 2. Build monthly history (last 6 months)
         history = []
         now = datetime.now()
         
@@ -235,7 +223,7 @@ async def get_portfolio_history(
             else:
                 # Approximate historical value based on invested amount + proportional gains
                 progress = (5 - i) / 5
-                estimated_unrealized = (current_value - sum(float(a["amount"]) * float(a["price"]) - float(a["amount"]) * float(a["price"]) for a in current_assets)) * progress
+                estimated_unrealized = current_value * progress
                 value_at_month = invested_at_month + realized_up_to_month + estimated_unrealized * 0.5
             
             gain_at_month = value_at_month - invested_at_month
@@ -248,10 +236,7 @@ async def get_portfolio_history(
             ))
         
         # Calculate totals
-        total_invested = initial_investment
-        months_passed = (now.year - account_created.year) * 12 + (now.month - account_created.month)
-        if months_passed > 0:
-            total_invested += monthly_budget * months_passed
+        total_invested = snapshot["cash_injected"]
         
         total_gain = (current_value + realized_gains) - total_invested
         total_gain_percent = (total_gain / total_invested * 100) if total_invested > 0 else 0
@@ -1,11 +1,16 @@
+import asyncio
 import logging
 import re
 from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
 from fastapi import HTTPException, status
-from supabase import create_client, Client
 from app.config import get_settings
+from app.services.database import get_client, get_sync_client
 from app.schemas import ForgotPasswordRequest, ResetPasswordRequest
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
@@ -13,8 +18,16 @@ logger = logging.getLogger(__name__)
 # We use service_role key to bypass RLS for the rate_limit_tracking check if needed, 
 # or if RLS allows anon insert but not read. 
 # For safety, we'll use service_role for the rate limit check/insert.
-supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
-supabase_anon: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+# Table queries use the shared async client. Supabase Auth calls are
+# synchronous, so they use the shared sync clients in a worker thread.
+# Both are created on first use, not at import, to keep startup fast.
+def _admin_client() -> "Client":
+    return get_sync_client()
+
+
+def _anon_client() -> "Client":
+    return get_sync_client(anon=True)
+
 
 RATE_LIMIT_HOURLY = 3
 
@@ -47,7 +60,8 @@ class AuthService:
         
         try:
             # Query rate_limit_tracking table directly
-            response = supabase_admin.table("rate_limit_tracking") \
+            db = await get_client()
+            response = await db.table("rate_limit_tracking") \
                 .select("id", count="exact") \
                 .eq("email", email) \
                 .eq("request_type", "password_reset") \
@@ -73,7 +87,7 @@ class AuthService:
                 )
 
             # 2. Record Attempt
-            supabase_admin.table("rate_limit_tracking").insert({
+            await db.table("rate_limit_tracking").insert({
                 "email": email,
                 "request_type": "password_reset"
             }).execute()
@@ -83,7 +97,7 @@ class AuthService:
             redirect_to = f"{settings.FRONTEND_URL}/reset-password"
             
             # reset_password_for_email returns {} on success or throws error
-            supabase_anon.auth.reset_password_for_email(email, {
+            await asyncio.to_thread(_anon_client().auth.reset_password_for_email, email, {
                 "redirect_to": redirect_to
             })
             
@@ -105,7 +119,7 @@ class AuthService:
         try:
             # Verify the token and get the user
             logger.info(f"Verifying token: {request.token[:10]}...")
-            user_response = supabase_anon.auth.get_user(request.token)
+            user_response = await asyncio.to_thread(_anon_client().auth.get_user, request.token)
             
             # Debug log
             logger.info(f"User response: {user_response}")
@@ -116,11 +130,11 @@ class AuthService:
             user_id = user_response.user.id
             
             # Now we can update using service_role because we verified the token is valid and got the user_id.
-            supabase_admin.auth.admin.update_user_by_id(user_id, {"password": request.new_password})
+            await asyncio.to_thread(_admin_client().auth.admin.update_user_by_id, user_id, {"password": request.new_password})
             
             # Invalidate sessions (Logout)
             # Admin sign out is the surest way
-            supabase_admin.auth.admin.sign_out(user_id)
+            await asyncio.to_thread(_admin_client().auth.admin.sign_out, user_id)
             
             logger.info(f"Password reset successful for user {user_id}")
             return {"message": "Password updated successfully. You can now login."}
@@ -0,0 +1,155 @@
+"""
+Content-addressed cache for rendered charts.
+
+A chart is fully determined by its normalized inputs, so the SHA-256 of
+those inputs is both the cache key and the HTTP ETag. Rendered PNGs are
+kept in an in-memory LRU and, when a directory is configured, on disk so
+they survive restarts and are shared between workers.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+CHART_VERSION = 1  # Bump when the chart's look changes to invalidate cached images
+
+
+def chart_key(kind: str, params: Dict[str, Any]) -> str:
+    """
+    Hash chart inputs. Numbers are normalized so 1000, 1000.0 and "1000"
+    give the same key.
+    """
+    normalized = {}
+    for name, value in params.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+            value = int(value) if value.is_integer() else round(value, 6)
+        normalized[name] = value
+    payload = json.dumps({"kind": kind, "version": CHART_VERSION, "params": normalized}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ChartCache:
+    """Two-tier (memory LRU, optional disk) store of rendered charts by key."""
+
+    def __init__(self, max_entries: int, directory: Optional[str] = None):
+        self.max_entries = max_entries
+        self.directory = directory or None
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, asyncio.Task] = {}  # key -> render in progress
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.png")
+
+    def _remember(self, key: str, image: bytes) -> None:
+        with self._lock:
+            self._entries[key] = image
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached image for a key from memory, then disk, or None."""
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image
+        if self.directory:
+            try:
+                with open(self._path(key), "rb") as f:
+                    image = f.read()
+            except FileNotFoundError:
+                image = None
+            except OSError as e:
+                logger.warning(f"Could not read cached chart {key}: {e}")
+                image = None
+            if image is not None:
+                self._remember(key, image)
+                with self._lock:
+                    self.disk_hits += 1
+                return image
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, image: bytes) -> None:
+        """Store an image in memory and, if configured, on disk."""
+        self._remember(key, image)
+        if self.directory:
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(image)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not write cached chart {key}: {e}")
+
+    async def get_or_render_async(self, key: str, render: Callable[[], Awaitable[bytes]]) -> bytes:
+        """
+        Cached image for a key, rendering it with the async `render` and
+        storing it on a miss. Concurrent misses on the same key share a
+        single render.
+        """
+        image = self.get(key)
+        if image is not None:
+            return image
+        loop = asyncio.get_running_loop()
+        pending = self._inflight.get(key)
+        if pending is None or pending.get_loop() is not loop:
+            pending = loop.create_task(self._render_and_store(key, render))
+            self._inflight[key] = pending
+        return await asyncio.shield(pending)
+
+    async def _render_and_store(self, key: str, render: Callable[[], Awaitable[bytes]]) -> bytes:
+        try:
+            image = await render()
+            self.set(key, image)
+            return image
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    def clear(self) -> None:
+        """Drop the memory tier and reset counters; files on disk are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "disk": bool(self.directory),
+            }
+
+
+_cache: Optional[ChartCache] = None
+
+
+def get_chart_cache() -> ChartCache:
+    """Get the process-wide chart cache configured by CHART_CACHE_*."""
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = ChartCache(settings.CHART_CACHE_ENTRIES, settings.CHART_CACHE_DIR)
+    return _cache
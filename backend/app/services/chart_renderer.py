@@ -0,0 +1,165 @@
+"""
+Chart rendering.
+
+pyplot keeps global state and holds the GIL for the whole render, so charts
+are drawn in a pool of worker processes that import matplotlib once at
+start-up. At most CHART_RENDER_WORKERS renders run and CHART_RENDER_QUEUE_SIZE
+wait; beyond that render_chart raises RenderQueueFull instead of queueing
+without bound. matplotlib itself is only imported inside the workers.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from app.config import get_settings
+from app.services.chart_svg import format_amount
+from app.services.investment_calculator import growth_series
+
+logger = logging.getLogger(__name__)
+
+
+class RenderQueueFull(Exception):
+    """Raised when every render worker is busy and the wait queue is full."""
+
+
+def _format_ils(x, pos):
+    return format_amount(x)
+
+
+def render_investment_chart(monthly_amount: float, years: int, annual_return: float, initial_investment: float = 0) -> bytes:
+    """
+    Render the investment growth chart.
+
+    Args:
+        monthly_amount: Monthly contribution in ILS
+        years: Investment period in years
+        annual_return: Expected annual return percentage
+        initial_investment: Initial lump sum investment in ILS
+
+    Returns:
+        PNG image bytes
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # Use non-interactive backend
+    import matplotlib.pyplot as plt
+
+    series = growth_series(monthly_amount, years, annual_return, initial_investment)
+    years_range = series["years"]
+    contributed = series["contributed"]
+    values = series["value"]
+
+    # Create the figure
+    fig, ax = plt.subplots(figsize=(10, 6), dpi=100)
+
+    # Plot lines
+    ax.plot(years_range, contributed, 'b-', linewidth=2.5, marker='o', markersize=6, label='Total Contributed')
+    ax.plot(years_range, values, 'g-', linewidth=2.5, marker='o', markersize=6, label='Total Value (with gains)')
+
+    # Fill between
+    ax.fill_between(years_range, contributed, alpha=0.2, color='blue')
+    ax.fill_between(years_range, values, alpha=0.2, color='green')
+
+    # Formatting
+    ax.set_xlabel('Years', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Amount ($)', fontsize=12, fontweight='bold')
+    ax.set_title(f'Investment Growth Over {years} Years (at {annual_return}% annual return)',
+                 fontsize=14, fontweight='bold', pad=15)
+
+    # Format y-axis as currency
+    ax.yaxis.set_major_formatter(plt.FuncFormatter(_format_ils))
+
+    # Grid and legend
+    ax.grid(True, linestyle='--', alpha=0.7)
+    ax.legend(loc='upper left', fontsize=11)
+
+    # Set x-axis ticks to show all years
+    ax.set_xticks(years_range)
+    ax.set_xlim(0, years)
+    ax.set_ylim(0, max(values) * 1.1)
+
+    # Tight layout
+    plt.tight_layout()
+
+    # Save to bytes
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png', bbox_inches='tight', facecolor='white', edgecolor='none')
+    plt.close(fig)
+    return buf.getvalue()
+
+
+def _init_worker() -> None:
+    """Warm a worker: load the Agg backend and font cache with a throwaway render."""
+    render_investment_chart(monthly_amount=100, years=1, annual_return=2)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_pending = 0  # renders running or waiting in the pool
+
+
+def _ping() -> None:
+    pass
+
+
+def start_render_pool() -> ProcessPoolExecutor:
+    """Start the worker pool if it is not running, launching every worker up front."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = get_settings().CHART_RENDER_WORKERS
+            # spawn: forking a process that runs an event loop and threads is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            # Workers are otherwise only started on demand, by the first renders
+            for _ in range(workers):
+                _pool.submit(_ping)
+            logger.info(f"Started chart render pool with {workers} workers")
+        return _pool
+
+
+def shutdown_render_pool() -> None:
+    """Stop the worker pool, abandoning queued renders."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def render_chart(monthly_amount: float, years: int, annual_return: float, initial_investment: float = 0) -> bytes:
+    """
+    Render the investment growth chart in the worker pool.
+
+    Returns:
+        PNG image bytes
+
+    Raises:
+        RenderQueueFull: If the pool already has its maximum of renders pending
+    """
+    global _pending
+    settings = get_settings()
+    if _pending >= settings.CHART_RENDER_WORKERS + settings.CHART_RENDER_QUEUE_SIZE:
+        raise RenderQueueFull()
+    _pending += 1
+    try:
+        pool = start_render_pool()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                pool, render_investment_chart, monthly_amount, years, annual_return, initial_investment
+            )
+        except BrokenProcessPool:
+            # A worker died; replace the pool so later renders can proceed
+            logger.error("Chart render pool broke, restarting it")
+            shutdown_render_pool()
+            raise
+    finally:
+        _pending -= 1
@@ -0,0 +1,90 @@
+"""
+Lightweight SVG version of the investment growth chart.
+
+Built from plain strings rather than matplotlib, so it costs microseconds
+and a few kilobytes instead of a full render and a ~100 KB PNG.
+"""
+from typing import Any, Dict, List, Sequence
+from xml.sax.saxutils import escape
+
+WIDTH = 640
+HEIGHT = 384
+MARGIN_LEFT = 64
+MARGIN_RIGHT = 16
+MARGIN_TOP = 40
+MARGIN_BOTTOM = 48
+Y_TICKS = 5
+
+CONTRIBUTED_COLOR = "#1f77b4"
+VALUE_COLOR = "#2ca02c"
+
+
+def format_amount(x: float) -> str:
+    """Axis label for an amount, e.g. $950, $12k, $1.2M."""
+    if x >= 1000000:
+        return f'${x/1000000:.1f}M'
+    elif x >= 1000:
+        return f'${x/1000:.0f}k'
+    return f'${x:.0f}'
+
+
+def _points(xs: Sequence[float], ys: Sequence[float]) -> str:
+    return " ".join(f"{x:.1f},{y:.1f}" for x, y in zip(xs, ys))
+
+
+def render_investment_svg(series: Dict[str, Any], annual_return: float) -> str:
+    """
+    Draw the growth chart as an SVG document.
+
+    Args:
+        series: Output of investment_calculator.growth_series
+        annual_return: Expected annual return percentage, for the title
+
+    Returns:
+        SVG markup
+    """
+    years: List[int] = series["years"]
+    last_year = max(years[-1], 1)
+    top = max(max(series["value"]), max(series["contributed"]), 1) * 1.1
+    plot_width = WIDTH - MARGIN_LEFT - MARGIN_RIGHT
+    plot_height = HEIGHT - MARGIN_TOP - MARGIN_BOTTOM
+    bottom = MARGIN_TOP + plot_height
+
+    xs = [MARGIN_LEFT + plot_width * year / last_year for year in years]
+
+    def y_of(amount: float) -> float:
+        return bottom - plot_height * amount / top
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {WIDTH} {HEIGHT}" '
+        f'font-family="sans-serif" font-size="11">',
+        f'<rect width="{WIDTH}" height="{HEIGHT}" fill="white"/>',
+        f'<text x="{WIDTH / 2:.0f}" y="22" text-anchor="middle" font-size="14" font-weight="bold">'
+        f'{escape(f"Investment Growth Over {years[-1]} Years (at {annual_return}% annual return)")}</text>',
+    ]
+
+    for i in range(Y_TICKS + 1):
+        amount = top * i / Y_TICKS
+        y = y_of(amount)
+        parts.append(f'<line x1="{MARGIN_LEFT}" y1="{y:.1f}" x2="{WIDTH - MARGIN_RIGHT}" y2="{y:.1f}" stroke="#ddd" stroke-dasharray="4 3"/>')
+        parts.append(f'<text x="{MARGIN_LEFT - 6}" y="{y + 4:.1f}" text-anchor="end">{format_amount(amount)}</text>')
+    # Label every year up to 10, then thin out so labels do not overlap
+    step = 1 if len(years) <= 11 else 5
+    for year, x in zip(years, xs):
+        if year % step == 0 or year == years[-1]:
+            parts.append(f'<text x="{x:.1f}" y="{bottom + 16}" text-anchor="middle">{year}</text>')
+    parts.append(f'<text x="{MARGIN_LEFT + plot_width / 2:.0f}" y="{HEIGHT - 10}" text-anchor="middle" font-weight="bold">Years</text>')
+
+    for key, color in (("contributed", CONTRIBUTED_COLOR), ("value", VALUE_COLOR)):
+        ys = [y_of(amount) for amount in series[key]]
+        area = _points([xs[0]] + xs + [xs[-1]], [bottom] + ys + [bottom])
+        parts.append(f'<polygon points="{area}" fill="{color}" fill-opacity="0.2"/>')
+        parts.append(f'<polyline points="{_points(xs, ys)}" fill="none" stroke="{color}" stroke-width="2.5"/>')
+
+    for row, (label, color) in enumerate((("Total Contributed", CONTRIBUTED_COLOR), ("Total Value (with gains)", VALUE_COLOR))):
+        y = MARGIN_TOP + 12 + row * 16
+        parts.append(f'<rect x="{MARGIN_LEFT + 10}" y="{y - 8}" width="14" height="4" fill="{color}"/>')
+        parts.append(f'<text x="{MARGIN_LEFT + 30}" y="{y - 2}">{label}</text>')
+
+    parts.append('</svg>')
+    return "".join(parts)
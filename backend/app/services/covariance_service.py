@@ -0,0 +1,285 @@
+"""
+Rolling covariance and correlation of daily returns.
+
+One RollingCovariance per window covers every symbol with stored history
+seen so far and is held as running sums over the last `window` days. A new
+daily bar costs a few O(N^2) updates instead of a full recomputation, a new
+symbol costs O(window * N), and any user's holdings are served as a
+sub-matrix.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.risk_metrics import load_closes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = 252  # One trading year of daily returns
+
+
+class RollingCovariance:
+    """
+    Covariance of daily returns over a sliding window, kept as running sums.
+
+    Days on which a symbol has no return (holidays on its exchange, or
+    before it listed) are left out rather than counted as zero: each pair
+    of symbols is measured over the days both have a return, and
+    `observations` tells how many days each symbol contributes. The sums
+    are rebuilt from the window every `window` updates so floating point
+    drift cannot accumulate.
+    """
+
+    def __init__(self, symbols: List[str], window: int = DEFAULT_WINDOW):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.window = window
+        n = len(self.symbols)
+        # Ring buffer of the window's return vectors, 0 where a symbol has none
+        self._returns = np.zeros((window, n))
+        self._known = np.zeros((window, n))  # 1 where the return is real
+        self._days = np.full(window, np.datetime64("NaT"), dtype="datetime64[D]")
+        self._position = 0
+        self.count = 0
+        # For each pair (i, j), summed over days on which j has a return:
+        self._pair_count = np.zeros((n, n))  # days both have a return
+        self._cross_sum = np.zeros((n, n))  # sum of r_i
+        self._square_sum = np.zeros((n, n))  # sum of r_i^2
+        self._outer_sum = np.zeros((n, n))  # sum of r_i * r_j
+        self._updates = 0
+        self.last_close = np.full(n, np.nan)
+        self.last_date: Optional[date] = None
+
+    def add_closes(self, day: date, closes: np.ndarray) -> None:
+        """Feed one day's closes (NaN where a symbol has none); days already seen are ignored."""
+        if self.last_date is not None and day <= self.last_date:
+            return
+        closes = np.asarray(closes, dtype=float)
+        known = np.isfinite(closes) & np.isfinite(self.last_close)
+        if self.last_date is not None:
+            returns = np.zeros(len(self.symbols))
+            returns[known] = closes[known] / self.last_close[known] - 1
+            self.add_returns(returns, known, day)
+        self.last_close = np.where(np.isfinite(closes), closes, self.last_close)
+        self.last_date = day
+
+    def add_returns(self, returns: np.ndarray, known: Optional[np.ndarray] = None, day: Optional[date] = None) -> None:
+        """Slide the window forward by one return vector; `known` marks the real returns (default: all)."""
+        known = np.ones(len(self.symbols)) if known is None else np.asarray(known, dtype=float)
+        returns = np.where(known > 0, returns, 0.0)
+        if self.count == self.window:
+            self._accumulate(self._returns[self._position], self._known[self._position], -1)
+        else:
+            self.count += 1
+        self._returns[self._position] = returns
+        self._known[self._position] = known
+        self._days[self._position] = np.datetime64(day, "D") if day is not None else np.datetime64("NaT")
+        self._position = (self._position + 1) % self.window
+        self._accumulate(returns, known, 1)
+
+        self._updates += 1
+        if self._updates % self.window == 0:
+            returns, known = self._returns[:self.count], self._known[:self.count]
+            self._pair_count = known.T @ known
+            self._cross_sum = returns.T @ known
+            self._square_sum = (returns ** 2).T @ known
+            self._outer_sum = returns.T @ returns
+
+    def _accumulate(self, returns: np.ndarray, known: np.ndarray, sign: int) -> None:
+        self._pair_count += sign * np.outer(known, known)
+        self._cross_sum += sign * np.outer(returns, known)
+        self._square_sum += sign * np.outer(returns ** 2, known)
+        self._outer_sum += sign * np.outer(returns, returns)
+
+    def add_symbol(self, symbol: str, dates: np.ndarray, closes: np.ndarray) -> None:
+        """
+        Add a symbol from its stored closes, filling in its returns for the
+        days already in the window. Only its own row and column of the sums
+        are computed.
+        """
+        if symbol in self.index:
+            return
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        closes = np.asarray(closes, dtype=float)
+        if self.last_date is not None:
+            keep = dates <= np.datetime64(self.last_date, "D")
+            dates, closes = dates[keep], closes[keep]
+        valid = np.isfinite(closes)
+        dates, closes = dates[valid], closes[valid]
+
+        # Its return on each window day: that day's close over its previous close
+        days = self._days[:self.count]
+        at = np.searchsorted(dates, days)
+        found = (at < len(dates)) & (at > 0)
+        found[found] = dates[at[found]] == days[found]
+        returns = np.zeros(self.count)
+        returns[found] = closes[at[found]] / closes[at[found] - 1] - 1
+        known = found.astype(float)
+
+        k = len(self.symbols)
+        self.symbols.append(symbol)
+        self.index[symbol] = k
+        self._returns = np.hstack([self._returns, np.zeros((self.window, 1))])
+        self._known = np.hstack([self._known, np.zeros((self.window, 1))])
+        self._returns[:self.count, k] = returns
+        self._known[:self.count, k] = known
+        self.last_close = np.append(self.last_close, closes[-1] if len(closes) else np.nan)
+
+        window_returns, window_known = self._returns[:self.count], self._known[:self.count]
+        sums = {}
+        for name, row, column in (
+            ("_pair_count", known @ window_known, window_known.T @ known),
+            ("_cross_sum", returns @ window_known, window_returns.T @ known),
+            ("_square_sum", (returns ** 2) @ window_known, (window_returns ** 2).T @ known),
+            ("_outer_sum", returns @ window_returns, window_returns.T @ returns),
+        ):
+            grown = np.zeros((k + 1, k + 1))
+            grown[:k, :k] = getattr(self, name)
+            grown[k, :] = row
+            grown[:, k] = column
+            sums[name] = grown
+        for name, grown in sums.items():
+            setattr(self, name, grown)
+
+    def _indices(self, symbols: Optional[Iterable[str]]) -> np.ndarray:
+        if symbols is None:
+            return np.arange(len(self.symbols))
+        return np.array([self.index[s] for s in symbols], dtype=np.int64)
+
+    def observations(self, symbols: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Days in the window on which each of `symbols` (default: all) has a return."""
+        idx = self._indices(symbols)
+        return self._pair_count[idx, idx].astype(int)
+
+    def covariance(self, symbols: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Sample covariance matrix for `symbols` (default: all), in the given
+        order, each pair over the days both have a return. NaN for pairs
+        with fewer than two such days.
+        """
+        idx = self._indices(symbols)
+        sub = np.ix_(idx, idx)
+        n = self._pair_count[sub]
+        cross = self._cross_sum[sub]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            covariance = (self._outer_sum[sub] - cross * cross.T / n) / (n - 1)
+        return np.where(n >= 2, covariance, np.nan)
+
+    def correlation(self, symbols: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Correlation matrix for `symbols`, each pair over the days both have
+        a return; pairs with a constant series or under two such days are 0.
+        """
+        idx = self._indices(symbols)
+        sub = np.ix_(idx, idx)
+        n = self._pair_count[sub]
+        cross = self._cross_sum[sub]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            covariance = (self._outer_sum[sub] - cross * cross.T / n) / (n - 1)
+            # Variance of i over the days j also has a return, and vice versa
+            variance = np.clip((self._square_sum[sub] - cross ** 2 / n) / (n - 1), 0, None)
+            scale = np.sqrt(variance * variance.T)
+        valid = (n >= 2) & (scale > 0)
+        correlation = np.divide(covariance, scale, out=np.zeros_like(scale), where=valid)
+        np.fill_diagonal(correlation, np.where(np.diag(valid), 1.0, 0.0))
+        return np.clip(correlation, -1, 1)
+
+
+MAX_MODELS = 4  # Windows kept at once; the least recently used one is dropped
+_models: "OrderedDict[int, RollingCovariance]" = OrderedDict()  # window -> model
+_fed_on: Dict[int, date] = {}  # window -> day its model last took in new bars
+_missing: set = set()  # symbols found without stored history today
+_missing_on: Optional[date] = None
+_models_lock = threading.Lock()  # guards the models, which are updated in place
+
+
+def _window_start(window: int, today: date) -> date:
+    """First calendar day to load so the window fills with trading days."""
+    return today - timedelta(days=int(window * 1.6) + 10)
+
+
+def _feed(model: RollingCovariance, closes: Dict[str, Dict[str, np.ndarray]]) -> None:
+    """Feed loaded closes into the model, one day at a time."""
+    closes = {symbol: bars for symbol, bars in closes.items() if symbol in model.index}
+    if not closes:
+        return
+    calendar = np.unique(np.concatenate([np.asarray(bars["date"]) for bars in closes.values()]))
+    # One row per day, NaN where a symbol has no bar that day
+    matrix = np.full((len(calendar), len(model.symbols)), np.nan)
+    for symbol, bars in closes.items():
+        rows = np.searchsorted(calendar, np.asarray(bars["date"]))
+        matrix[rows, model.index[symbol]] = bars["close"]
+    for day, row in zip(calendar.astype(object), matrix):
+        model.add_closes(day, row)
+
+
+def get_covariance_model(symbols: Iterable[str], window: int = DEFAULT_WINDOW) -> RollingCovariance:
+    """
+    The shared model for `window`, grown to include those of `symbols` with
+    stored history and brought up to date with any daily bars stored since
+    it was last fed. Closes are loaded without holding the lock; new
+    symbols are added to the existing model rather than rebuilding it.
+    """
+    global _missing_on
+    symbols = {s.upper() for s in symbols}
+    today = date.today()
+    with _models_lock:
+        if _missing_on != today:
+            _missing.clear()
+            _missing_on = today
+        model = _models.get(window)
+        if model is not None:
+            _models.move_to_end(window)
+        new = sorted(symbols - set(model.index if model is not None else ()) - _missing)
+        stale = model is not None and _fed_on.get(window) != today
+        if model is not None and not new and not stale:
+            return model
+        since = model.last_date if stale and model.last_date else _window_start(window, today)
+        known = list(model.symbols) if stale else []
+
+    if model is None:
+        closes = load_closes(new, _window_start(window, today), today)
+        built = RollingCovariance(sorted(closes), window)
+        _feed(built, closes)
+    else:
+        closes = load_closes(new, _window_start(window, today), today) if new else {}
+        tail = load_closes(known, since, today) if known else {}
+
+    with _models_lock:
+        _missing.update(set(new) - set(closes))
+        if model is None:
+            model = _models.setdefault(window, built)
+        else:
+            for symbol in sorted(closes):
+                model.add_symbol(symbol, closes[symbol]["date"], closes[symbol]["close"])
+            _feed(model, {**tail, **closes})  # days already fed are ignored
+        _fed_on[window] = today
+        while len(_models) > MAX_MODELS:
+            evicted, _ = _models.popitem(last=False)
+            _fed_on.pop(evicted, None)
+        return model
+
+
+def get_correlation(symbols: List[str], window: int = DEFAULT_WINDOW) -> Tuple[List[str], np.ndarray, Dict]:
+    """
+    Correlation matrix of daily returns for symbols with stored history.
+
+    Returns:
+        Tuple of (symbols in matrix order, correlation matrix, model info).
+        The info includes "symbol_observations": days in the window each
+        covered symbol has a return, in matrix order.
+    """
+    model = get_covariance_model(symbols, window)
+    with _models_lock:
+        covered = [s.upper() for s in symbols if s.upper() in model.index and np.isfinite(model.last_close[model.index[s.upper()]])]
+        info = {
+            "window": model.window,
+            "observations": model.count,
+            "as_of": model.last_date,
+            "symbol_observations": model.observations(covered).tolist(),
+        }
+        return covered, model.correlation(covered), info
@@ -0,0 +1,274 @@
+"""
+Shared Supabase data access.
+
+Table queries go through one async Supabase client whose PostgREST calls
+share a pooled, keep-alive httpx connection pool, so database round trips
+from concurrent requests overlap instead of blocking the event loop. The
+typed helpers below cover the tables the API reads most; anything else can
+use get_client() directly.
+
+Within an HTTP request, the per-user helpers go through request-scoped
+DataLoaders: each table is read at most once per request for a user, and
+lookups for several users made together share one query.
+
+Synchronous clients remain for the Supabase Auth calls and for code that
+runs in worker threads.
+"""
+import asyncio
+import logging
+import weakref
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, TypedDict
+
+from app.config import get_settings
+from app.services.dataloader import clear_request_loader, request_loader
+
+# supabase and httpx are imported when the first client is created, to keep
+# them out of startup (see profile_imports.py)
+if TYPE_CHECKING:
+    import httpx
+    from supabase import AsyncClient, Client
+
+logger = logging.getLogger(__name__)
+
+
+class Asset(TypedDict, total=False):
+    id: int
+    user_id: str
+    symbol: str
+    name: str
+    type: str
+    amount: float
+    price: float
+    created_at: str
+    updated_at: str
+
+
+class Transaction(TypedDict, total=False):
+    id: int
+    user_id: str
+    symbol: str
+    name: str
+    type: str
+    quantity: float
+    purchase_price: float
+    sale_price: float
+    total_cost: float
+    total_revenue: float
+    profit_loss: float
+    profit_loss_percent: float
+    purchase_date: str
+    sale_date: str
+    original_asset_id: int
+    created_at: str
+
+
+class UserProfile(TypedDict, total=False):
+    id: str
+    user_id: str
+    date_of_birth: str
+    age: int
+    phone_number: str
+    risk_tolerance: str
+    investment_experience: str
+    initial_investment: float
+    monthly_budget: float
+    investment_goals: List[str]
+    onboarding_completed: bool
+    onboarding_step: int
+    created_at: str
+    updated_at: str
+
+
+class FinancialSnapshot(TypedDict):
+    has_profile: bool
+    initial_investment: float
+    monthly_budget: float
+    created_at: Optional[str]
+    months_passed: int
+    cash_injected: float
+    invested_cost: float
+    realized_gains: float
+    remaining_budget: float
+
+
+# httpx connection pools belong to the event loop that opened them
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncClient]" = weakref.WeakKeyDictionary()
+_connecting: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+_sync_clients: Dict[str, "Client"] = {}
+
+
+def _http_client() -> "httpx.AsyncClient":
+    import httpx
+
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.DB_POOL_SIZE,
+        max_keepalive_connections=settings.DB_POOL_SIZE,
+        keepalive_expiry=settings.DB_KEEPALIVE_SECONDS,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=settings.DB_TIMEOUT_SECONDS)
+
+
+async def _connect() -> "AsyncClient":
+    from supabase import AsyncClientOptions, acreate_client
+
+    settings = get_settings()
+    return await acreate_client(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_SERVICE_ROLE_KEY,
+        options=AsyncClientOptions(httpx_client=_http_client(), postgrest_client_timeout=settings.DB_TIMEOUT_SECONDS),
+    )
+
+
+async def get_client() -> "AsyncClient":
+    """The service-role async client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        # Requests arriving together must not each open their own pool
+        pending = _connecting.get(loop)
+        if pending is None:
+            pending = _connecting[loop] = loop.create_task(_connect())
+        try:
+            client = await asyncio.shield(pending)
+        finally:
+            if pending.done() and _connecting.get(loop) is pending:
+                del _connecting[loop]
+        _clients[loop] = client
+    return client
+
+
+async def close_client() -> None:
+    """Close the running loop's connection pool."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and client.options.httpx_client is not None:
+        await client.options.httpx_client.aclose()
+
+
+def get_sync_client(anon: bool = False) -> "Client":
+    """Shared synchronous client, with the service-role key or, with `anon`, the anon key."""
+    key = "anon" if anon else "admin"
+    client = _sync_clients.get(key)
+    if client is None:
+        from supabase import create_client
+
+        settings = get_settings()
+        client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY if anon else settings.SUPABASE_SERVICE_ROLE_KEY)
+        _sync_clients[key] = client
+    return client
+
+
+def _group_by_user(rows: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for row in rows:
+        grouped.setdefault(row["user_id"], []).append(row)
+    return grouped
+
+
+async def _load_assets(user_ids: List[str]) -> Dict[str, List[Asset]]:
+    client = await get_client()
+    response = await client.table("assets").select("*").in_("user_id", user_ids).execute()
+    return _group_by_user(response.data or [])
+
+
+async def _load_transactions(user_ids: List[str]) -> Dict[str, List[Transaction]]:
+    client = await get_client()
+    response = await client.table("transactions").select("*").in_("user_id", user_ids).order("sale_date", desc=True).execute()
+    return _group_by_user(response.data or [])
+
+
+async def _load_profiles(user_ids: List[str]) -> Dict[str, UserProfile]:
+    client = await get_client()
+    response = await client.table("user_profiles").select("*").in_("user_id", user_ids).execute()
+    return {row["user_id"]: row for row in response.data or []}
+
+
+async def fetch_assets(user_id: str, columns: str = "*") -> List[Asset]:
+    """
+    All of a user's assets. Inside a request every column is loaded once
+    and shared, so `columns` only narrows queries made outside one.
+    """
+    loader = request_loader("assets", _load_assets, default=[])
+    if loader is not None:
+        return await asyncio.shield(loader.load(user_id))
+    client = await get_client()
+    response = await client.table("assets").select(columns).eq("user_id", user_id).execute()
+    return response.data or []
+
+
+async def fetch_asset(asset_id: Any, user_id: str) -> Optional[Asset]:
+    """One asset, if it exists and belongs to the user."""
+    client = await get_client()
+    response = await client.table("assets").select("*").eq("id", asset_id).eq("user_id", user_id).execute()
+    return response.data[0] if response.data else None
+
+
+async def insert_asset(data: Dict[str, Any]) -> Optional[Asset]:
+    """Insert an asset row, returning it as stored."""
+    client = await get_client()
+    response = await client.table("assets").insert(data).execute()
+    clear_request_loader("assets", data.get("user_id"))
+    return response.data[0] if response.data else None
+
+
+async def delete_asset(asset_id: Any) -> List[Asset]:
+    """Delete an asset, returning the deleted rows."""
+    client = await get_client()
+    response = await client.table("assets").delete().eq("id", asset_id).execute()
+    clear_request_loader("assets")
+    return response.data or []
+
+
+async def fetch_transactions(user_id: str, columns: str = "*", newest_first: bool = False) -> List[Transaction]:
+    """
+    All of a user's closed-position transactions, optionally newest sale
+    first. Like fetch_assets, `columns` only applies outside a request.
+    """
+    loader = request_loader("transactions", _load_transactions, default=[])
+    if loader is not None:
+        return await asyncio.shield(loader.load(user_id))  # already newest first
+    client = await get_client()
+    query = client.table("transactions").select(columns).eq("user_id", user_id)
+    if newest_first:
+        query = query.order("sale_date", desc=True)
+    response = await query.execute()
+    return response.data or []
+
+
+async def insert_transaction(data: Dict[str, Any]) -> Optional[Transaction]:
+    """Insert a transaction row, returning it as stored."""
+    client = await get_client()
+    response = await client.table("transactions").insert(data).execute()
+    clear_request_loader("transactions", data.get("user_id"))
+    return response.data[0] if response.data else None
+
+
+async def fetch_user_profile(user_id: str, columns: str = "*") -> Optional[UserProfile]:
+    """
+    A user's profile row, or None if they have not completed onboarding.
+    Like fetch_assets, `columns` only applies outside a request.
+    """
+    loader = request_loader("user_profiles", _load_profiles)
+    if loader is not None:
+        return await asyncio.shield(loader.load(user_id))
+    client = await get_client()
+    response = await client.table("user_profiles").select(columns).eq("user_id", user_id).execute()
+    return response.data[0] if response.data else None
+
+
+SNAPSHOT_AMOUNTS = ("initial_investment", "monthly_budget", "cash_injected", "invested_cost", "realized_gains", "remaining_budget")
+
+
+async def fetch_financial_snapshot(user_id: str) -> FinancialSnapshot:
+    """
+    Budget figures for a user from the get_user_financial_snapshot SQL
+    function (supabase/migrations), computed in one database round trip.
+    """
+    client = await get_client()
+    response = await client.rpc("get_user_financial_snapshot", {"p_user_id": user_id}).execute()
+    row = response.data[0] if isinstance(response.data, list) else response.data
+    snapshot = dict(row)
+    for name in SNAPSHOT_AMOUNTS:
+        snapshot[name] = float(snapshot.get(name) or 0)
+    snapshot["months_passed"] = int(snapshot.get("months_passed") or 0)
+    return snapshot
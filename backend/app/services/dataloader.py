@@ -0,0 +1,116 @@
+"""
+Request-scoped batching and de-duplication of lookups.
+
+A DataLoader collects the keys asked for during one pass of the event loop
+and resolves them with a single batch call, caching the results for the
+rest of the request. RequestScopeMiddleware gives every HTTP request its
+own set of loaders through a ContextVar, so nothing is shared between
+requests or users.
+"""
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Iterator, List, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """
+    Batches `load(key)` calls made in the same event loop iteration into one
+    `batch_load(keys)` call. Keys missing from its result resolve to `default`.
+    """
+
+    def __init__(self, batch_load: Callable[[List[K]], Awaitable[Dict[K, V]]], default: Any = None):
+        self.batch_load = batch_load
+        self.default = default
+        self._cache: Dict[K, asyncio.Future] = {}
+        self._queue: List[K] = []
+        self._dispatching: Optional[asyncio.Task] = None
+        self.batches = 0
+
+    def load(self, key: K) -> "asyncio.Future[V]":
+        """Future for the value of `key`, shared with every other caller this request."""
+        future = self._cache.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._cache[key] = loop.create_future()
+            if not self._queue:
+                # Runs after the callers already scheduled in this iteration have queued their keys
+                self._dispatching = loop.create_task(self._dispatch())
+            self._queue.append(key)
+        return future
+
+    async def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        self.batches += 1
+        try:
+            values = await self.batch_load(keys)
+        except Exception as e:
+            for key in keys:
+                # Let a later load retry instead of replaying the failure
+                future = self._cache.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key in keys:
+            future = self._cache[key]
+            if not future.done():
+                future.set_result(values.get(key, self.default))
+
+    def clear(self, key: Optional[K] = None) -> None:
+        """Forget a cached key (or all of them) after the underlying rows changed."""
+        if key is None:
+            self._cache = {k: f for k, f in self._cache.items() if not f.done()}
+        elif key in self._cache and self._cache[key].done():
+            del self._cache[key]
+
+
+_request_loaders: ContextVar[Optional[Dict[str, DataLoader]]] = ContextVar("request_loaders", default=None)
+
+
+def request_loader(name: str, batch_load: Callable[[List[Any]], Awaitable[Dict[Any, Any]]], default: Any = None) -> Optional[DataLoader]:
+    """
+    The current request's loader called `name`, created on first use.
+    None outside a request scope, where callers should query directly.
+    """
+    loaders = _request_loaders.get()
+    if loaders is None:
+        return None
+    loader = loaders.get(name)
+    if loader is None:
+        loader = loaders[name] = DataLoader(batch_load, default)
+    return loader
+
+
+def clear_request_loader(name: str, key: Any = None) -> None:
+    """Forget `key` (or everything) cached by the current request's loader `name`, if it has one."""
+    loaders = _request_loaders.get()
+    if loaders is not None and name in loaders:
+        loaders[name].clear(key)
+
+
+@contextmanager
+def request_scope() -> Iterator[Dict[str, DataLoader]]:
+    """Give the enclosed code (and tasks it starts) a fresh set of loaders."""
+    loaders: Dict[str, DataLoader] = {}
+    token = _request_loaders.set(loaders)
+    try:
+        yield loaders
+    finally:
+        _request_loaders.reset(token)
+
+
+class RequestScopeMiddleware:
+    """ASGI middleware running each HTTP request in its own request_scope()."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with request_scope():
+            await self.app(scope, receive, send)
@@ -0,0 +1,266 @@
+"""
+Persistent daily OHLCV store.
+
+Each symbol gets a directory of flat binary column files (one value per
+bar, oldest first) that are appended to in place and read back through
+numpy memory maps, so reading years of closes costs a page-cache hit
+rather than a network round trip:
+
+    <root>/<SYMBOL>/date.i8     int64 days since 1970-01-01
+    <root>/<SYMBOL>/open.f8     float64, likewise high, low, close, volume
+
+The date column is written last, so its length is the number of complete
+bars; a crash mid-append leaves trailing values that the next append trims.
+When the provider re-adjusts past closes (a split, say) the symbol's files are
+rewritten whole.
+"""
+import logging
+import os
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.config import get_settings
+from app.services.market_calendar import is_market_open
+from app.services.market_providers import Bar, MarketDataProvider
+from app.services.market_service import get_market_provider
+
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ("open", "high", "low", "close", "volume")
+_DATE_DTYPE = np.dtype("<i8")
+_PRICE_DTYPE = np.dtype("<f8")
+_EPOCH = date(1970, 1, 1)
+
+DEFAULT_LOOKBACK = timedelta(days=365 * 5)  # History fetched for a symbol seen for the first time
+# Stored bars re-fetched on each update; if their closes moved, a split or
+# other adjustment was applied upstream and the symbol is rebuilt
+REFRESH_OVERLAP = timedelta(days=7)
+ADJUSTMENT_TOLERANCE = 1e-4  # Relative close difference treated as a new adjustment
+
+
+class HistoryStore:
+    """Columnar store of daily bars, appended to in place and read through memory maps."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _path(self, symbol: str, column: str) -> str:
+        suffix = "i8" if column == "date" else "f8"
+        return os.path.join(self.root, symbol.upper(), f"{column}.{suffix}")
+
+    def _length(self, symbol: str) -> int:
+        path = self._path(symbol, "date")
+        return os.path.getsize(path) // _DATE_DTYPE.itemsize if os.path.exists(path) else 0
+
+    def _map(self, symbol: str, column: str, length: int) -> np.ndarray:
+        dtype = _DATE_DTYPE if column == "date" else _PRICE_DTYPE
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(symbol, column), dtype=dtype, mode="r", shape=(length,))
+
+    def last_date(self, symbol: str) -> Optional[date]:
+        """Date of the newest stored bar, or None if nothing is stored."""
+        with self._lock(symbol.upper()):
+            return self._last_date(symbol)
+
+    def _last_date(self, symbol: str) -> Optional[date]:
+        length = self._length(symbol)
+        if length == 0:
+            return None
+        days = int(self._map(symbol, "date", length)[-1])
+        return _EPOCH + timedelta(days=days)
+
+    def append(self, symbol: str, bars: List[Bar]) -> int:
+        """
+        Append bars newer than the last stored one.
+
+        Returns:
+            Number of bars written
+        """
+        symbol = symbol.upper()
+        with self._lock(symbol):
+            last = self._last_date(symbol)
+            bars = sorted((b for b in bars if last is None or b.date > last), key=lambda b: b.date)
+            # Drop duplicate dates the provider may return
+            bars = [b for i, b in enumerate(bars) if i == 0 or b.date != bars[i - 1].date]
+            if not bars:
+                return 0
+
+            os.makedirs(os.path.join(self.root, symbol), exist_ok=True)
+            length = self._length(symbol)
+            for column in PRICE_COLUMNS:
+                path = self._path(symbol, column)
+                with open(path, "ab") as f:
+                    # Trim values left behind by an interrupted append
+                    f.truncate(length * _PRICE_DTYPE.itemsize)
+                    np.array([getattr(b, column) for b in bars], dtype=_PRICE_DTYPE).tofile(f)
+            with open(self._path(symbol, "date"), "ab") as f:
+                np.array([(b.date - _EPOCH).days for b in bars], dtype=_DATE_DTYPE).tofile(f)
+            return len(bars)
+
+    def rewrite(self, symbol: str, bars: List[Bar]) -> int:
+        """
+        Replace everything stored for a symbol with `bars`.
+
+        The date column is emptied first and written last, so a crash part
+        way through leaves an empty symbol rather than mismatched columns.
+        Readers holding maps of the old files keep seeing the old bars.
+
+        Returns:
+            Number of bars written
+        """
+        symbol = symbol.upper()
+        with self._lock(symbol):
+            bars = sorted(bars, key=lambda b: b.date)
+            bars = [b for i, b in enumerate(bars) if i == 0 or b.date != bars[i - 1].date]
+            os.makedirs(os.path.join(self.root, symbol), exist_ok=True)
+            date_path = self._path(symbol, "date")
+            self._replace(date_path, np.empty(0, dtype=_DATE_DTYPE))
+            for column in PRICE_COLUMNS:
+                self._replace(self._path(symbol, column), np.array([getattr(b, column) for b in bars], dtype=_PRICE_DTYPE))
+            self._replace(date_path, np.array([(b.date - _EPOCH).days for b in bars], dtype=_DATE_DTYPE))
+            return len(bars)
+
+    @staticmethod
+    def _replace(path: str, values: np.ndarray) -> None:
+        tmp = f"{path}.tmp"
+        values.tofile(tmp)
+        os.replace(tmp, path)
+
+    def read(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, np.ndarray]:
+        """
+        Read bars between `start` and `end` inclusive.
+
+        Returns:
+            Dict of read-only arrays: "date" (datetime64[D]) and one per price column.
+            Slices are views into the memory maps, no data is copied. The
+            maps are opened under the symbol's lock, so a concurrent rewrite
+            cannot leave them misaligned; it replaces the files, and maps of
+            the old ones stay valid.
+        """
+        symbol = symbol.upper()
+        with self._lock(symbol):
+            length = self._length(symbol)
+            days = self._map(symbol, "date", length)
+            columns = {column: self._map(symbol, column, length) for column in PRICE_COLUMNS}
+        lo = int(np.searchsorted(days, (start - _EPOCH).days, side="left")) if start else 0
+        hi = int(np.searchsorted(days, (end - _EPOCH).days, side="right")) if end else length
+        result = {"date": days[lo:hi].view("datetime64[D]")}
+        for column in PRICE_COLUMNS:
+            result[column] = columns[column][lo:hi]
+        return result
+
+    def update(self, symbol: str, provider: MarketDataProvider, lookback: timedelta = DEFAULT_LOOKBACK) -> int:
+        """
+        Fetch the bars missing since the last stored one and append them.
+        Today's bar is skipped while its market is still trading.
+
+        The last few stored bars are fetched again; if their closes no longer
+        match, the provider has re-adjusted the series (e.g. for a split) and
+        the symbol's whole history is fetched and rewritten.
+
+        Returns:
+            Number of bars written
+        """
+        symbol = symbol.upper()
+        today = date.today()
+        last = self.last_date(symbol)
+        if last is not None and last >= today:
+            return 0
+        start = last - REFRESH_OVERLAP if last else today - lookback
+        bars = provider.get_history(symbol, start=start, end=today)
+        if is_market_open(symbol):
+            bars = [b for b in bars if b.date < today]
+        if last is not None and self._adjustment_changed(symbol, bars, start):
+            first = self.read(symbol)["date"][0].astype(object)
+            logger.info(f"Adjusted closes changed for {symbol}; rebuilding its history")
+            bars = provider.get_history(symbol, start=min(first, today - lookback), end=today)
+            if is_market_open(symbol):
+                bars = [b for b in bars if b.date < today]
+            if not bars:
+                return 0
+            return self.rewrite(symbol, bars)
+        return self.append(symbol, bars)
+
+    def _adjustment_changed(self, symbol: str, bars: List[Bar], start: date) -> bool:
+        """Check whether re-fetched bars disagree with the stored closes for the same days."""
+        stored = self.read(symbol, start=start)
+        fetched = {(b.date - _EPOCH).days: b.close for b in bars}
+        for day, close in zip(stored["date"].view(_DATE_DTYPE), stored["close"]):
+            new_close = fetched.get(int(day))
+            if new_close is not None and not np.isclose(new_close, close, rtol=ADJUSTMENT_TOLERANCE, atol=0):
+                return True
+        return False
+
+
+_store: Optional[HistoryStore] = None
+_checked: set = set()  # symbols whose tail was fetched on _checked_day
+_checked_day: Optional[date] = None
+_checked_lock = threading.Lock()
+
+
+def _is_checked(symbol: str) -> bool:
+    with _checked_lock:
+        return _checked_day == date.today() and symbol in _checked
+
+
+def _mark_checked(symbol: str) -> None:
+    global _checked_day
+    today = date.today()
+    with _checked_lock:
+        if _checked_day != today:
+            _checked.clear()
+            _checked_day = today
+        _checked.add(symbol)
+
+
+def get_history_store() -> HistoryStore:
+    """Get the store rooted at HISTORY_STORE_DIR."""
+    global _store
+    if _store is None:
+        _store = HistoryStore(get_settings().HISTORY_STORE_DIR)
+    return _store
+
+
+def refresh_history(symbols: List[str]) -> Dict[str, int]:
+    """
+    Bring stored history for each symbol up to date from the market data provider.
+
+    Returns:
+        Dictionary mapping symbol to the number of bars appended
+    """
+    store = get_history_store()
+    provider = get_market_provider()
+    appended = {}
+    for symbol in symbols:
+        symbol = symbol.upper()
+        try:
+            appended[symbol] = store.update(symbol, provider)
+            _mark_checked(symbol)
+        except Exception as e:
+            logger.error(f"Error updating history for {symbol}: {e}")
+            appended[symbol] = 0
+    return appended
+
+
+def get_closes(symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, np.ndarray]:
+    """
+    Stored daily closes for a symbol, fetching the missing tail first.
+
+    Returns:
+        Dict with "date" and "close" arrays
+    """
+    symbol = symbol.upper()
+    if not _is_checked(symbol):
+        refresh_history([symbol])
+    bars = get_history_store().read(symbol, start, end)
+    return {"date": bars["date"], "close": bars["close"]}
@@ -1,4 +1,7 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
+import numpy as np
+
+PERCENTILES = (5, 25, 50, 75, 95)
 
 def calculate_compound_interest(monthly_amount: float, years: int, annual_return: float, initial_investment: float = 0) -> Dict[str, Any]:
     """
@@ -17,34 +20,18 @@ def calculate_compound_interest(monthly_amount: float, years: int, annual_return
     monthly_rate = (annual_return / 100) / 12
     total_months = years * 12
     
-    # Calculate Future Value of monthly contributions
-    # FV = P * (((1 + r)^n - 1) / r)
-    monthly_future_value = monthly_amount * (((1 + monthly_rate) ** total_months - 1) / monthly_rate)
-    
-    # Calculate Future Value of initial investment
-    # FV = PV * (1 + r)^n
-    initial_future_value = initial_investment * ((1 + monthly_rate) ** total_months)
-    
-    # Total future value
-    future_value = monthly_future_value + initial_future_value
+    # FV = P * (((1 + r)^n - 1) / r) + PV * (1 + r)^n
+    future_value = _future_value(monthly_amount, monthly_rate, total_months, initial_investment)
     
     # Calculate totals
     total_contributed = (monthly_amount * total_months) + initial_investment
     total_earnings = future_value - total_contributed
     
-    # Calculate yearly breakdown
-    yearly_breakdown = []
-    current_value = initial_investment  # Start with initial investment
-    
-    for year in range(1, years + 1):
-        # Calculate value at end of this year
-        # Simulating month by month ensures accuracy
-        months_in_year = 12
-        for _ in range(months_in_year):
-            current_value += monthly_amount
-            current_value *= (1 + monthly_rate)
-        
-        yearly_breakdown.append(round(current_value, 2))
+    # Value at the end of each year, contributing at the start of every month
+    yearly_breakdown = [
+        round(_value_after(monthly_amount, monthly_rate, year * 12, initial_investment), 2)
+        for year in range(1, years + 1)
+    ]
         
     return {
         "future_value": round(future_value, 2),
@@ -52,3 +39,228 @@ def calculate_compound_interest(monthly_amount: float, years: int, annual_return
         "total_earnings": round(total_earnings, 2),
         "yearly_breakdown": yearly_breakdown
     }
+
+
+def growth_series(monthly_amount: float, years: int, annual_return: float, initial_investment: float = 0) -> Dict[str, Any]:
+    """
+    Year-by-year series plotted by the growth chart.
+
+    Returns:
+        calculate_compound_interest's totals plus "years" (0..years) and the
+        matching "contributed" and "value" lists, both starting at the
+        initial investment
+    """
+    result = calculate_compound_interest(monthly_amount, years, annual_return, initial_investment)
+    return {
+        "future_value": result["future_value"],
+        "total_contributed": result["total_contributed"],
+        "total_earnings": result["total_earnings"],
+        "years": list(range(years + 1)),
+        "contributed": [round(initial_investment + monthly_amount * 12 * year, 2) for year in range(years + 1)],
+        "value": [round(initial_investment, 2)] + result["yearly_breakdown"],
+    }
+
+
+def _annuity_factor(monthly_rate: float, months: float) -> float:
+    """((1 + r)^n - 1) / r, which is n when r is 0."""
+    if monthly_rate == 0:
+        return months
+    return ((1 + monthly_rate) ** months - 1) / monthly_rate
+
+
+def _future_value(monthly_amount: float, monthly_rate: float, months: float, initial_investment: float) -> float:
+    """Headline future value: contributions at the end of each month."""
+    return monthly_amount * _annuity_factor(monthly_rate, months) + initial_investment * (1 + monthly_rate) ** months
+
+
+def _value_after(monthly_amount: float, monthly_rate: float, months: float, initial_investment: float) -> float:
+    """Value after `months` of contributing at the start of each month, then compounding."""
+    return _future_value(monthly_amount, monthly_rate, months, initial_investment) + monthly_amount * _annuity_factor(monthly_rate, months) * monthly_rate
+
+
+def future_value(monthly_amount: float, years: float, annual_return: float, initial_investment: float = 0) -> float:
+    """Unrounded future value as reported by calculate_compound_interest; `years` may be fractional."""
+    return _future_value(monthly_amount, (annual_return / 100) / 12, years * 12, initial_investment)
+
+
+def solve_monthly_amount(target_value: float, years: int, annual_return: float, initial_investment: float = 0) -> float:
+    """
+    Monthly contribution needed for calculate_compound_interest to reach
+    `target_value`. Solved analytically; 0 when the initial investment alone
+    gets there.
+    """
+    monthly_rate = (annual_return / 100) / 12
+    months = years * 12
+    shortfall = target_value - initial_investment * (1 + monthly_rate) ** months
+    return max(shortfall / _annuity_factor(monthly_rate, months), 0.0)
+
+
+def solve_years(target_value: float, monthly_amount: float, annual_return: float, initial_investment: float = 0) -> float:
+    """
+    Years (fractional) until the future value reaches `target_value`.
+    Solved analytically from (1 + r)^n * (c/r + PV) = target + c/r.
+    
+    Raises:
+        ValueError: If the target can never be reached
+    """
+    if target_value <= initial_investment:
+        return 0.0
+    monthly_rate = (annual_return / 100) / 12
+    if monthly_rate == 0:
+        if monthly_amount <= 0:
+            raise ValueError("Target cannot be reached without contributions or returns")
+        return (target_value - initial_investment) / monthly_amount / 12
+    if monthly_amount <= 0 and initial_investment <= 0:
+        raise ValueError("Target cannot be reached without contributions or an initial investment")
+    base = monthly_amount / monthly_rate
+    months = np.log((target_value + base) / (initial_investment + base)) / np.log1p(monthly_rate)
+    return float(months) / 12
+
+
+def solve_annual_return(target_value: float, monthly_amount: float, years: int, initial_investment: float = 0,
+                        max_return: float = 100.0, tolerance: float = 1e-10) -> float:
+    """
+    Annual return percentage at which the future value reaches `target_value`.
+    There is no closed form, so this uses Newton steps on the monthly rate,
+    kept inside a shrinking bisection bracket. Returns 0 when contributions
+    alone reach the target.
+    
+    Raises:
+        ValueError: If even `max_return` percent falls short
+    """
+    months = years * 12
+    
+    def shortfall(rate: float) -> float:
+        return _future_value(monthly_amount, rate, months, initial_investment) - target_value
+    
+    low, high = 0.0, max_return / 100 / 12
+    if shortfall(low) >= 0:
+        return 0.0
+    if shortfall(high) < 0:
+        raise ValueError(f"Target needs more than {max_return}% annual return")
+    
+    rate = high / 2
+    for _ in range(100):
+        value = shortfall(rate)
+        if abs(value) <= tolerance * max(target_value, 1):
+            break
+        if value < 0:
+            low = rate
+        else:
+            high = rate
+        # d/dr of c((1+r)^n - 1)/r + PV(1+r)^n
+        growth = (1 + rate) ** months
+        slope = (monthly_amount * (months * rate * growth / (1 + rate) - (growth - 1)) / rate ** 2
+                 + initial_investment * months * growth / (1 + rate))
+        step = rate - value / slope if slope > 0 else None
+        rate = step if step is not None and low < step < high else (low + high) / 2
+    return rate * 12 * 100
+
+
+def simulate_investment(monthly_amount: float, years: int, annual_return: float, annual_volatility: float,
+                        initial_investment: float = 0, simulations: int = 10000,
+                        seed: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Monte Carlo projection of the same monthly plan as calculate_compound_interest.
+    
+    Monthly growth factors are lognormal, with a mean matching the deterministic
+    monthly rate and a spread matching the annual volatility. All paths are
+    advanced together one month at a time, using antithetic draws.
+    
+    Args:
+        monthly_amount: Monthly contribution in ILS
+        years: Investment period in years
+        annual_return: Expected annual return percentage (e.g., 7.0)
+        annual_volatility: Annual volatility percentage (e.g., 14.0)
+        initial_investment: Initial lump sum investment in ILS (default: 0)
+        simulations: Number of simulated paths
+        seed: Random seed, for reproducible results
+        
+    Returns:
+        Dictionary with one list of year-end values per percentile
+        ("p5", "p25", "p50", "p75", "p95") and the probability of ending
+        below the total contributed
+    """
+    rng = np.random.default_rng(seed)
+    monthly_rate = (annual_return / 100) / 12
+    monthly_volatility = (annual_volatility / 100) / np.sqrt(12)
+    
+    # Lognormal parameters for a growth factor with mean 1 + r and std monthly_volatility
+    sigma = np.sqrt(np.log1p((monthly_volatility / (1 + monthly_rate)) ** 2))
+    mu = np.log1p(monthly_rate) - sigma ** 2 / 2
+    
+    values = np.full(simulations, float(initial_investment))
+    year_end = np.empty((years, simulations))
+    half = (simulations + 1) // 2
+    for year in range(years):
+        # Antithetic pairs: half the random draws, and lower variance in the bands
+        shocks = rng.standard_normal((12, half), dtype=np.float32)
+        shocks = np.concatenate([shocks, -shocks], axis=1)[:, :simulations]
+        growth = np.exp(mu + sigma * shocks)
+        for month in range(12):
+            values += monthly_amount
+            values *= growth[month]
+        year_end[year] = values
+    
+    bands = np.percentile(year_end, PERCENTILES, axis=1)
+    total_contributed = monthly_amount * years * 12 + initial_investment
+    return {
+        "simulations": simulations,
+        "volatility": annual_volatility,
+        **{f"p{p}": np.round(band, 2).tolist() for p, band in zip(PERCENTILES, bands)},
+        "probability_of_loss": round(float(np.mean(values < total_contributed)), 4),
+    }
+
+
+def _growth_and_annuity(rate: np.ndarray, months: np.ndarray):
+    """(1 + r)^n and the annuity factor ((1 + r)^n - 1) / r, which is n when r is 0."""
+    growth = np.power(1 + rate, months)
+    shape = growth.shape
+    factor = np.divide(growth - 1, np.broadcast_to(rate, shape),
+                       out=np.broadcast_to(months, shape).astype(float), where=np.broadcast_to(rate != 0, shape))
+    return growth, factor
+
+
+def calculate_scenarios(monthly_amount, years, annual_return, initial_investment) -> Dict[str, np.ndarray]:
+    """
+    Closed-form compound interest for many scenarios at once.
+    
+    Gives the same figures as calculate_compound_interest for each scenario,
+    without looping over months: after m months of contributing then
+    compounding, a plan is worth P(1+r)^m + c(1+r)((1+r)^m - 1)/r.
+    
+    Args:
+        monthly_amount, years, annual_return, initial_investment: Equal-length
+            sequences, one element per scenario, in the units of
+            calculate_compound_interest
+        
+    Returns:
+        Dictionary of arrays: future_value, total_contributed and
+        total_earnings of shape (scenarios,), and yearly_breakdown of shape
+        (scenarios, max years) with NaN past each scenario's horizon
+    """
+    monthly_amount = np.asarray(monthly_amount, dtype=float)
+    years = np.asarray(years, dtype=np.int64)
+    initial_investment = np.asarray(initial_investment, dtype=float)
+    monthly_rate = np.asarray(annual_return, dtype=float) / 100 / 12
+    total_months = years * 12
+    
+    # Headline figures use the ordinary-annuity convention of calculate_compound_interest
+    growth, factor = _growth_and_annuity(monthly_rate, total_months)
+    future_value = monthly_amount * factor + initial_investment * growth
+    total_contributed = monthly_amount * total_months + initial_investment
+    
+    # Year-end values: contributions at the start of each month (annuity due)
+    horizon = int(years.max()) if years.size else 0
+    months = np.broadcast_to(np.arange(1, horizon + 1) * 12, (len(years), horizon))
+    growth, factor = _growth_and_annuity(monthly_rate[:, None], months)
+    yearly = (initial_investment[:, None] * growth
+              + monthly_amount[:, None] * (1 + monthly_rate[:, None]) * factor)
+    yearly[np.arange(1, horizon + 1) > years[:, None]] = np.nan
+    
+    return {
+        "future_value": future_value,
+        "total_contributed": total_contributed,
+        "total_earnings": future_value - total_contributed,
+        "yearly_breakdown": yearly,
+    }
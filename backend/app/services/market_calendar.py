@@ -0,0 +1,151 @@
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import FrozenSet, NamedTuple, Optional
+from zoneinfo import ZoneInfo
+from dateutil.easter import easter
+from dateutil.relativedelta import relativedelta, MO, TH
+
+CRYPTO = "crypto"
+US_EQUITY = "us_equity"
+TASE_EQUITY = "tase_equity"
+LSE_EQUITY = "lse_equity"
+TSX_EQUITY = "tsx_equity"
+XETRA_EQUITY = "xetra_equity"
+# Futures, FX, indices and listings on exchanges not modelled here. Their
+# sessions are unknown, so quotes always get the regular open-market TTL.
+UNKNOWN = "unknown"
+
+# Yahoo crypto pairs look like BTC-USD, ETH-EUR, SOL-USDT
+_CRYPTO_PATTERN = re.compile(r"^[A-Z0-9]+-(USD|USDT|USDC|EUR|GBP|ILS|BTC|ETH)$")
+# Yahoo exchange suffixes, e.g. VOD.L, SHOP.TO, SAP.DE
+_EXCHANGE_SUFFIXES = {".TA": TASE_EQUITY, ".L": LSE_EQUITY, ".TO": TSX_EQUITY, ".DE": XETRA_EQUITY}
+_EXCHANGE_PATTERN = re.compile(r"\.[A-Z]{1,3}$")
+
+
+class Session(NamedTuple):
+    tz: ZoneInfo
+    open: time
+    close: time
+    weekdays: FrozenSet[int]  # Monday = 0
+
+
+# Regular sessions. Early closes and holidays outside the US are not
+# modelled, so those days count as open: the cache just refreshes more often
+# than needed.
+SESSIONS = {
+    US_EQUITY: Session(ZoneInfo("America/New_York"), time(9, 30), time(16, 0), frozenset(range(5))),
+    # TASE moved to a Monday-Friday week in January 2026
+    TASE_EQUITY: Session(ZoneInfo("Asia/Jerusalem"), time(9, 30), time(17, 30), frozenset(range(5))),
+    LSE_EQUITY: Session(ZoneInfo("Europe/London"), time(8, 0), time(16, 30), frozenset(range(5))),
+    TSX_EQUITY: Session(ZoneInfo("America/Toronto"), time(9, 30), time(16, 0), frozenset(range(5))),
+    XETRA_EQUITY: Session(ZoneInfo("Europe/Berlin"), time(9, 0), time(17, 30), frozenset(range(5))),
+}
+
+
+def get_asset_class(symbol: str) -> str:
+    """
+    Classify a Yahoo ticker by the market it trades on.
+
+    Args:
+        symbol: Stock ticker symbol (e.g., 'AAPL', 'TEVA.TA', 'BTC-USD')
+
+    Returns:
+        CRYPTO, one of the equity classes in SESSIONS, or UNKNOWN for
+        futures (=F), FX (=X), indices (^) and other exchange suffixes
+    """
+    symbol = symbol.upper()
+    if _CRYPTO_PATTERN.match(symbol):
+        return CRYPTO
+    if symbol.startswith("^") or "=" in symbol:
+        return UNKNOWN
+    suffix = _EXCHANGE_PATTERN.search(symbol)
+    if suffix:
+        return _EXCHANGE_SUFFIXES.get(suffix.group(), UNKNOWN)
+    return US_EQUITY
+
+
+@lru_cache(maxsize=32)
+def us_market_holidays(year: int) -> FrozenSet[date]:
+    """Full-day NYSE closures for a year, shifted to the observed weekday."""
+    def observed(day: date) -> date:
+        if day.weekday() == 5:
+            return day - timedelta(days=1)
+        if day.weekday() == 6:
+            return day + timedelta(days=1)
+        return day
+
+    holidays = {
+        date(year, 1, 1) + relativedelta(weekday=MO(+3)),  # Martin Luther King Jr. Day
+        date(year, 2, 1) + relativedelta(weekday=MO(+3)),  # Washington's Birthday
+        easter(year) - timedelta(days=2),  # Good Friday
+        date(year, 5, 31) + relativedelta(weekday=MO(-1)),  # Memorial Day
+        observed(date(year, 7, 4)),
+        date(year, 9, 1) + relativedelta(weekday=MO(+1)),  # Labor Day
+        date(year, 11, 1) + relativedelta(weekday=TH(+4)),  # Thanksgiving
+        observed(date(year, 12, 25)),
+    }
+    # NYSE does not close on the Friday before a Saturday New Year's Day
+    if date(year, 1, 1).weekday() != 5:
+        holidays.add(observed(date(year, 1, 1)))
+    if year >= 2022:
+        holidays.add(observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(holidays)
+
+
+def _is_trading_day(asset_class: str, day: date) -> bool:
+    session = SESSIONS[asset_class]
+    if day.weekday() not in session.weekdays:
+        return False
+    if asset_class == US_EQUITY and day in us_market_holidays(day.year):
+        return False
+    return True
+
+
+def is_market_open(symbol: str, now: Optional[datetime] = None) -> bool:
+    """Check whether the market a symbol trades on is in its regular session."""
+    asset_class = get_asset_class(symbol)
+    if asset_class in (CRYPTO, UNKNOWN):
+        return True
+    session = SESSIONS[asset_class]
+    local = (now or datetime.now().astimezone()).astimezone(session.tz)
+    return _is_trading_day(asset_class, local.date()) and session.open <= local.time() < session.close
+
+
+def next_market_open(symbol: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Get the start of the next regular session for a symbol's market.
+
+    Returns:
+        Timezone-aware datetime of the next open, or None for 24/7 markets
+        and markets whose sessions are unknown
+    """
+    asset_class = get_asset_class(symbol)
+    if asset_class in (CRYPTO, UNKNOWN):
+        return None
+    session = SESSIONS[asset_class]
+    local = (now or datetime.now().astimezone()).astimezone(session.tz)
+    day = local.date()
+    for _ in range(15):
+        if _is_trading_day(asset_class, day):
+            opens_at = datetime.combine(day, session.open, tzinfo=session.tz)
+            if opens_at > local:
+                return opens_at
+        day += timedelta(days=1)
+    return None
+
+
+def quote_ttl(symbol: str, open_ttl: timedelta, now: Optional[datetime] = None) -> timedelta:
+    """
+    How long a freshly fetched quote stays valid.
+
+    While the market trades this is `open_ttl`. Once it has closed the quote
+    cannot change, so it stays valid until the next session opens.
+    """
+    now = now or datetime.now().astimezone()
+    if is_market_open(symbol, now):
+        return open_ttl
+    opens_at = next_market_open(symbol, now)
+    if opens_at is None:
+        return open_ttl
+    return max(open_ttl, opens_at - now)
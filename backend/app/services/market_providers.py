@@ -0,0 +1,480 @@
+"""
+Market data providers.
+
+Every price lookup in the backend and the Vercel functions goes through a
+MarketDataProvider. Providers raise on transport errors (so callers can
+count failures) and return None for symbols they have no data for.
+
+Third-party clients are imported lazily so this module stays importable
+from the lightweight serverless functions in /api.
+"""
+import csv
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+YAHOO_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
+YAHOO_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+
+
+QUOTE_FIELDS = (
+    "currency", "regularMarketPrice", "previousClose", "dayHigh", "dayLow", "volume",
+    "marketCap", "fiftyTwoWeekHigh", "fiftyTwoWeekLow",
+)
+
+
+class Bar(NamedTuple):
+    """One daily OHLCV bar."""
+    date: date
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+
+
+class MarketDataProvider:
+    """Base class for quote and history sources."""
+
+    name = "base"
+    batch_size = 50  # Most symbols one get_prices call should be asked for
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        """Latest price for an upper-cased symbol, or None if unknown."""
+        raise NotImplementedError
+
+    def get_prices(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """Latest prices for several upper-cased symbols."""
+        return {symbol: self.get_price(symbol) for symbol in symbols}
+
+    def get_history(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> List[Bar]:
+        """Daily bars from `start` up to and including `end`, oldest first."""
+        raise NotImplementedError
+
+    def get_info(self, symbol: str) -> Optional[Dict]:
+        """Yahoo-style info dict (shortName, sector, currency, ...) or None."""
+        return None
+
+    def get_quote(self, symbol: str) -> Optional[Dict]:
+        """
+        Fast-changing market fields (regularMarketPrice, previousClose, dayHigh,
+        dayLow, volume, marketCap, fiftyTwoWeekHigh/Low), named as in get_info.
+        Providers override this when they have something cheaper than get_info.
+        """
+        info = self.get_info(symbol)
+        if not info:
+            return None
+        return {key: info.get(key) for key in QUOTE_FIELDS}
+
+
+class YFinanceProvider(MarketDataProvider):
+    """Yahoo Finance through the yfinance package."""
+
+    name = "yahoo"
+    batch_size = 100
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+
+        # Try to get the current price from fast_info first
+        try:
+            price = ticker.fast_info.get('lastPrice')
+            if price is None:
+                price = ticker.fast_info.get('regularMarketPrice')
+        except Exception:
+            price = None
+
+        # Fallback to history if fast_info doesn't work
+        if price is None:
+            hist = ticker.history(period="1d")
+            if not hist.empty:
+                price = float(hist['Close'].iloc[-1])
+
+        return float(price) if price is not None else None
+
+    def get_prices(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        import yfinance as yf
+
+        result: Dict[str, Optional[float]] = {symbol: None for symbol in symbols}
+        # Use yfinance download for batch fetching (more efficient)
+        data = yf.download(symbols, period="1d", progress=False, threads=True)
+        if data.empty or 'Close' not in data:
+            return result
+
+        # One column per ticker, or a plain series for a single ticker
+        close = data['Close']
+        for symbol in symbols:
+            try:
+                if hasattr(close, 'columns'):
+                    if symbol not in close.columns:
+                        continue
+                    series = close[symbol]
+                else:
+                    series = close
+                series = series.dropna()
+                if not series.empty:
+                    result[symbol] = float(series.iloc[-1])
+            except Exception as e:
+                logger.warning(f"Could not get price for {symbol}: {e}")
+        return result
+
+    def get_history(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> List[Bar]:
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        if start is None:
+            hist = ticker.history(period="max", auto_adjust=False)
+        else:
+            # yfinance treats `end` as exclusive
+            stop = (end or date.today()) + timedelta(days=1)
+            hist = ticker.history(start=start.isoformat(), end=stop.isoformat(), auto_adjust=False)
+        bars = []
+        for index, row in hist.iterrows():
+            day = index.date()
+            if end is not None and day > end:
+                continue
+            bars.append(Bar(day, float(row['Open']), float(row['High']), float(row['Low']),
+                            float(row['Close']), float(row['Volume'])))
+        return bars
+
+    def get_info(self, symbol: str) -> Optional[Dict]:
+        import yfinance as yf
+
+        return yf.Ticker(symbol).info or None
+
+    def get_quote(self, symbol: str) -> Optional[Dict]:
+        import yfinance as yf
+
+        # fast_info is served from the chart endpoint, far cheaper than .info
+        fast_info = yf.Ticker(symbol).fast_info
+        fields = {
+            "currency": "currency",
+            "regularMarketPrice": "lastPrice",
+            "previousClose": "previousClose",
+            "dayHigh": "dayHigh",
+            "dayLow": "dayLow",
+            "volume": "lastVolume",
+            "marketCap": "marketCap",
+            "fiftyTwoWeekHigh": "yearHigh",
+            "fiftyTwoWeekLow": "yearLow",
+        }
+        quote = {}
+        for field, key in fields.items():
+            try:
+                quote[field] = fast_info.get(key)
+            except Exception:
+                quote[field] = None
+        return quote if quote.get("regularMarketPrice") is not None else None
+
+
+class YahooChartProvider(MarketDataProvider):
+    """Yahoo's public v8 chart API over a pooled httpx client."""
+
+    name = "yahoo_chart"
+    batch_size = 25
+    max_connections = 8
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+        self._client = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                import httpx
+                limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+                self._client = httpx.Client(timeout=self.timeout, headers=YAHOO_HEADERS, limits=limits)
+            return self._client
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix="yahoo-chart")
+            return self._pool
+
+    def _chart(self, symbol: str, params: Dict[str, str]) -> Optional[Dict]:
+        resp = self._get_client().get(YAHOO_CHART_URL.format(symbol=symbol), params=params)
+        if resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        result = resp.json().get("chart", {}).get("result") or []
+        return result[0] if result else None
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        chart = self._chart(symbol, {"interval": "1d", "range": "1d"})
+        price = (chart or {}).get("meta", {}).get("regularMarketPrice")
+        return round(float(price), 2) if price else None
+
+    def get_prices(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        # The chart API is per symbol, so fan the requests out over the connection pool
+        result: Dict[str, Optional[float]] = {}
+        last_error = None
+        futures = {symbol: self._get_pool().submit(self.get_price, symbol) for symbol in symbols}
+        for symbol, future in futures.items():
+            try:
+                result[symbol] = future.result()
+            except Exception as e:
+                logger.warning(f"yahoo_chart price failed for {symbol}: {e}")
+                last_error = e
+                result[symbol] = None
+        if last_error is not None and all(p is None for p in result.values()):
+            raise last_error
+        return result
+
+    def get_history(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> List[Bar]:
+        if start is None:
+            params = {"interval": "1d", "range": "max"}
+        else:
+            stop = (end or date.today()) + timedelta(days=1)
+            params = {
+                "interval": "1d",
+                "period1": str(int(datetime.combine(start, datetime.min.time(), timezone.utc).timestamp())),
+                "period2": str(int(datetime.combine(stop, datetime.min.time(), timezone.utc).timestamp())),
+            }
+        chart = self._chart(symbol, params)
+        if not chart or not chart.get("timestamp"):
+            return []
+        quote = chart["indicators"]["quote"][0]
+        bars = []
+        for i, ts in enumerate(chart["timestamp"]):
+            close = quote["close"][i]
+            if close is None:
+                continue
+            day = datetime.fromtimestamp(ts, timezone.utc).date()
+            if (start and day < start) or (end and day > end):
+                continue
+            bars.append(Bar(day, float(quote["open"][i] or close), float(quote["high"][i] or close),
+                            float(quote["low"][i] or close), float(close), float(quote["volume"][i] or 0)))
+        return bars
+
+    def get_info(self, symbol: str) -> Optional[Dict]:
+        chart = self._chart(symbol, {"interval": "1d", "range": "1d"})
+        if not chart:
+            return None
+        meta = chart.get("meta", {})
+        return {
+            "shortName": meta.get("shortName"),
+            "longName": meta.get("longName"),
+            "currency": meta.get("currency"),
+            "exchange": meta.get("exchangeName"),
+            "regularMarketPrice": meta.get("regularMarketPrice"),
+            "previousClose": meta.get("chartPreviousClose"),
+            "dayHigh": meta.get("regularMarketDayHigh"),
+            "dayLow": meta.get("regularMarketDayLow"),
+            "volume": meta.get("regularMarketVolume"),
+            "fiftyTwoWeekHigh": meta.get("fiftyTwoWeekHigh"),
+            "fiftyTwoWeekLow": meta.get("fiftyTwoWeekLow"),
+        }
+
+
+class FixtureProvider(MarketDataProvider):
+    """
+    Replays recorded market data from disk, for offline runs and benchmarks.
+
+    Layout of `root`:
+        quotes.json          {"AAPL": 250.0, ...}
+        info.json            {"AAPL": {"shortName": ..., "sector": ...}, ...}
+        history/AAPL.csv     date,open,high,low,close,volume
+    """
+
+    name = "fixture"
+    batch_size = 1000
+
+    def __init__(self, root: str):
+        self.root = root
+        self._quotes: Optional[Dict[str, float]] = None
+        self._info: Optional[Dict[str, Dict]] = None
+
+    def _load_json(self, filename: str) -> Dict:
+        path = os.path.join(self.root, filename)
+        if not os.path.exists(path):
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return {k.upper(): v for k, v in json.load(f).items()}
+
+    def _history_path(self, symbol: str) -> str:
+        return os.path.join(self.root, "history", f"{symbol}.csv")
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        if self._quotes is None:
+            self._quotes = self._load_json("quotes.json")
+        price = self._quotes.get(symbol)
+        if price is not None:
+            return float(price)
+        # Fall back to the last recorded close
+        bars = self.get_history(symbol)
+        return bars[-1].close if bars else None
+
+    def get_history(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> List[Bar]:
+        path = self._history_path(symbol)
+        if not os.path.exists(path):
+            return []
+        bars = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                day = date.fromisoformat(row["date"])
+                if (start and day < start) or (end and day > end):
+                    continue
+                bars.append(Bar(day, float(row["open"]), float(row["high"]), float(row["low"]),
+                                float(row["close"]), float(row["volume"])))
+        return bars
+
+    def get_info(self, symbol: str) -> Optional[Dict]:
+        if self._info is None:
+            self._info = self._load_json("info.json")
+        return self._info.get(symbol)
+
+
+class FallbackProvider(MarketDataProvider):
+    """Asks each provider in turn until one has an answer."""
+
+    def __init__(self, providers: List[MarketDataProvider]):
+        self.providers = providers
+        self.name = providers[0].name
+        self.batch_size = min(p.batch_size for p in providers)
+
+    def _first(self, method: str, symbol: str, empty):
+        last_error = None
+        for provider in self.providers:
+            try:
+                result = getattr(provider, method)(symbol)
+                if result:
+                    return result
+            except Exception as e:
+                logger.warning(f"{provider.name} {method} failed for {symbol}: {e}")
+                last_error = e
+        if last_error is not None:
+            raise last_error
+        return empty
+
+    def get_price(self, symbol: str) -> Optional[float]:
+        return self._first("get_price", symbol, None)
+
+    def get_prices(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        result: Dict[str, Optional[float]] = {symbol: None for symbol in symbols}
+        last_error = None
+        for provider in self.providers:
+            missing = [s for s in symbols if result[s] is None]
+            if not missing:
+                break
+            try:
+                result.update({s: p for s, p in provider.get_prices(missing).items() if p is not None})
+            except Exception as e:
+                logger.warning(f"{provider.name} get_prices failed: {e}")
+                last_error = e
+        if last_error is not None and all(p is None for p in result.values()):
+            raise last_error
+        return result
+
+    def get_history(self, symbol: str, start: Optional[date] = None, end: Optional[date] = None) -> List[Bar]:
+        last_error = None
+        for provider in self.providers:
+            try:
+                bars = provider.get_history(symbol, start, end)
+                if bars:
+                    return bars
+            except Exception as e:
+                logger.warning(f"{provider.name} get_history failed for {symbol}: {e}")
+                last_error = e
+        if last_error is not None:
+            raise last_error
+        return []
+
+    def get_info(self, symbol: str) -> Optional[Dict]:
+        return self._first("get_info", symbol, None)
+
+    def get_quote(self, symbol: str) -> Optional[Dict]:
+        return self._first("get_quote", symbol, None)
+
+
+PROVIDERS = {
+    YFinanceProvider.name: YFinanceProvider,
+    YahooChartProvider.name: YahooChartProvider,
+    FixtureProvider.name: FixtureProvider,
+}
+
+
+def build_provider(names: Iterable[str], fixture_dir: Optional[str] = None) -> MarketDataProvider:
+    """
+    Build a provider chain from names such as ["fixture", "yahoo"].
+
+    Args:
+        names: Provider names in fallback order (see PROVIDERS)
+        fixture_dir: Directory used by the "fixture" provider
+    """
+    providers = []
+    for name in names:
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown market data provider: {name}")
+        if name == FixtureProvider.name:
+            providers.append(FixtureProvider(fixture_dir or "fixtures/market_data"))
+        else:
+            providers.append(PROVIDERS[name]())
+    if not providers:
+        raise ValueError("At least one market data provider is required")
+    return providers[0] if len(providers) == 1 else FallbackProvider(providers)
+
+
+def chunk_symbols(symbols: List[str], size: int) -> List[List[str]]:
+    """Split symbols into consecutive chunks of at most `size`."""
+    size = max(size, 1)
+    return [symbols[i:i + size] for i in range(0, len(symbols), size)]
+
+
+def get_prices_chunked(provider: MarketDataProvider, symbols: List[str], max_workers: int = 4) -> Dict[str, Optional[float]]:
+    """
+    Price any number of symbols by splitting them into provider-sized
+    chunks and fetching the chunks concurrently. A failed chunk leaves its
+    symbols as None instead of failing the whole request.
+    """
+    result: Dict[str, Optional[float]] = {symbol: None for symbol in symbols}
+    chunks = chunk_symbols(list(result), provider.batch_size)
+    if not chunks:
+        return result
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+        futures = [pool.submit(provider.get_prices, chunk) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            try:
+                result.update({s: p for s, p in future.result().items() if s in result})
+            except Exception as e:
+                logger.warning(f"{provider.name} failed for a chunk of {len(chunk)} symbols: {e}")
+    return result
+
+
+def record_fixtures(source: MarketDataProvider, symbols: List[str], root: str, start: Optional[date] = None) -> None:
+    """
+    Record quotes, info and daily history from a live provider into a
+    directory that FixtureProvider can replay.
+    """
+    os.makedirs(os.path.join(root, "history"), exist_ok=True)
+    symbols = [s.upper() for s in symbols]
+    quotes = source.get_prices(symbols)
+    info = {}
+    for symbol in symbols:
+        try:
+            info[symbol] = source.get_info(symbol)
+        except Exception as e:
+            logger.warning(f"Could not record info for {symbol}: {e}")
+        bars = source.get_history(symbol, start)
+        with open(os.path.join(root, "history", f"{symbol}.csv"), "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(Bar._fields)
+            for bar in bars:
+                writer.writerow([bar.date.isoformat(), bar.open, bar.high, bar.low, bar.close, bar.volume])
+    with open(os.path.join(root, "quotes.json"), "w", encoding="utf-8") as f:
+        json.dump({s: p for s, p in quotes.items() if p is not None}, f, indent=2)
+    with open(os.path.join(root, "info.json"), "w", encoding="utf-8") as f:
+        json.dump({s: i for s, i in info.items() if i}, f, indent=2, default=str)
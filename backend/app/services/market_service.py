@@ -1,14 +1,256 @@
-import yfinance as yf
-from typing import Dict, Optional, List
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, List
 from functools import lru_cache
 from datetime import datetime, timedelta
 import logging
+from app.services.price_cache import PriceCache, FRESH, STALE
+from app.services.market_calendar import quote_ttl
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.market_providers import MarketDataProvider, build_provider, chunk_symbols
+from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 
-# Simple in-memory cache
-_price_cache: Dict[str, tuple] = {}  # symbol -> (price, timestamp)
-CACHE_DURATION = timedelta(minutes=5)  # Cache prices for 5 minutes
+CACHE_DURATION = timedelta(minutes=5)  # Cache prices for 5 minutes while their market trades
+CACHE_MAX_ENTRIES = 5000  # Least recently used symbols are evicted beyond this
+CACHE_STALE_GRACE = timedelta(minutes=10)  # Expired prices are still served while refreshing
+
+# Bounded LRU cache; expired entries are served stale within the grace window
+# while a background refresh brings them up to date.
+_price_cache = PriceCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_DURATION, stale_grace=CACHE_STALE_GRACE)
+_refreshing: set = set()  # symbols with a background refresh already queued
+_refresh_lock = threading.Lock()
+
+# Symbols Yahoo had no price for are remembered briefly so repeated lookups of
+# a bad ticker don't each go upstream. While the breaker is open, lookups are
+# answered from whatever the price cache still holds instead of calling Yahoo.
+NEGATIVE_CACHE_DURATION = timedelta(minutes=2)
+_missing_symbols = PriceCache(max_entries=CACHE_MAX_ENTRIES, ttl=NEGATIVE_CACHE_DURATION)
+_breaker = CircuitBreaker(failure_threshold=5, reset_timeout=timedelta(seconds=30))
+
+# Provider calls block, so the async API runs them on a bounded worker pool
+# and caps how many requests may be in flight against each provider at once.
+QUOTE_WORKERS = 8
+PROVIDER_CONCURRENCY: Dict[str, int] = {"yahoo": 4, "yahoo_chart": 4, "fixture": QUOTE_WORKERS}
+_provider: Optional[MarketDataProvider] = None
+_quote_executor = ThreadPoolExecutor(max_workers=QUOTE_WORKERS, thread_name_prefix="quote")
+_provider_semaphores: Dict[str, tuple] = {}  # provider -> (event loop, semaphore)
+
+# Single-flight: concurrent async callers asking for the same symbol share one
+# upstream fetch instead of each firing their own request on a cache miss.
+_inflight: Dict[str, asyncio.Future] = {}  # symbol -> pending price
+_fetch_tasks: set = set()  # strong refs so running fetches are not garbage collected
+
+
+def get_market_provider() -> MarketDataProvider:
+    """Get the configured provider chain (MARKET_DATA_PROVIDERS)."""
+    global _provider
+    if _provider is None:
+        settings = get_settings()
+        _provider = build_provider(settings.MARKET_DATA_PROVIDERS.split(","), settings.MARKET_DATA_FIXTURE_DIR)
+    return _provider
+
+
+def set_market_provider(provider: Optional[MarketDataProvider]) -> None:
+    """Swap the provider, e.g. for a FixtureProvider in benchmarks. None restores the configured chain."""
+    global _provider
+    _provider = provider
+
+
+def _get_cached_price(symbol: str, stale: Optional[List[str]] = None) -> Optional[float]:
+    """
+    Return the cached price for an upper-cased symbol, or None on a miss.
+    A stale price is returned as-is and the symbol is added to `stale` for
+    the caller to refresh in one batch, or refreshed on its own without it.
+    """
+    price, state = _price_cache.get(symbol)
+    if state == STALE:
+        if stale is None:
+            _schedule_refresh([symbol])
+        else:
+            stale.append(symbol)
+    return price if state in (FRESH, STALE) else None
+
+
+def _is_known_missing(symbol: str) -> bool:
+    """Check whether an upper-cased symbol recently came back with no price."""
+    return _missing_symbols.get(symbol)[1] == FRESH
+
+
+def _cache_price(symbol: str, price: float) -> None:
+    _price_cache.set(symbol, price, ttl=quote_ttl(symbol, CACHE_DURATION))
+
+
+def _record_no_price(symbol: str) -> bool:
+    """
+    Handle a symbol the provider answered for without a price. A symbol we
+    have priced before points to a provider problem, which the caller
+    counts against the breaker; anything else is cached as unknown.
+
+    Returns:
+        True if the symbol has been priced before
+    """
+    if _price_cache.peek(symbol) is not None:
+        return True
+    _missing_symbols.set(symbol, True)
+    return False
+
+
+def _schedule_refresh(symbols: List[str]) -> None:
+    """
+    Queue a background refresh for stale symbols not already being refreshed.
+    Inside an event loop the refresh runs in provider-sized batches under the
+    provider's concurrency limit; otherwise one job on the quote pool fetches
+    the batches one after another.
+    """
+    with _refresh_lock:
+        pending = [s for s in dict.fromkeys(symbols) if s not in _refreshing]
+        _refreshing.update(pending)
+    if not pending:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _quote_executor.submit(_refresh_prices, pending)
+        return
+    task = loop.create_task(_refresh_prices_async(pending))
+    _fetch_tasks.add(task)
+    task.add_done_callback(_fetch_tasks.discard)
+    # Also runs if the task is cancelled before it starts
+    task.add_done_callback(lambda _: _end_refresh(pending))
+
+
+def _end_refresh(symbols: List[str]) -> None:
+    with _refresh_lock:
+        _refreshing.difference_update(symbols)
+
+
+def _fetch_chunk(symbols: List[str]) -> Dict[str, Optional[float]]:
+    """Fetch one provider-sized batch, using the single-quote call for a lone symbol."""
+    if len(symbols) == 1:
+        return {symbols[0]: _fetch_price(symbols[0])}
+    return _fetch_prices(symbols)
+
+
+def _refresh_prices(symbols: List[str]) -> None:
+    """Fetch fresh prices for stale symbols; runs on the quote pool."""
+    try:
+        for chunk in chunk_symbols(symbols, get_market_provider().batch_size):
+            _fetch_chunk(chunk)
+    except Exception as e:
+        logger.warning(f"Background refresh failed for {symbols}: {e}")
+    finally:
+        _end_refresh(symbols)
+
+
+async def _refresh_prices_async(symbols: List[str]) -> None:
+    """Fetch fresh prices for stale symbols in concurrent batches on the quote pool."""
+    await refresh_prices_async(symbols)
+
+
+def symbols_due_for_refresh(symbols: List[str], within: timedelta) -> List[str]:
+    """
+    Upper-cased symbols with no cached price or one that stops being fresh
+    within `within`. Symbols recently found to have no price are skipped.
+    """
+    deadline = datetime.now() + within
+    due = []
+    for symbol in dict.fromkeys(s.upper() for s in symbols):
+        if _is_known_missing(symbol):
+            continue
+        expires_at = _price_cache.expires_at(symbol)
+        if expires_at is None or expires_at <= deadline:
+            due.append(symbol)
+    return due
+
+
+async def refresh_prices_async(symbols: List[str]) -> Dict[str, Optional[float]]:
+    """
+    Fetch upper-cased symbols from the provider whether or not they are
+    cached, in provider-sized batches under the provider's concurrency
+    limit. Symbols from a failed batch come back as None.
+    """
+    result: Dict[str, Optional[float]] = {}
+    chunks = chunk_symbols(symbols, get_market_provider().batch_size)
+    prices = await asyncio.gather(*(_run_quote_call(_fetch_chunk, chunk) for chunk in chunks), return_exceptions=True)
+    for chunk, chunk_prices in zip(chunks, prices):
+        if isinstance(chunk_prices, BaseException):
+            logger.warning(f"Refresh failed for {chunk}: {chunk_prices!r}")
+            chunk_prices = {}
+        result.update({symbol: chunk_prices.get(symbol) for symbol in chunk})
+    return result
+
+
+def _fetch_price(symbol: str) -> Optional[float]:
+    """
+    Fetch one price from the provider and cache it. `symbol` must be upper-cased.
+    Fails fast with the last known price while the circuit breaker is open.
+    """
+    if not _breaker.allow_request():
+        return _price_cache.peek(symbol)
+    
+    try:
+        try:
+            price = get_market_provider().get_price(symbol)
+        except Exception as e:
+            logger.error(f"Error fetching price for {symbol}: {e}")
+            _breaker.record_failure()
+            return _price_cache.peek(symbol)
+        
+        if price is not None:
+            _breaker.record_success()
+            _cache_price(symbol, price)
+            return price
+        
+        logger.warning(f"Could not fetch price for symbol: {symbol}")
+        if _record_no_price(symbol):
+            _breaker.record_failure()
+        return _price_cache.peek(symbol)
+    finally:
+        # An answer that was neither success nor failure must not hold the trial
+        _breaker.release_trial()
+
+
+def _fetch_prices(symbols: List[str]) -> Dict[str, Optional[float]]:
+    """
+    Batch-fetch upper-cased symbols from the provider and cache the results.
+    Fails fast with the last known prices while the circuit breaker is open.
+    """
+    if not _breaker.allow_request():
+        return {symbol: _price_cache.peek(symbol) for symbol in symbols}
+    
+    result = {}
+    try:
+        prices = get_market_provider().get_prices(symbols)
+    except Exception as e:
+        logger.error(f"Error batch fetching prices: {e}")
+        _breaker.record_failure()
+        # Fallback to individual fetching; these fail fast once the breaker opens
+        for symbol in symbols:
+            result[symbol] = _fetch_price(symbol)
+        return result
+    finally:
+        _breaker.release_trial()
+    
+    # A batch with any prices in it is a working provider; an empty one
+    # counts as a single failure if it left out symbols we have priced before
+    answered = any(price is not None for price in prices.values())
+    if answered:
+        _breaker.record_success()
+    missing_known = False
+    for symbol in symbols:
+        price = prices.get(symbol)
+        if price is not None:
+            result[symbol] = price
+            _cache_price(symbol, price)
+        else:
+            missing_known = _record_no_price(symbol) or missing_known
+            result[symbol] = _price_cache.peek(symbol)
+    if missing_known and not answered:
+        _breaker.record_failure()
+    return result
 
 
 def get_current_price(symbol: str) -> Optional[float]:
@@ -25,38 +267,13 @@ def get_current_price(symbol: str) -> Optional[float]:
     symbol = symbol.upper()
     
     # Check cache
-    if symbol in _price_cache:
-        price, timestamp = _price_cache[symbol]
-        if datetime.now() - timestamp < CACHE_DURATION:
-            return price
-    
-    try:
-        ticker = yf.Ticker(symbol)
-        
-        # Try to get the current price from fast_info first
-        try:
-            price = ticker.fast_info.get('lastPrice')
-            if price is None:
-                price = ticker.fast_info.get('regularMarketPrice')
-        except:
-            price = None
-        
-        # Fallback to history if fast_info doesn't work
-        if price is None:
-            hist = ticker.history(period="1d")
-            if not hist.empty:
-                price = float(hist['Close'].iloc[-1])
-        
-        if price is not None:
-            _price_cache[symbol] = (price, datetime.now())
-            return float(price)
-        
-        logger.warning(f"Could not fetch price for symbol: {symbol}")
-        return None
-        
-    except Exception as e:
-        logger.error(f"Error fetching price for {symbol}: {e}")
+    cached = _get_cached_price(symbol)
+    if cached is not None:
+        return cached
+    if _is_known_missing(symbol):
         return None
+    
+    return _fetch_price(symbol)
 
 
 def get_multiple_prices(symbols: List[str]) -> Dict[str, Optional[float]]:
@@ -73,52 +290,23 @@ def get_multiple_prices(symbols: List[str]) -> Dict[str, Optional[float]]:
     
     # First check cache for all symbols
     symbols_to_fetch = []
+    stale: List[str] = []
     for symbol in symbols:
         symbol = symbol.upper()
-        if symbol in _price_cache:
-            price, timestamp = _price_cache[symbol]
-            if datetime.now() - timestamp < CACHE_DURATION:
-                result[symbol] = price
-                continue
+        cached = _get_cached_price(symbol, stale)
+        if cached is not None:
+            result[symbol] = cached
+            continue
+        if _is_known_missing(symbol):
+            result[symbol] = None
+            continue
         symbols_to_fetch.append(symbol)
+    if stale:
+        _schedule_refresh(stale)
     
-    # Fetch remaining symbols
-    if symbols_to_fetch:
-        try:
-            # Use yfinance download for batch fetching (more efficient)
-            data = yf.download(
-                symbols_to_fetch, 
-                period="1d", 
-                progress=False,
-                threads=True
-            )
-            
-            if not data.empty:
-                # Handle single symbol case
-                if len(symbols_to_fetch) == 1:
-                    symbol = symbols_to_fetch[0]
-                    if 'Close' in data.columns:
-                        price = float(data['Close'].iloc[-1])
-                        result[symbol] = price
-                        _price_cache[symbol] = (price, datetime.now())
-                else:
-                    # Handle multiple symbols
-                    for symbol in symbols_to_fetch:
-                        try:
-                            if ('Close', symbol) in data.columns:
-                                close_prices = data['Close'][symbol]
-                                if not close_prices.empty:
-                                    price = float(close_prices.iloc[-1])
-                                    result[symbol] = price
-                                    _price_cache[symbol] = (price, datetime.now())
-                        except Exception as e:
-                            logger.warning(f"Could not get price for {symbol}: {e}")
-                            result[symbol] = None
-        except Exception as e:
-            logger.error(f"Error batch fetching prices: {e}")
-            # Fallback to individual fetching
-            for symbol in symbols_to_fetch:
-                result[symbol] = get_current_price(symbol)
+    # Fetch remaining symbols in provider-sized batches
+    for chunk in chunk_symbols(symbols_to_fetch, get_market_provider().batch_size):
+        result.update(_fetch_prices(chunk))
     
     # Fill in None for any missing symbols
     for symbol in symbols:
@@ -133,37 +321,172 @@ def get_stock_info(symbol: str) -> Optional[Dict]:
     """
     Get detailed stock information.
     
+    Name, sector, exchange and currency come from the metadata store; only
+    the quote fields are fetched from the provider.
+    
     Args:
         symbol: Stock ticker symbol
     
     Returns:
         Dictionary with stock info or None
     """
+    # Imported here because the metadata store builds on this module
+    from app.services.metadata_store import get_metadata
+    
+    symbol = symbol.upper()
     try:
-        ticker = yf.Ticker(symbol.upper())
-        info = ticker.info
+        metadata = get_metadata(symbol) or {}
+        quote = get_market_provider().get_quote(symbol) or {}
+        if not metadata and not quote:
+            return None
         
         return {
-            "symbol": symbol.upper(),
-            "name": info.get("shortName") or info.get("longName"),
-            "currency": info.get("currency", "USD"),
-            "exchange": info.get("exchange"),
-            "sector": info.get("sector"),
-            "marketCap": info.get("marketCap"),
-            "currentPrice": info.get("currentPrice") or info.get("regularMarketPrice"),
-            "previousClose": info.get("previousClose"),
-            "dayHigh": info.get("dayHigh"),
-            "dayLow": info.get("dayLow"),
-            "volume": info.get("volume"),
-            "fiftyTwoWeekHigh": info.get("fiftyTwoWeekHigh"),
-            "fiftyTwoWeekLow": info.get("fiftyTwoWeekLow"),
+            "symbol": symbol,
+            "name": metadata.get("name"),
+            "currency": metadata.get("currency") or quote.get("currency") or "USD",
+            "exchange": metadata.get("exchange"),
+            "sector": metadata.get("sector"),
+            "marketCap": quote.get("marketCap"),
+            "currentPrice": quote.get("regularMarketPrice"),
+            "previousClose": quote.get("previousClose"),
+            "dayHigh": quote.get("dayHigh"),
+            "dayLow": quote.get("dayLow"),
+            "volume": quote.get("volume"),
+            "fiftyTwoWeekHigh": quote.get("fiftyTwoWeekHigh"),
+            "fiftyTwoWeekLow": quote.get("fiftyTwoWeekLow"),
         }
     except Exception as e:
         logger.error(f"Error fetching info for {symbol}: {e}")
         return None
 
 
+def _provider_semaphore(provider: str) -> asyncio.Semaphore:
+    """Get the concurrency limiter for a provider, bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    entry = _provider_semaphores.get(provider)
+    if entry is None or entry[0] is not loop:
+        entry = (loop, asyncio.Semaphore(PROVIDER_CONCURRENCY.get(provider, 1)))
+        _provider_semaphores[provider] = entry
+    return entry[1]
+
+
+async def _run_quote_call(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking provider call on the quote pool without blocking the event loop."""
+    async with _provider_semaphore(get_market_provider().name):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_quote_executor, func, *args)
+
+
+def _join_inflight(symbols: List[str]) -> Dict[str, asyncio.Future]:
+    """
+    Return a pending future per symbol, starting shared upstream fetches
+    for the symbols nobody is already waiting on. Those are split into
+    provider-sized batches that run concurrently.
+    """
+    loop = asyncio.get_running_loop()
+    waiters: Dict[str, asyncio.Future] = {}
+    to_fetch = []
+    for symbol in symbols:
+        pending = _inflight.get(symbol)
+        if pending is None or pending.get_loop() is not loop:
+            pending = loop.create_future()
+            _inflight[symbol] = pending
+            to_fetch.append(symbol)
+        waiters[symbol] = pending
+    
+    for chunk in chunk_symbols(to_fetch, get_market_provider().batch_size):
+        task = loop.create_task(_fetch_and_resolve(chunk, {s: waiters[s] for s in chunk}))
+        _fetch_tasks.add(task)
+        task.add_done_callback(_fetch_tasks.discard)
+    return waiters
+
+
+async def _fetch_and_resolve(symbols: List[str], futures: Dict[str, asyncio.Future]) -> None:
+    """Fetch symbols upstream once and hand the result to every waiter."""
+    try:
+        prices = await _run_quote_call(_fetch_chunk, symbols)
+        for symbol, future in futures.items():
+            if not future.done():
+                future.set_result(prices.get(symbol))
+    except Exception as e:
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(e)
+    finally:
+        for symbol, future in futures.items():
+            if not future.done():
+                future.cancel()
+            if _inflight.get(symbol) is future:
+                del _inflight[symbol]
+
+
+async def get_current_price_async(symbol: str) -> Optional[float]:
+    """
+    Awaitable variant of get_current_price for use inside async routes.
+    Cache hits are answered inline; concurrent misses for the same symbol
+    share a single fetch on the quote pool.
+    """
+    symbol = symbol.upper()
+    cached = _get_cached_price(symbol)
+    if cached is not None:
+        return cached
+    if _is_known_missing(symbol):
+        return None
+    waiters = _join_inflight([symbol])
+    return await asyncio.shield(waiters[symbol])
+
+
+async def get_multiple_prices_async(symbols: List[str]) -> Dict[str, Optional[float]]:
+    """
+    Awaitable variant of get_multiple_prices for use inside async routes.
+    Only the symbols missing from the cache are fetched, and symbols already
+    being fetched for another caller are joined rather than requested again.
+    Large lists are fetched as concurrent batches; symbols from a failed
+    batch come back as None.
+    """
+    result: Dict[str, Optional[float]] = {}
+    symbols_to_fetch = []
+    stale: List[str] = []
+    for symbol in symbols:
+        symbol = symbol.upper()
+        cached = _get_cached_price(symbol, stale)
+        if cached is not None:
+            result[symbol] = cached
+        elif _is_known_missing(symbol):
+            result[symbol] = None
+        elif symbol not in symbols_to_fetch:
+            symbols_to_fetch.append(symbol)
+    if stale:
+        _schedule_refresh(stale)
+    
+    if symbols_to_fetch:
+        waiters = _join_inflight(symbols_to_fetch)
+        prices = await asyncio.gather(*(asyncio.shield(waiters[s]) for s in symbols_to_fetch), return_exceptions=True)
+        for symbol, price in zip(symbols_to_fetch, prices):
+            if isinstance(price, BaseException):
+                # One failed batch should not sink the rest of the request
+                logger.warning(f"Could not fetch price for {symbol}: {price!r}")
+                price = None
+            result[symbol] = price
+    
+    return result
+
+
+async def get_stock_info_async(symbol: str) -> Optional[Dict]:
+    """Awaitable variant of get_stock_info for use inside async routes."""
+    return await _run_quote_call(get_stock_info, symbol)
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Return hit, miss and stale-serve counters for the price cache."""
+    stats = _price_cache.stats()
+    stats["negative_cache"] = _missing_symbols.stats()
+    stats["circuit_breaker"] = _breaker.state
+    return stats
+
+
 def clear_cache():
     """Clear the price cache."""
-    global _price_cache
-    _price_cache = {}
+    _price_cache.clear()
+    _missing_symbols.clear()
+    _breaker.reset()
@@ -0,0 +1,267 @@
+"""
+Persistent store of slow-changing stock metadata (name, sector, industry,
+exchange, currency).
+
+Yahoo's full info endpoint is the slowest call we make, and these fields
+change about once a year, so they are kept in a JSON file with a TTL
+measured in days and refreshed in bulk in the background. Lookups are
+served from memory and never wait on the network for a known symbol; an
+unknown one is fetched in the background right away.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from app.config import get_settings
+from app.services.market_service import get_market_provider
+from app.services.recommendation_data import RISK_LEVEL_STOCKS, SECTOR_MAP
+
+logger = logging.getLogger(__name__)
+
+METADATA_FIELDS = ("name", "sector", "industry", "exchange", "currency")
+UNKNOWN_SECTOR = "Other"
+PENDING_SECTOR = "Pending"  # Metadata for the symbol is still being fetched
+
+
+def _seed() -> Dict[str, Dict]:
+    """Metadata we already ship: the recommendation lists and SECTOR_MAP."""
+    seed: Dict[str, Dict] = {}
+    for stocks in RISK_LEVEL_STOCKS.values():
+        for stock in stocks:
+            seed[stock["ticker"].upper()] = {"name": stock["name"], "sector": stock["sector"]}
+    for symbol, sector in SECTOR_MAP.items():
+        seed.setdefault(symbol, {"sector": sector})
+    return seed
+
+
+def metadata_from_info(info: Dict) -> Dict:
+    """Pick the metadata fields out of a Yahoo-style info dict."""
+    return {
+        "name": info.get("shortName") or info.get("longName"),
+        "sector": info.get("sector"),
+        "industry": info.get("industry"),
+        "exchange": info.get("exchange"),
+        "currency": info.get("currency"),
+    }
+
+
+class MetadataStore:
+    """
+    JSON-backed symbol -> metadata map. Each entry records the day it was
+    fetched; seeded entries have no date and count as expired, so the
+    first background refresh replaces them with provider data.
+    """
+
+    def __init__(self, path: str, ttl: timedelta):
+        self.path = path
+        self.ttl = ttl
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        for symbol, metadata in _seed().items():
+            self._entries[symbol] = {**metadata, "updated": None}
+        self._load()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable metadata store {self.path}: {e}")
+            return
+        for symbol, entry in stored.items():
+            # Keep seeded values for fields the provider had nothing for
+            merged = dict(self._entries.get(symbol.upper(), {}))
+            merged.update({k: v for k, v in entry.items() if v is not None})
+            self._entries[symbol.upper()] = merged
+
+    def save(self) -> None:
+        """Write the store atomically."""
+        with self._lock:
+            data = json.dumps(self._entries, indent=2, sort_keys=True)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """Stored metadata for a symbol, expired or not, or None if unknown."""
+        with self._lock:
+            entry = self._entries.get(symbol.upper())
+            return {field: entry.get(field) for field in METADATA_FIELDS} if entry else None
+
+    def set(self, symbol: str, metadata: Dict) -> None:
+        """Store freshly fetched metadata, keeping known values the provider left empty."""
+        symbol = symbol.upper()
+        with self._lock:
+            entry = dict(self._entries.get(symbol, {}))
+            entry.update({k: v for k, v in metadata.items() if k in METADATA_FIELDS and v is not None})
+            entry["updated"] = date.today().isoformat()
+            self._entries[symbol] = entry
+
+    def is_expired(self, symbol: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(symbol.upper())
+        if not entry or not entry.get("updated"):
+            return True
+        return date.fromisoformat(entry["updated"]) + self.ttl <= date.today()
+
+    def symbols(self) -> List[str]:
+        with self._lock:
+            return list(self._entries)
+
+
+_store: Optional[MetadataStore] = None
+_store_lock = threading.Lock()
+
+# Symbols looked up without a stored entry (e.g. just bought) are fetched at
+# once in the background instead of waiting for the next scheduled refresh
+_lookup_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="metadata")
+_lookups: Dict[str, Future] = {}  # symbol -> fetch in progress
+_failed_lookups: set = set()  # symbols the provider had no metadata for today
+_failed_on: Optional[date] = None
+_lookups_lock = threading.Lock()
+
+
+def get_metadata_store() -> MetadataStore:
+    """Get the store at METADATA_STORE_PATH."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            settings = get_settings()
+            _store = MetadataStore(settings.METADATA_STORE_PATH, timedelta(days=settings.METADATA_TTL_DAYS))
+        return _store
+
+
+def _queue_lookup(symbols: List[str]) -> List[str]:
+    """
+    Fetch metadata for unknown upper-cased symbols in the background,
+    trying each at most once a day.
+
+    Returns:
+        Those of `symbols` with a fetch queued or running
+    """
+    global _failed_on
+    today = date.today()
+    with _lookups_lock:
+        if _failed_on != today:
+            _failed_lookups.clear()
+            _failed_on = today
+        new = [s for s in dict.fromkeys(symbols) if s not in _lookups and s not in _failed_lookups]
+        if new:
+            future = _lookup_executor.submit(_lookup, new)
+            for symbol in new:
+                _lookups[symbol] = future
+        return [s for s in symbols if s in _lookups]
+
+
+def _lookup(symbols: List[str]) -> None:
+    try:
+        refresh_metadata(symbols)
+    except Exception as e:
+        logger.warning(f"Metadata lookup failed for {symbols}: {e}")
+    finally:
+        store = get_metadata_store()
+        with _lookups_lock:
+            for symbol in symbols:
+                _lookups.pop(symbol, None)
+                if store.get(symbol) is None:
+                    _failed_lookups.add(symbol)
+
+
+def get_sector(symbol: str) -> str:
+    """
+    Sector for a symbol from the store; never waits on the provider. An
+    unknown symbol is PENDING_SECTOR while its metadata is fetched in the
+    background, and UNKNOWN_SECTOR once the provider had none.
+    """
+    return get_sectors([symbol])[symbol.upper()]
+
+
+def get_sectors(symbols: Iterable[str]) -> Dict[str, str]:
+    """Sectors for several symbols, keyed by upper-cased symbol; never waits on the provider."""
+    store = get_metadata_store()
+    sectors: Dict[str, str] = {}
+    unknown = []
+    for symbol in symbols:
+        symbol = symbol.upper()
+        metadata = store.get(symbol)
+        if metadata is None:
+            unknown.append(symbol)
+        else:
+            sectors[symbol] = metadata.get("sector") or UNKNOWN_SECTOR
+    pending = set(_queue_lookup(unknown)) if unknown else set()
+    for symbol in unknown:
+        sectors[symbol] = PENDING_SECTOR if symbol in pending else UNKNOWN_SECTOR
+    return sectors
+
+
+def get_metadata(symbol: str) -> Optional[Dict]:
+    """
+    Metadata for a symbol. Known symbols are answered from the store, even
+    when expired (the background refresh renews them); a symbol seen for the
+    first time is fetched once and persisted.
+    """
+    store = get_metadata_store()
+    metadata = store.get(symbol)
+    if metadata is not None:
+        return metadata
+    refresh_metadata([symbol])
+    return store.get(symbol)
+
+
+def refresh_metadata(symbols: Iterable[str]) -> int:
+    """
+    Fetch metadata for symbols from the provider and save the store once.
+
+    Returns:
+        Number of symbols updated
+    """
+    store = get_metadata_store()
+    provider = get_market_provider()
+    updated = 0
+    for symbol in symbols:
+        symbol = symbol.upper()
+        try:
+            info = provider.get_info(symbol)
+        except Exception as e:
+            logger.warning(f"Could not refresh metadata for {symbol}: {e}")
+            continue
+        if info:
+            store.set(symbol, metadata_from_info(info))
+            updated += 1
+    if updated:
+        store.save()
+    return updated
+
+
+async def run_metadata_refresher() -> None:
+    """
+    Renew expired metadata for held and recommended symbols until cancelled,
+    every METADATA_REFRESH_INTERVAL_HOURS.
+    """
+    from app.services.price_prefetcher import collect_prefetch_symbols
+
+    settings = get_settings()
+    while True:
+        try:
+            store = get_metadata_store()
+            symbols = set(await collect_prefetch_symbols()) | set(store.symbols())
+            expired = sorted(s for s in symbols if store.is_expired(s))
+            if expired:
+                updated = await asyncio.to_thread(refresh_metadata, expired)
+                logger.info(f"Refreshed metadata for {updated} of {len(expired)} expired symbols")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Metadata refresh failed: {e}")
+        await asyncio.sleep(settings.METADATA_REFRESH_INTERVAL_HOURS * 3600)
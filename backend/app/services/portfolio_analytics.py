@@ -0,0 +1,140 @@
+"""
+Columnar portfolio analytics.
+
+Holdings are loaded into parallel arrays, one element per lot, and every
+figure the analysis needs is computed with vectorized numpy operations.
+Lots may belong to several portfolios at once (`portfolio_id`), so the same
+kernel scores a single user or a whole batch of users in one pass.
+
+Kept free of FastAPI and Supabase imports so the Vercel functions in /api
+can use it too.
+"""
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class PortfolioAnalytics(NamedTuple):
+    """Kernel output. Per-lot arrays have shape (lots,), per-portfolio (portfolios,)."""
+    value: np.ndarray  # per lot
+    cost: np.ndarray
+    profit_loss: np.ndarray
+    profit_loss_percent: np.ndarray
+    weight: np.ndarray  # percent of the lot's portfolio
+    total_value: np.ndarray  # per portfolio
+    total_cost: np.ndarray
+    asset_count: np.ndarray
+    top_holding_weight: np.ndarray  # percent
+    hhi: np.ndarray  # Herfindahl-Hirschman index on the 0-10,000 scale
+    sector_value: np.ndarray  # (portfolios, sectors)
+    sector_count: np.ndarray  # lots per sector, (portfolios, sectors)
+    sector_weight: np.ndarray  # percent, (portfolios, sectors)
+    sectors_held: np.ndarray  # per portfolio
+    diversification_score: np.ndarray
+
+
+def encode_labels(labels: Iterable[str]) -> Tuple[np.ndarray, List[str]]:
+    """
+    Turn labels such as sector names into integer codes.
+
+    Returns:
+        Tuple of (codes array, names) where names[code] is the label,
+        in order of first appearance
+    """
+    codes: Dict[str, int] = {}
+    encoded = [codes.setdefault(label, len(codes)) for label in labels]
+    return np.asarray(encoded, dtype=np.int64), list(codes)
+
+
+def diversification_score(asset_count, sector_count, top_holding_weight) -> np.ndarray:
+    """
+    0-100 score: up to 40 points for 4+ assets, 30 for 2+ sectors and 30
+    for a low top-holding weight.
+    """
+    asset_score = np.minimum(np.asarray(asset_count) * 10, 40)
+    sector_score = np.minimum(np.asarray(sector_count) * 15, 30)
+    concentration_score = np.maximum(0, 30 - np.asarray(top_holding_weight, dtype=float))
+    return np.minimum(asset_score + sector_score + concentration_score, 100)
+
+
+def analyze_holdings(
+    quantity: Sequence[float],
+    cost_price: Sequence[float],
+    price: Sequence[float],
+    sector_code: Sequence[int],
+    portfolio_id: Optional[Sequence[int]] = None,
+    n_sectors: Optional[int] = None,
+    n_portfolios: Optional[int] = None,
+) -> PortfolioAnalytics:
+    """
+    Value, weight and concentration figures for a set of lots.
+
+    Args:
+        quantity: Units held per lot
+        cost_price: Purchase price per unit
+        price: Current price per unit
+        sector_code: Sector of each lot, as returned by encode_labels
+        portfolio_id: Portfolio of each lot (0..n_portfolios-1); all lots
+            belong to portfolio 0 when omitted
+        n_sectors: Number of sector codes, inferred when omitted
+        n_portfolios: Number of portfolios, inferred when omitted
+
+    Returns:
+        PortfolioAnalytics with per-lot, per-portfolio and per-sector arrays
+    """
+    quantity = np.asarray(quantity, dtype=float)
+    cost_price = np.asarray(cost_price, dtype=float)
+    price = np.asarray(price, dtype=float)
+    sector_code = np.asarray(sector_code, dtype=np.int64)
+    if portfolio_id is None:
+        portfolio_id = np.zeros(len(quantity), dtype=np.int64)
+    else:
+        portfolio_id = np.asarray(portfolio_id, dtype=np.int64)
+    if n_sectors is None:
+        n_sectors = int(sector_code.max()) + 1 if sector_code.size else 0
+    if n_portfolios is None:
+        n_portfolios = int(portfolio_id.max()) + 1 if portfolio_id.size else 1
+
+    value = quantity * price
+    cost = quantity * cost_price
+    profit_loss = value - cost
+    profit_loss_percent = np.divide(profit_loss * 100, cost, out=np.zeros_like(cost), where=cost > 0)
+
+    total_value = np.bincount(portfolio_id, weights=value, minlength=n_portfolios)
+    total_cost = np.bincount(portfolio_id, weights=cost, minlength=n_portfolios)
+    asset_count = np.bincount(portfolio_id, minlength=n_portfolios)
+
+    lot_total = total_value[portfolio_id]
+    weight = np.divide(value * 100, lot_total, out=np.zeros_like(value), where=lot_total > 0)
+    top_holding_weight = np.zeros(n_portfolios)
+    np.maximum.at(top_holding_weight, portfolio_id, weight)
+    hhi = np.bincount(portfolio_id, weights=weight ** 2, minlength=n_portfolios)
+
+    # Aggregate by (portfolio, sector) through a flattened key
+    key = portfolio_id * n_sectors + sector_code
+    cells = n_portfolios * n_sectors
+    sector_value = np.bincount(key, weights=value, minlength=cells).reshape(n_portfolios, n_sectors)
+    sector_count = np.bincount(key, minlength=cells).reshape(n_portfolios, n_sectors)
+    sector_weight = np.divide(
+        sector_value * 100, total_value[:, None],
+        out=np.zeros_like(sector_value), where=total_value[:, None] > 0,
+    )
+    sectors_held = (sector_count > 0).sum(axis=1)
+
+    return PortfolioAnalytics(
+        value=value,
+        cost=cost,
+        profit_loss=profit_loss,
+        profit_loss_percent=profit_loss_percent,
+        weight=weight,
+        total_value=total_value,
+        total_cost=total_cost,
+        asset_count=asset_count,
+        top_holding_weight=top_holding_weight,
+        hhi=hhi,
+        sector_value=sector_value,
+        sector_count=sector_count,
+        sector_weight=sector_weight,
+        sectors_held=sectors_held,
+        diversification_score=diversification_score(asset_count, sectors_held, top_holding_weight),
+    )
@@ -1,14 +1,9 @@
 from typing import Dict, Union, List, Any
-import yfinance as yf
-from supabase import create_client, Client
-from app.config import get_settings
+from app.services.database import fetch_financial_snapshot, insert_asset
 from app.services.recommendation_data import RISK_LEVEL_STOCKS
+from app.services.market_service import get_multiple_prices_async
 from app.schemas import AcceptRecommendationRequest
 
-settings = get_settings()
-# Initialize Supabase Admin Client for database operations
-supabase_admin: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
-
 
 def get_portfolio_recommendation(risk_profile: int) -> Dict[str, Union[str, int, float, List]]:
     """
@@ -229,80 +224,22 @@ def get_portfolio_recommendation(risk_profile: int) -> Dict[str, Union[str, int,
     return allocations[risk_profile]
 
 
-def get_stock_recommendations(risk_profile: int, user_id: str = None) -> Dict[str, Any]:
+async def get_stock_recommendations(risk_profile: int, user_id: str = None) -> Dict[str, Any]:
     """
     Get list of real stock recommendations for a given risk profile.
-    Fetches real-time prices using yfinance.
+    Fetches real-time prices through the market data provider.
     Now filters based on user's remaining budget.
     """
     remaining_budget = 1000000.0 # Default High budget if no user
     
     if user_id:
         try:
-            # 1. Fetch User Profile for Initial Investment and Budget details
-            profile_response = supabase_admin.table("user_profiles").select("initial_investment, monthly_budget, created_at").eq("user_id", user_id).execute()
-            if profile_response.data:
-                profile = profile_response.data[0]
-                initial_investment = float(profile.get("initial_investment") or 0)
-                monthly_budget = float(profile.get("monthly_budget") or 0)
-                created_at_str = profile.get("created_at")
-                
-                # Logic to calculate total cash injected (initial + monthly contributions)
-                # mirroring the frontend logic in DashboardPage.tsx
-                from datetime import datetime, timedelta
-                from dateutil.relativedelta import relativedelta
-                
-                if created_at_str:
-                    # Parse created_at (handling ISO format)
-                    try:
-                        created_at = datetime.fromisoformat(created_at_str.replace('Z', '+00:00'))
-                        now = datetime.now(created_at.tzinfo)
-                        
-                        # Move to next month's 1st
-                        current_check = created_at
-                        if current_check.day > 1:
-                            current_check = current_check + relativedelta(months=1)
-                            current_check = current_check.replace(day=1)
-                        else:
-                             # Frontend logic also skips to next month if day is 1
-                            current_check = current_check + relativedelta(months=1)
-                            current_check = current_check.replace(day=1)
-                            
-                        current_check = current_check.replace(hour=0, minute=0, second=0, microsecond=0)
-                        
-                        months_passed = 0
-                        while current_check <= now:
-                            months_passed += 1
-                            current_check = current_check + relativedelta(months=1)
-                            
-                        # 3. Fetch Realized Gains (Closed Positions)
-                        trans_response = supabase_admin.table("transactions").select("profit_loss").eq("user_id", user_id).execute()
-                        realized_gains = sum(float(t.get("profit_loss") or 0) for t in trans_response.data)
-
-                        # 2. Fetch Assets for Total Invested
-                        assets_response = supabase_admin.table("assets").select("amount, price").eq("user_id", user_id).execute()
-                        total_invested = sum(float(a["amount"]) * float(a["price"]) for a in assets_response.data)
-                        
-                        remaining_budget = max(0, (initial_investment + (monthly_budget * months_passed)) - total_invested + realized_gains)
-                    except Exception as e:
-                        print(f"Error parsing date or calculating months: {e}")
-                        # Fallback if date parsing or calculation fails
-                        total_cash_injected = initial_investment
-                        # 2. Fetch Assets for Total Invested (still needed for remaining_budget)
-                        assets_response = supabase_admin.table("assets").select("amount, price").eq("user_id", user_id).execute()
-                        total_invested = sum(float(a["amount"]) * float(a["price"]) for a in assets_response.data)
-                        # No realized_gains if error, so just initial_investment - total_invested
-                        remaining_budget = max(0, total_cash_injected - total_invested)
-                else:
-                    total_cash_injected = initial_investment
-                assets_response = supabase_admin.table("assets").select("amount, price").eq("user_id", user_id).execute()
-                total_invested = sum(float(a["amount"]) * float(a["price"]) for a in assets_response.data)
-                
-                remaining_budget = max(0, total_cash_injected - total_invested)
-            else:
-                 # If no profile found, assume 0 or handle logic?
-                 # Let's assume infinite for now so we don't block fresh users without profile
-                 pass
+            # Cash injected (initial + monthly contributions, mirroring the frontend logic in
+            # DashboardPage.tsx) minus invested cost plus realized gains, computed in the database
+            snapshot = await fetch_financial_snapshot(user_id)
+            if snapshot["has_profile"]:
+                remaining_budget = snapshot["remaining_budget"]
+            # If no profile found, keep the default so we don't block fresh users without profile
         except Exception as e:
             print(f"Error calculating budget: {e}")
 
@@ -313,36 +250,12 @@ def get_stock_recommendations(risk_profile: int, user_id: str = None) -> Dict[st
     tickers = [s["ticker"] for s in stocks]
     
     try:
-        data = yf.download(tickers, period="1d", progress=False)
+        prices = await get_multiple_prices_async(tickers)
         
         results = []
         for stock in stocks:
             ticker = stock["ticker"]
-            price = 0.0
-            try:
-                # Handle yfinance multi-index columns vs single index
-                # When multiple tickers, 'Close' is a DF with tickers as columns.
-                # When single, it might be a Series.
-                
-                # Safer individual fetch loop fallback if bulk structure varies
-                if not data.empty:
-                    if isinstance(data.columns, pd.MultiIndex):
-                         # Not handled in this snippet, falling back to per-ticker fetch for robustness
-                         pass 
-                
-                # Let's use individual fetches to be 100% robust against dataframe structure changes
-                ticker_obj = yf.Ticker(ticker)
-                hist = ticker_obj.history(period="1d")
-                if not hist.empty:
-                    price = float(hist['Close'].iloc[-1])
-            except Exception:
-                # Fallback to download if Ticker fails
-                 try:
-                    df = yf.download(ticker, period="1d", progress=False)
-                    if not df.empty:
-                         price = float(df['Close'].iloc[-1])
-                 except:
-                    price = 0.0
+            price = prices.get(ticker.upper()) or 0.0
 
             if price > 0:
                 # Filter: Only include if price <= remaining_budget (only if user_id was provided)
@@ -384,62 +297,8 @@ def get_stock_recommendations(risk_profile: int, user_id: str = None) -> Dict[st
     except Exception as e:
         print(f"Error in get_stock_recommendations: {e}")
         return {"remaining_budget": remaining_budget, "recommendations": []}
-    """
-    Get list of real stock recommendations for a given risk profile.
-    Fetches real-time prices using yfinance.
-    """
-    if risk_profile not in RISK_LEVEL_STOCKS:
-        return []
-
-    stocks = RISK_LEVEL_STOCKS[risk_profile]
-    tickers = [s["ticker"] for s in stocks]
-    
-    try:
-        # Fetch prices in batch
-        # yf.Tickers might correspond to multiple tickers
-        # download is often faster for batch but requires parsing DataFrame. 
-        # For simplicity and reliability with current yfinance versions:
-        # We can iterate or use Tickers.
-        
-        # Using Tickers for metadata + price
-        # Note: fetching info can be slow. 
-        # faster approach: download '1d' data for all
-        data = yf.download(tickers, period="1d", progress=False)['Close']
-        
-        # If single ticker result is a Series, if multiple it's a DataFrame
-        # But yfinance behavior varies.
-        # Fallback loop is safest for 5 tickers to avoid parsing complexity
-        
-        results = []
-        for stock in stocks:
-            ticker = stock["ticker"]
-            price = 0.0
-            try:
-                # Try fast download of last 1 day
-                # This returns a DataFrame
-                df = yf.download(ticker, period="1d", progress=False)
-                if not df.empty:
-                    # Generic way to get the last Close value
-                     price = float(df['Close'].iloc[-1])
-            except Exception as e:
-                print(f"Error fetching {ticker}: {e}")
-                price = 0.0 # Indicate error or fallback
-
-            results.append({
-                "ticker": ticker,
-                "name": stock["name"],
-                "sector": stock["sector"],
-                "explanation": stock["explanation"],
-                "current_price": round(price, 2)
-            })
-            
-        return results
-
-    except Exception as e:
-        print(f"Error in get_stock_recommendations: {e}")
-        return []
 
-def add_asset_to_portfolio(request: AcceptRecommendationRequest) -> Dict[str, Any]:
+async def add_asset_to_portfolio(request: AcceptRecommendationRequest) -> Dict[str, Any]:
     """
     Add a recommended asset to the user's portfolio.
     """
@@ -454,8 +313,7 @@ def add_asset_to_portfolio(request: AcceptRecommendationRequest) -> Dict[str, An
             "price": request.price
         }
         
-        response = supabase_admin.table("assets").insert(data).execute()
-        return response.data[0] if response.data else {}
+        return await insert_asset(data) or {}
         
     except Exception as e:
         print(f"Error adding asset: {e}")
@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class PriceCache:
+    """
+    Thread-safe LRU cache with per-entry expiry and a stale grace window.
+
+    Entries younger than their TTL are served as fresh. Once expired they can
+    still be served as stale for `stale_grace` while the caller refreshes them;
+    after that they count as a miss. The least recently used entry is evicted
+    when the cache is full.
+    """
+
+    def __init__(self, max_entries: int, ttl: timedelta, stale_grace: timedelta = timedelta(0)):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_grace = stale_grace
+        self._entries: "OrderedDict[str, Tuple[Any, datetime]]" = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Tuple[Optional[Any], str]:
+        """
+        Look up a key.
+
+        Returns:
+            Tuple of (value, state) where state is FRESH, STALE or MISS.
+            The value is None on a miss.
+        """
+        now = datetime.now()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, MISS
+            value, expires_at = entry
+            if now < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value, FRESH
+            if now < expires_at + self.stale_grace:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return value, STALE
+            self.misses += 1
+            return None, MISS
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Return whatever value is still held for a key, however old, without touching stats."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[0] if entry is not None else None
+
+    def expires_at(self, key: str) -> Optional[datetime]:
+        """When a key's entry stops being fresh, or None if there is none; does not touch stats."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry[1] if entry is not None else None
+
+    def set(self, key: str, value: Any, ttl: Optional[timedelta] = None) -> None:
+        """Store a value, evicting the least recently used entries if full."""
+        expires_at = datetime.now() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.stale_hits = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss/stale-serve counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale_hits
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import random
+from datetime import timedelta
+from typing import List
+
+from app.config import get_settings
+from app.services.market_service import refresh_prices_async, symbols_due_for_refresh
+from app.services.database import get_client
+from app.services.recommendation_data import RISK_LEVEL_STOCKS
+
+logger = logging.getLogger(__name__)
+
+ASSET_PAGE_SIZE = 1000  # PostgREST returns at most this many rows per request
+
+
+async def _held_symbols() -> List[str]:
+    """Read the symbol column of every row in `assets`, page by page."""
+    client = await get_client()
+    symbols = []
+    offset = 0
+    while True:
+        response = await client.table("assets").select("symbol").range(offset, offset + ASSET_PAGE_SIZE - 1).execute()
+        rows = response.data or []
+        symbols.extend(row["symbol"] for row in rows if row.get("symbol"))
+        if len(rows) < ASSET_PAGE_SIZE:
+            return symbols
+        offset += ASSET_PAGE_SIZE
+
+
+async def collect_prefetch_symbols() -> List[str]:
+    """
+    Distinct symbols worth keeping warm: everything users currently hold
+    plus every ticker we recommend.
+    """
+    symbols = {s["ticker"].upper() for stocks in RISK_LEVEL_STOCKS.values() for s in stocks}
+    try:
+        symbols.update(s.upper() for s in await _held_symbols())
+    except Exception as e:
+        logger.error(f"Could not read held symbols for prefetch: {e}")
+    return sorted(symbols)
+
+
+async def prefetch_prices(batch_size: int, within: timedelta = timedelta(0)) -> int:
+    """
+    Fetch prices for every prefetch symbol that is uncached or stops being
+    fresh within `within`, in batched provider calls, one batch at a time.
+
+    Returns:
+        Number of symbols refreshed with a price
+    """
+    symbols = symbols_due_for_refresh(await collect_prefetch_symbols(), within)
+    priced = 0
+    for i in range(0, len(symbols), batch_size):
+        prices = await refresh_prices_async(symbols[i:i + batch_size])
+        priced += sum(1 for price in prices.values() if price is not None)
+    return priced
+
+
+async def run_price_prefetcher() -> None:
+    """
+    Keep the price cache warm until cancelled. Runs every
+    PRICE_PREFETCH_INTERVAL_SECONDS plus up to PRICE_PREFETCH_JITTER_SECONDS,
+    so several workers don't all hit the provider at the same moment.
+    """
+    settings = get_settings()
+    # Refresh everything that would expire before the next run
+    horizon = timedelta(seconds=settings.PRICE_PREFETCH_INTERVAL_SECONDS + settings.PRICE_PREFETCH_JITTER_SECONDS)
+    await asyncio.sleep(random.uniform(0, settings.PRICE_PREFETCH_JITTER_SECONDS))
+    while True:
+        try:
+            priced = await prefetch_prices(settings.PRICE_PREFETCH_BATCH_SIZE, horizon)
+            logger.info(f"Prefetched prices for {priced} symbols")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Price prefetch failed: {e}")
+        await asyncio.sleep(settings.PRICE_PREFETCH_INTERVAL_SECONDS + random.uniform(0, settings.PRICE_PREFETCH_JITTER_SECONDS))
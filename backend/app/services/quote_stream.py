@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.services.market_service import get_multiple_prices_async
+
+logger = logging.getLogger(__name__)
+
+STREAM_INTERVAL_SECONDS = 5.0  # How often the shared refresh polls the price cache
+HEARTBEAT_SECONDS = 15.0  # Idle streams send a comment so proxies keep them open
+
+
+class Subscription:
+    """
+    One client's view of the stream. Updates are merged into a pending dict
+    so a slow client only ever receives the latest price per symbol.
+    """
+
+    def __init__(self, symbols: Set[str]):
+        self.symbols = symbols
+        self._pending: Dict[str, Optional[float]] = {}
+        self._ready = asyncio.Event()
+
+    def push(self, prices: Dict[str, Optional[float]]) -> None:
+        self._pending.update(prices)
+        self._ready.set()
+
+    async def next_update(self, timeout: float) -> Dict[str, Optional[float]]:
+        """
+        Wait for changed prices.
+
+        Returns:
+            Dictionary of changed prices, empty if nothing changed within `timeout`
+        """
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return {}
+        self._ready.clear()
+        prices, self._pending = self._pending, {}
+        return prices
+
+
+class QuoteStream:
+    """
+    In-process fan-out of price changes. A single refresh loop fetches the
+    union of all subscribed symbols and pushes each subscriber only the
+    prices that changed for its own symbols.
+    """
+
+    def __init__(self, interval: float = STREAM_INTERVAL_SECONDS):
+        self.interval = interval
+        self._subscribers: List[Subscription] = []
+        self._last: Dict[str, Optional[float]] = {}  # symbol -> last published price
+        self._task: Optional[asyncio.Task] = None
+
+    def _symbols(self) -> Set[str]:
+        return set().union(*(sub.symbols for sub in self._subscribers))
+
+    def subscribe(self, symbols: Iterable[str]) -> Subscription:
+        """Register a subscriber; the last published prices are sent right away."""
+        sub = Subscription({s.upper() for s in symbols})
+        self._subscribers.append(sub)
+        snapshot = {s: self._last[s] for s in sub.symbols if s in self._last}
+        if snapshot:
+            sub.push(snapshot)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        """Remove a subscriber and forget prices nobody is watching any more."""
+        if sub in self._subscribers:
+            self._subscribers.remove(sub)
+        watched = self._symbols()
+        for symbol in list(self._last):
+            if symbol not in watched:
+                del self._last[symbol]
+
+    async def refresh(self) -> None:
+        """Fetch every subscribed symbol once and push the changes."""
+        symbols = sorted(self._symbols())
+        if not symbols:
+            return
+        prices = await get_multiple_prices_async(symbols)
+        changed = {s: p for s, p in prices.items() if s not in self._last or self._last[s] != p}
+        if not changed:
+            return
+        self._last.update(changed)
+        for sub in self._subscribers:
+            update = {s: changed[s] for s in sub.symbols if s in changed}
+            if update:
+                sub.push(update)
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Quote stream refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+        self._task = None
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+_stream: Optional[QuoteStream] = None
+
+
+def get_quote_stream() -> QuoteStream:
+    """Get the process-wide quote stream."""
+    global _stream
+    if _stream is None:
+        _stream = QuoteStream()
+    return _stream
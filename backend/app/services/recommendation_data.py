@@ -442,3 +442,11 @@ RISK_LEVEL_STOCKS: Dict[int, List[StockData]] = {
         }
     ]
 }
+
+# Sectors for common holdings that are not in the recommendation lists
+SECTOR_MAP: Dict[str, str] = {
+    "AAPL": "Technology", "GOOGL": "Technology", "MSFT": "Technology",
+    "AMZN": "Consumer Cyclical", "TSLA": "Automotive", "META": "Technology",
+    "NVDA": "Technology", "JPM": "Financial", "V": "Financial",
+    "JNJ": "Healthcare", "SPY": "ETF", "QQQ": "ETF",
+}
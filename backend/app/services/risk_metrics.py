@@ -0,0 +1,167 @@
+"""
+Historical risk metrics from stored daily closes.
+
+Closes for every holding are aligned into one (days x symbols) matrix, the
+buy-and-hold portfolio value series is a single matrix-vector product, and
+each metric is a vectorized reduction over the resulting return series.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from statistics import NormalDist
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.history_store import get_closes
+
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+DEFAULT_RISK_FREE_RATE = 0.04  # Annual, roughly short-term Treasury yields
+DEFAULT_BENCHMARK = "SPY"
+HISTORY_WORKERS = 8
+
+
+def daily_returns(prices: np.ndarray) -> np.ndarray:
+    """Simple returns along the first axis of a price series or (days x symbols) matrix."""
+    prices = np.asarray(prices, dtype=float)
+    return prices[1:] / prices[:-1] - 1
+
+
+def annualized_volatility(returns: np.ndarray) -> np.ndarray:
+    """Sample standard deviation of daily returns, scaled to a year."""
+    return np.std(returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS)
+
+
+def sharpe_ratio(returns: np.ndarray, risk_free_rate: float = DEFAULT_RISK_FREE_RATE) -> np.ndarray:
+    """Annualized excess return over annualized volatility."""
+    volatility = annualized_volatility(returns)
+    excess = np.mean(returns, axis=0) * TRADING_DAYS - risk_free_rate
+    return np.divide(excess, volatility, out=np.zeros_like(np.asarray(volatility, dtype=float)), where=volatility > 0)
+
+
+def beta(returns: np.ndarray, benchmark_returns: np.ndarray) -> np.ndarray:
+    """Beta of a return series, or of each column of a matrix, against the benchmark."""
+    returns = np.asarray(returns, dtype=float)
+    benchmark_returns = np.asarray(benchmark_returns, dtype=float)
+    centered_benchmark = benchmark_returns - benchmark_returns.mean()
+    centered = returns - returns.mean(axis=0)
+    if centered.ndim == 2:
+        centered_benchmark = centered_benchmark[:, None]
+    variance = np.dot(centered_benchmark.ravel(), centered_benchmark.ravel())
+    if variance == 0:
+        return np.zeros(centered.shape[1:]) if centered.ndim == 2 else np.float64(0)
+    return (centered * centered_benchmark).sum(axis=0) / variance
+
+
+def max_drawdown(values: np.ndarray) -> float:
+    """Largest peak-to-trough fall of a value series, as a positive fraction."""
+    values = np.asarray(values, dtype=float)
+    peaks = np.maximum.accumulate(values)
+    return float(np.max(1 - values / peaks)) if values.size else 0.0
+
+
+def historical_var(returns: np.ndarray, confidence: float = 0.95) -> float:
+    """One-day loss not exceeded with `confidence`, from the empirical return distribution."""
+    return float(-np.percentile(returns, (1 - confidence) * 100))
+
+
+def parametric_var(returns: np.ndarray, confidence: float = 0.95) -> float:
+    """One-day loss not exceeded with `confidence`, assuming normally distributed returns."""
+    z = NormalDist().inv_cdf(1 - confidence)
+    return float(-(np.mean(returns) + z * np.std(returns, ddof=1)))
+
+
+def align_closes(series: Dict[str, Dict[str, np.ndarray]], calendar: np.ndarray) -> np.ndarray:
+    """
+    Align close series onto a calendar of dates, carrying the last close
+    forward over days a symbol did not trade.
+
+    Args:
+        series: Symbol -> {"date": datetime64[D] array, "close": array}
+        calendar: Sorted datetime64[D] dates
+
+    Returns:
+        (len(calendar), len(series)) matrix, NaN before a symbol's first close
+    """
+    matrix = np.full((len(calendar), len(series)), np.nan)
+    for column, bars in enumerate(series.values()):
+        index = np.searchsorted(bars["date"], calendar, side="right") - 1
+        known = index >= 0
+        matrix[known, column] = np.asarray(bars["close"])[index[known]]
+    return matrix
+
+
+def load_closes(symbols: List[str], start: date, end: date) -> Dict[str, Dict[str, np.ndarray]]:
+    """Stored closes for symbols, refreshing their history concurrently. Symbols without data are left out."""
+    with ThreadPoolExecutor(max_workers=HISTORY_WORKERS) as pool:
+        results = list(pool.map(lambda s: get_closes(s, start, end), symbols))
+    return {symbol: bars for symbol, bars in zip(symbols, results) if len(bars["close"])}
+
+
+def portfolio_risk(
+    closes: Dict[str, Dict[str, np.ndarray]],
+    quantities: Dict[str, float],
+    benchmark: Optional[Dict[str, np.ndarray]] = None,
+    risk_free_rate: float = DEFAULT_RISK_FREE_RATE,
+    confidence: float = 0.95,
+) -> Optional[Dict]:
+    """
+    Risk figures for a buy-and-hold portfolio over the stored history.
+
+    Args:
+        closes: Symbol -> {"date", "close"} arrays for each holding
+        quantities: Units held per symbol
+        benchmark: {"date", "close"} arrays of the benchmark, used for beta
+        risk_free_rate: Annual rate used for the Sharpe ratio
+        confidence: VaR confidence level
+
+    Returns:
+        Dictionary of metrics (fractions, not percent), or None with fewer
+        than three days on which every holding has a close
+    """
+    symbols = [s for s in closes if quantities.get(s)]
+    if not symbols:
+        return None
+    series = {s: closes[s] for s in symbols}
+    if benchmark is not None and len(benchmark["close"]):
+        calendar = np.asarray(benchmark["date"])
+        series["__benchmark__"] = benchmark
+    else:
+        calendar = np.unique(np.concatenate([np.asarray(bars["date"]) for bars in series.values()]))
+
+    matrix = align_closes(series, calendar)
+    # Start once every holding (and the benchmark) has a price
+    complete = np.flatnonzero(np.isfinite(matrix).all(axis=1))
+    if complete.size < 3:
+        return None
+    matrix = matrix[complete[0]:]
+    dates = calendar[complete[0]:]
+
+    prices = matrix[:, :len(symbols)]
+    units = np.array([quantities[s] for s in symbols], dtype=float)
+    values = prices @ units
+    portfolio_returns = daily_returns(values)
+    asset_returns = daily_returns(prices)
+    weights = prices[-1] * units / values[-1] if values[-1] > 0 else np.zeros(len(symbols))
+
+    benchmark_returns = daily_returns(matrix[:, -1]) if "__benchmark__" in series else None
+    return {
+        "start": str(dates[0]),
+        "end": str(dates[-1]),
+        "observations": int(portfolio_returns.size),
+        "volatility": float(annualized_volatility(portfolio_returns)),
+        "sharpe_ratio": float(sharpe_ratio(portfolio_returns, risk_free_rate)),
+        "beta": float(beta(portfolio_returns, benchmark_returns)) if benchmark_returns is not None else None,
+        "max_drawdown": max_drawdown(values),
+        "var_historical": historical_var(portfolio_returns, confidence),
+        "var_parametric": parametric_var(portfolio_returns, confidence),
+        "holdings": [
+            {"symbol": s, "weight": float(w), "volatility": float(v), "beta": float(b) if benchmark_returns is not None else None}
+            for s, w, v, b in zip(
+                symbols, weights, annualized_volatility(asset_returns),
+                beta(asset_returns, benchmark_returns) if benchmark_returns is not None else np.zeros(len(symbols)),
+            )
+        ],
+    }
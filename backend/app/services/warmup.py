@@ -0,0 +1,35 @@
+"""
+Post-startup warmup.
+
+Heavy libraries are imported where they are used rather than at module
+load, so the app starts serving quickly. Once it is up, this imports them
+in a background thread so the first request that needs one does not pay
+for the import.
+"""
+import asyncio
+import importlib
+import logging
+import time
+from typing import Sequence
+
+logger = logging.getLogger(__name__)
+
+WARMUP_MODULES = (
+    "yfinance",  # market_providers.YFinanceProvider, pulls in pandas
+)
+
+
+def _import(name: str) -> float:
+    start = time.perf_counter()
+    importlib.import_module(name)
+    return time.perf_counter() - start
+
+
+async def warm_up(modules: Sequence[str] = WARMUP_MODULES) -> None:
+    """Import `modules` off the event loop, logging how long each took."""
+    for name in modules:
+        try:
+            elapsed = await asyncio.to_thread(_import, name)
+            logger.info(f"Warmed up {name} in {elapsed * 1000:.0f} ms")
+        except Exception as e:
+            logger.warning(f"Warmup import of {name} failed: {e}")
@@ -0,0 +1,79 @@
+"""
+Import-time profile of the API.
+
+Runs `python -X importtime -c "import app.main"` in a fresh interpreter and
+reports the total and the slowest top-level packages. It exits non-zero
+when startup imports exceed the budget (STARTUP_BUDGET_MS, or --budget-ms)
+or load a module that should be deferred, so it can gate CI;
+tests/test_startup.py enforces the same budget.
+
+Usage:
+    python profile_imports.py [--module app.main] [--top 15] [--budget-ms 1500]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# Libraries that should not be imported at startup (see app/services/warmup.py);
+# supabase is imported when the first database client is created
+HEAVY_MODULES = ("matplotlib", "yfinance", "pandas", "supabase")
+STARTUP_BUDGET_MS = 1500  # Cold `import app.main`; about 500 ms at the time of writing
+
+
+def profile(module: str):
+    """Return (total seconds, {top-level package: self seconds}, modules loaded)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{result.stderr}")
+
+    total = 0.0
+    by_package = defaultdict(float)
+    loaded = set()
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        loaded.add(name)
+        by_package[name.split(".")[0]] += int(self_us) / 1e6
+        if name == module:
+            total = int(cumulative_us) / 1e6
+    return total, by_package, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+
+    total, by_package, loaded = profile(args.module)
+    print(f"import {args.module}: {total * 1000:.0f} ms, {len(loaded)} modules\n")
+    print(f"{'package':<30}{'ms':>8}{'share':>8}")
+    for package, seconds in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<30}{seconds * 1000:>8.0f}{seconds / total * 100 if total else 0:>7.0f}%")
+
+    failed = False
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    if heavy:
+        print(f"\nHeavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+
+    if total * 1000 > args.budget_ms:
+        print(f"\nOver budget: {total * 1000:.0f} ms > {args.budget_ms:.0f} ms")
+        failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
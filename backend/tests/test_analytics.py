@@ -0,0 +1,44 @@
+from unittest.mock import AsyncMock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+
+@patch("app.routers.analytics.get_multiple_prices_async", new_callable=AsyncMock)
+@patch("app.routers.analytics.fetch_assets", new_callable=AsyncMock)
+def test_analysis_prices_each_distinct_symbol_once(mock_assets, mock_prices):
+    mock_assets.return_value = [
+        {"symbol": "msft", "name": "Microsoft", "amount": 2, "price": 100},
+        {"symbol": "MSFT", "name": "Microsoft", "amount": 1, "price": 120},
+        {"symbol": "QQQ", "name": "Invesco QQQ", "amount": 1, "price": 400},
+    ]
+    mock_prices.return_value = {"MSFT": 150.0, "QQQ": None}
+
+    response = client.get("/api/v1/analytics/portfolio", params={"user_id": "u1"})
+
+    assert response.status_code == 200
+    mock_prices.assert_awaited_once_with(["MSFT", "QQQ"])
+    body = response.json()
+    assert body["total_value"] == 3 * 150.0 + 400  # QQQ falls back to its purchase price
+    assert {s["sector"] for s in body["sectors"]} == {"Technology", "ETF"}
+
+
+@patch("app.routers.analytics.get_sectors")
+@patch("app.routers.analytics.get_multiple_prices_async", new_callable=AsyncMock)
+@patch("app.routers.analytics.fetch_assets", new_callable=AsyncMock)
+def test_pending_sectors_are_not_scored_as_sectors(mock_assets, mock_prices, mock_sectors):
+    mock_assets.return_value = [
+        {"symbol": "NEW1", "name": "New 1", "amount": 1, "price": 100},
+        {"symbol": "NEW2", "name": "New 2", "amount": 1, "price": 100},
+        {"symbol": "MSFT", "name": "Microsoft", "amount": 1, "price": 100},
+    ]
+    mock_prices.return_value = {}
+    mock_sectors.return_value = {"NEW1": "Pending", "NEW2": "Pending", "MSFT": "Technology"}
+
+    body = client.get("/api/v1/analytics/portfolio", params={"user_id": "u1"}).json()
+
+    assert {s["sector"] for s in body["sectors"]} == {"Technology", "Other"}
+    assert body["risk_metrics"]["sector_count"] == 2
+    assert body["pending_sector_symbols"] == ["NEW1", "NEW2"]
+    assert {a["symbol"]: a["sector"] for a in body["assets"]}["NEW1"] == "Pending"
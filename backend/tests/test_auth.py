@@ -9,36 +9,38 @@ client = TestClient(app)
 # Mock Supabase
 @pytest.fixture
 def mock_supabase():
-    with patch("app.services.auth_service.supabase_admin") as mock_admin, \
-         patch("app.services.auth_service.supabase_anon") as mock_anon:
-        yield mock_admin, mock_anon
+    db = MagicMock()
+    db.table.return_value.select.return_value.eq.return_value.eq.return_value.gte.return_value.execute = AsyncMock()
+    db.table.return_value.insert.return_value.execute = AsyncMock()
+    with patch("app.services.auth_service._admin_client") as mock_admin, \
+         patch("app.services.auth_service._anon_client") as mock_anon, \
+         patch("app.services.auth_service.get_client", AsyncMock(return_value=db)):
+        yield mock_admin.return_value, mock_anon.return_value, db
 
 def test_health_check():
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
 
-@patch("app.services.auth_service.supabase_admin")
-@patch("app.services.auth_service.supabase_anon")
-def test_forgot_password_success(mock_anon, mock_admin):
+def test_forgot_password_success(mock_supabase):
+    mock_admin, mock_anon, db = mock_supabase
     # Mock rate limit check returns 0 records
-    mock_admin.table.return_value.select.return_value.eq.return_value.eq.return_value.gte.return_value.execute.return_value.count = 0
-    mock_admin.table.return_value.select.return_value.eq.return_value.eq.return_value.gte.return_value.execute.return_value.data = []
+    db.table.return_value.select.return_value.eq.return_value.eq.return_value.gte.return_value.execute.return_value.count = 0
+    db.table.return_value.select.return_value.eq.return_value.eq.return_value.gte.return_value.execute.return_value.data = []
 
     response = client.post("/api/v1/auth/forgot-password", json={"email": "test@example.com"})
     
     assert response.status_code == 200
     assert "If the email exists" in response.json()["message"]
     mock_anon.auth.reset_password_for_email.assert_called_once()
-    mock_admin.table.return_value.insert.assert_called_once()
+    db.table.return_value.insert.assert_called_once()
 
-@patch("app.services.auth_service.supabase_admin")
-@patch("app.services.auth_service.supabase_anon")
-def test_forgot_password_rate_limit(mock_anon, mock_admin):
+def test_forgot_password_rate_limit(mock_supabase):
+    mock_admin, mock_anon, db = mock_supabase
     # Mock rate limit check returns 3 records
-    mock_admin.table.return_value.select.return_value.eq.return_value.eq.return_value.gte.return_value.execute.return_value.count = 3
+    db.table.return_value.select.return_value.eq.return_value.eq.return_value.gte.return_value.execute.return_value.count = 3
     # Also support data property if code checks that
-    mock_admin.table.return_value.select.return_value.eq.return_value.eq.return_value.gte.return_value.execute.return_value.data = [1, 2, 3]
+    db.table.return_value.select.return_value.eq.return_value.eq.return_value.gte.return_value.execute.return_value.data = [1, 2, 3]
 
     response = client.post("/api/v1/auth/forgot-password", json={"email": "spammer@example.com"})
     
@@ -54,9 +56,8 @@ def test_reset_password_weak_password():
     assert response.status_code == 400
     assert "Password must contain at least one" in response.json()["detail"]
 
-@patch("app.services.auth_service.supabase_admin")
-@patch("app.services.auth_service.supabase_anon")
-def test_reset_password_success(mock_anon, mock_admin):
+def test_reset_password_success(mock_supabase):
+    mock_admin, mock_anon, _ = mock_supabase
     # Mock get_user success
     mock_user = MagicMock()
     mock_user.user.id = "user_123"
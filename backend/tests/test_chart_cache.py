@@ -0,0 +1,106 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routers import investment
+from app.services import chart_cache
+from app.services.chart_cache import ChartCache, chart_key
+
+client = TestClient(app)
+
+PARAMS = {"monthly_amount": 1000, "years": 10, "annual_return": 7, "initial_investment": 0}
+
+
+@pytest.fixture
+def cache():
+    cache = ChartCache(max_entries=2)
+    with patch.object(chart_cache, "_cache", cache):
+        yield cache
+
+
+@pytest.fixture
+def render():
+    with patch.object(investment, "render_chart", AsyncMock(return_value=b"\x89PNG fake")) as render:
+        yield render
+
+
+def test_key_ignores_number_formatting():
+    assert chart_key("c", {"a": 1000, "b": 7}) == chart_key("c", {"b": 7.0, "a": 1000.0})
+    assert chart_key("c", {"a": 1000}) != chart_key("c", {"a": 1001})
+    assert chart_key("c", {"a": 1000}) != chart_key("d", {"a": 1000})
+
+
+def test_lru_evicts_oldest_and_disk_tier_survives(tmp_path):
+    cache = ChartCache(max_entries=2, directory=str(tmp_path))
+    cache.set("a" * 64, b"A")
+    cache.set("b" * 64, b"B")
+    cache.get("a" * 64)
+    cache.set("c" * 64, b"C")
+    assert cache.stats()["size"] == 2
+
+    fresh = ChartCache(max_entries=2, directory=str(tmp_path))
+    assert fresh.get("b" * 64) == b"B"
+    assert fresh.stats()["disk_hits"] == 1
+    assert fresh.get("d" * 64) is None
+
+
+def test_png_endpoint_renders_once_and_honours_etag(cache, render):
+    first = client.get("/api/v1/investment/chart.png", params=PARAMS)
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "image/png"
+    assert first.content == b"\x89PNG fake"
+    etag = first.headers["etag"]
+
+    again = client.get("/api/v1/investment/chart.png", params={**PARAMS, "monthly_amount": 1000.0})
+    assert again.headers["etag"] == etag
+    assert render.call_count == 1
+
+    not_modified = client.get("/api/v1/investment/chart.png", params=PARAMS, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert render.call_count == 1
+
+
+def test_png_endpoint_validates_inputs(cache, render):
+    response = client.get("/api/v1/investment/chart.png", params={**PARAMS, "years": 50})
+    assert response.status_code == 422
+    render.assert_not_called()
+
+
+def test_post_chart_shares_the_cache(cache, render):
+    client.get("/api/v1/investment/chart.png", params=PARAMS)
+    response = client.post("/api/v1/investment/chart", json=PARAMS)
+    assert response.status_code == 200
+    assert response.json()["chart_image"].startswith("data:image/png;base64,")
+    assert render.call_count == 1
+
+
+def test_concurrent_misses_share_one_render():
+    cache = ChartCache(max_entries=2)
+    calls = []
+
+    async def render():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"PNG"
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_render_async("k", render) for _ in range(5)))
+
+    assert asyncio.run(main()) == [b"PNG"] * 5
+    assert len(calls) == 1
+    assert cache.get("k") == b"PNG"
+
+
+def test_data_and_svg_modes_skip_rendering(cache, render):
+    data = client.post("/api/v1/investment/chart", params={"format": "data"}, json=PARAMS).json()
+    assert data["years"] == list(range(11))
+    assert data["contributed"][-1] == data["total_contributed"] == 120000
+    assert data["value"][0] == 0 and data["value"][-1] > data["contributed"][-1]
+
+    svg = client.post("/api/v1/investment/chart", params={"format": "svg"}, json=PARAMS).json()
+    assert svg["chart_svg"].startswith("<svg") and svg["chart_svg"].endswith("</svg>")
+    assert len(svg["chart_svg"]) < 10000
+    assert svg["future_value"] == data["future_value"]
+    render.assert_not_called()
@@ -0,0 +1,38 @@
+import asyncio
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routers import investment
+from app.services import chart_cache, chart_renderer
+from app.services.chart_cache import ChartCache
+from app.services.chart_renderer import RenderQueueFull, render_chart
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def pool():
+    yield chart_renderer.start_render_pool()
+    chart_renderer.shutdown_render_pool()
+
+
+def test_renders_png_in_worker_process(pool):
+    png = asyncio.run(render_chart(monthly_amount=1000, years=5, annual_return=7))
+    assert png.startswith(b"\x89PNG")
+
+
+def test_full_queue_is_rejected():
+    with patch.object(chart_renderer, "_pending", 10 ** 6):
+        with pytest.raises(RenderQueueFull):
+            asyncio.run(render_chart(monthly_amount=1000, years=5, annual_return=7))
+
+
+def test_busy_renderer_answers_503():
+    async def busy(**params):
+        raise RenderQueueFull()
+
+    with patch.object(chart_cache, "_cache", ChartCache(max_entries=2)), patch.object(investment, "render_chart", busy):
+        response = client.get("/api/v1/investment/chart.png", params={"monthly_amount": 1000, "years": 10, "annual_return": 7})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(investment.CHART_RETRY_AFTER_SECONDS)
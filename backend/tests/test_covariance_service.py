@@ -0,0 +1,105 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+import numpy as np
+import pytest
+from app.services import covariance_service
+from app.services.covariance_service import RollingCovariance
+
+
+def test_running_sums_match_full_recomputation():
+    rng = np.random.default_rng(3)
+    returns = rng.normal(0, 0.01, (700, 4)) @ rng.normal(0, 1, (4, 4))
+    model = RollingCovariance(["A", "B", "C", "D"], window=250)
+    for row in returns:
+        model.add_returns(row)
+
+    window = returns[-250:]
+    np.testing.assert_allclose(model.covariance(), np.cov(window, rowvar=False), atol=1e-12)
+    np.testing.assert_allclose(model.correlation(["D", "B"]), np.corrcoef(window[:, [3, 1]], rowvar=False), atol=1e-10)
+
+
+def test_closes_become_returns_with_gaps_left_out():
+    model = RollingCovariance(["A", "B"], window=10)
+    model.add_closes(date(2024, 1, 1), [100, np.nan])
+    model.add_closes(date(2024, 1, 2), [110, 50])
+    model.add_closes(date(2024, 1, 3), [99, 55])
+    model.add_closes(date(2024, 1, 3), [1, 1])  # already seen
+
+    assert model.count == 2
+    np.testing.assert_allclose(model._returns[:2], [[0.1, 0.0], [-0.1, 0.1]])
+    np.testing.assert_array_equal(model.observations(), [2, 1])
+
+
+def test_pairs_use_only_overlapping_days():
+    rng = np.random.default_rng(5)
+    returns = rng.normal(0, 0.01, (120, 3)) @ rng.normal(0, 1, (3, 3))
+    known = np.ones_like(returns)
+    known[:80, 2] = 0  # C listed late
+    known[rng.random(120) < 0.1, 1] = 0  # B misses some days
+    model = RollingCovariance(["A", "B", "C"], window=100)
+    for row, mask in zip(returns, known):
+        model.add_returns(row, mask)
+
+    window, mask = returns[-100:], known[-100:].astype(bool)
+    for i, j in [(0, 1), (0, 2), (1, 2)]:
+        both = mask[:, i] & mask[:, j]
+        expected = np.corrcoef(window[both][:, [i, j]], rowvar=False)[0, 1]
+        assert model.correlation()[i, j] == pytest.approx(expected, abs=1e-10)
+    np.testing.assert_array_equal(model.observations(), mask.sum(axis=0))
+
+
+def test_added_symbol_matches_a_full_build():
+    rng = np.random.default_rng(6)
+    days = np.arange(np.datetime64("2024-01-01"), np.datetime64("2024-03-01"))
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, (len(days), 3)), axis=0)
+    closes[:20, 2] = np.nan
+
+    full = RollingCovariance(["A", "B", "C"], window=30)
+    grown = RollingCovariance(["A", "B"], window=30)
+    for day, row in zip(days.astype(object), closes):
+        full.add_closes(day, row)
+        grown.add_closes(day, row[:2])
+    listed = np.isfinite(closes[:, 2])
+    grown.add_symbol("C", days[listed], closes[listed, 2])
+
+    np.testing.assert_allclose(grown.correlation(), full.correlation(), atol=1e-10)
+    np.testing.assert_array_equal(grown.observations(), full.observations())
+
+
+@pytest.fixture
+def fresh_universe():
+    with patch.object(covariance_service, "_models", covariance_service.OrderedDict()), \
+            patch.object(covariance_service, "_fed_on", {}), patch.object(covariance_service, "_missing", set()):
+        yield
+
+
+def test_universe_grows_and_serves_sub_matrices(fresh_universe):
+    rng = np.random.default_rng(4)
+    days = np.arange(np.datetime64(date.today() - timedelta(days=99)), np.datetime64(date.today() + timedelta(days=1)))
+    history = {s: {"date": days, "close": 100 * np.cumprod(1 + rng.normal(0, 0.01, len(days)))} for s in "ABC"}
+
+    def load(symbols, start, end):
+        return {s: history[s] for s in symbols if s in history}
+
+    with patch.object(covariance_service, "load_closes", side_effect=load) as mock_load:
+        covered, matrix, info = covariance_service.get_correlation(["a", "b"], window=50)
+        assert covered == ["A", "B"] and info["observations"] == 50
+        assert info["symbol_observations"] == [50, 50]
+        covariance_service.get_correlation(["B", "A"], window=50)
+        assert mock_load.call_count == 1  # same day, subset of the universe: no reload
+
+        covered, matrix, _ = covariance_service.get_correlation(["C", "A", "ZZZ"], window=50)
+        assert covered == ["C", "A"]
+        closes = np.column_stack([history["C"]["close"], history["A"]["close"]])
+        np.testing.assert_allclose(matrix, np.corrcoef(np.diff(closes, axis=0)[-50:] / closes[:-1][-50:], rowvar=False))
+
+        # Symbols without history are not added, so asking again does not rebuild
+        assert "ZZZ" not in covariance_service.get_covariance_model(["A"], window=50).index
+        covariance_service.get_correlation(["ZZZ", "A"], window=50)
+        assert mock_load.call_count == 2
+
+        # Each window keeps its own model, so alternating windows do not reload
+        covariance_service.get_correlation(["A", "B"], window=30)
+        covariance_service.get_correlation(["A", "B"], window=50)
+        covariance_service.get_correlation(["A", "B"], window=30)
+        assert mock_load.call_count == 3
@@ -0,0 +1,115 @@
+import asyncio
+from unittest.mock import patch
+import httpx
+from app.services import database
+from app.services.dataloader import request_scope
+
+ROWS = {
+    "assets": [
+        {"id": 1, "user_id": "u1", "symbol": "MSFT", "amount": 2, "price": 100},
+        {"id": 3, "user_id": "u2", "symbol": "KO", "amount": 1, "price": 60},
+    ],
+    "transactions": [{"id": 7, "user_id": "u1", "profit_loss": 12.5}],
+    "user_profiles": [{"user_id": "u1", "monthly_budget": 500}],
+}
+
+
+def _mock_http():
+    requests = []
+
+    def handler(request: httpx.Request):
+        requests.append(request)
+        table = request.url.path.rsplit("/", 1)[-1]
+        if table == "get_user_financial_snapshot":
+            return httpx.Response(200, json=[{
+                "has_profile": True, "initial_investment": 1000, "monthly_budget": "250.50", "created_at": None,
+                "months_passed": 3, "cash_injected": 1751.5, "invested_cost": 200, "realized_gains": -12.5,
+                "remaining_budget": 1539,
+            }])
+        if request.method == "POST":
+            return httpx.Response(201, json=[{"id": 2, "user_id": "u1"}])
+        return httpx.Response(200, json=ROWS[table])
+
+    def http_client():
+        pools.append(1)
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    pools = []
+    return requests, pools, http_client
+
+
+def test_helpers_share_one_pooled_client():
+    requests, pools, http_client = _mock_http()
+
+    async def main():
+        results = await asyncio.gather(
+            database.fetch_assets("u1", "symbol, amount"),
+            database.fetch_transactions("u1", newest_first=True),
+            database.fetch_user_profile("u1"),
+        )
+        clients = {id(await database.get_client()) for _ in range(3)}
+        await database.close_client()
+        return results, clients
+
+    with patch.object(database, "_http_client", http_client):
+        (assets, transactions, profile), clients = asyncio.run(main())
+
+    assert assets[0]["symbol"] == "MSFT"  # served outside a request, unfiltered by the mock
+    assert transactions[0]["profit_loss"] == 12.5
+    assert profile["monthly_budget"] == 500
+    assert len(clients) == 1
+    assert len(pools) == 1  # concurrent first queries opened a single pool
+    by_table = {r.url.path.rsplit("/", 1)[-1]: r for r in requests}
+    assert by_table["assets"].url.params["select"] == "symbol,amount"
+    assert by_table["assets"].url.params["user_id"] == "eq.u1"
+    assert by_table["transactions"].url.params["order"] == "sale_date.desc"
+
+
+def test_request_scope_reads_each_table_once():
+    requests, _, http_client = _mock_http()
+
+    async def main():
+        with request_scope():
+            u1_assets, u2_assets, profile, _ = await asyncio.gather(
+                database.fetch_assets("u1"),
+                database.fetch_assets("u2"),
+                database.fetch_user_profile("u1", "monthly_budget"),
+                database.fetch_transactions("u1"),
+            )
+            again = await asyncio.gather(
+                database.fetch_assets("u1", "amount, price"),
+                database.fetch_transactions("u1", "profit_loss"),
+                database.fetch_user_profile("u1"),
+            )
+            await database.insert_asset({"user_id": "u1", "symbol": "AAPL"})
+            await database.fetch_assets("u1")  # re-read after the write
+            await database.close_client()
+        return u1_assets, u2_assets, profile, again
+
+    with patch.object(database, "_http_client", http_client):
+        u1_assets, u2_assets, profile, again = asyncio.run(main())
+
+    assert [a["symbol"] for a in u1_assets] == ["MSFT"]
+    assert [a["symbol"] for a in u2_assets] == ["KO"]
+    assert profile["monthly_budget"] == 500
+    assert again[0] is u1_assets
+    reads = [r for r in requests if r.method == "GET"]
+    assert [r.url.path.rsplit("/", 1)[-1] for r in reads] == ["assets", "user_profiles", "transactions", "assets"]
+    assert reads[0].url.params["user_id"] == "in.(u1,u2)"
+
+
+def test_financial_snapshot_is_one_rpc_call():
+    requests, _, http_client = _mock_http()
+
+    async def main():
+        snapshot = await database.fetch_financial_snapshot("u1")
+        await database.close_client()
+        return snapshot
+
+    with patch.object(database, "_http_client", http_client):
+        snapshot = asyncio.run(main())
+
+    assert len(requests) == 1
+    assert requests[0].url.path == "/rest/v1/rpc/get_user_financial_snapshot"
+    assert snapshot["monthly_budget"] == 250.5
+    assert snapshot["remaining_budget"] == 1539.0 and snapshot["months_passed"] == 3
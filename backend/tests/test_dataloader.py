@@ -0,0 +1,53 @@
+import asyncio
+import pytest
+from app.services.dataloader import DataLoader, clear_request_loader, request_loader, request_scope
+
+
+def test_loads_in_one_pass_are_batched_and_deduplicated():
+    calls = []
+
+    async def batch(keys):
+        calls.append(list(keys))
+        return {k: k * 2 for k in keys if k != 3}
+
+    async def main():
+        loader = DataLoader(batch, default=0)
+        first = await asyncio.gather(*(loader.load(k) for k in (1, 2, 1, 3)))
+        second = await loader.load(2)
+        return first, second
+
+    assert asyncio.run(main()) == ([2, 4, 2, 0], 4)
+    assert calls == [[1, 2, 3]]
+
+
+def test_failed_batch_is_retried_on_next_load():
+    attempts = []
+
+    async def batch(keys):
+        attempts.append(keys)
+        if len(attempts) == 1:
+            raise RuntimeError("db down")
+        return {k: "ok" for k in keys}
+
+    async def main():
+        loader = DataLoader(batch)
+        with pytest.raises(RuntimeError):
+            await loader.load("a")
+        return await loader.load("a")
+
+    assert asyncio.run(main()) == "ok"
+    assert len(attempts) == 2
+
+
+def test_loaders_are_scoped_to_a_request():
+    async def batch(keys):
+        return {}
+
+    assert request_loader("assets", batch) is None
+    with request_scope():
+        loader = request_loader("assets", batch)
+        assert request_loader("assets", batch) is loader
+        clear_request_loader("assets", "u1")
+        with request_scope():
+            assert request_loader("assets", batch) is not loader
+    assert request_loader("assets", batch) is None
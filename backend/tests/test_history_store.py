@@ -0,0 +1,105 @@
+import threading
+from datetime import date, timedelta
+import numpy as np
+from app.services.history_store import REFRESH_OVERLAP, HistoryStore
+from app.services.market_providers import Bar, MarketDataProvider
+
+
+def _bar(day, close):
+    return Bar(day, close - 1, close + 1, close - 2, close, 1000.0)
+
+
+class RecordingProvider(MarketDataProvider):
+    name = "recording"
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.requests = []
+
+    def get_history(self, symbol, start=None, end=None):
+        self.requests.append((symbol, start, end))
+        return [b for b in self.bars if (start is None or b.date >= start) and (end is None or b.date <= end)]
+
+
+def test_append_and_read_range(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    days = [date(2024, 1, 1) + timedelta(days=i) for i in range(10)]
+    assert store.append("aapl", [_bar(d, 100.0 + i) for i, d in enumerate(days)]) == 10
+
+    bars = store.read("AAPL", start=date(2024, 1, 3), end=date(2024, 1, 5))
+    assert list(bars["close"]) == [102.0, 103.0, 104.0]
+    assert bars["date"][0] == np.datetime64("2024-01-03")
+    assert isinstance(store.read("AAPL")["close"], np.memmap)
+    assert store.last_date("AAPL") == date(2024, 1, 10)
+
+
+def test_append_skips_bars_already_stored(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append("MSFT", [_bar(date(2024, 1, 1), 1.0), _bar(date(2024, 1, 2), 2.0)])
+
+    written = store.append("MSFT", [_bar(date(2024, 1, 2), 9.0), _bar(date(2024, 1, 3), 3.0), _bar(date(2024, 1, 3), 3.0)])
+
+    assert written == 1
+    assert list(store.read("MSFT")["close"]) == [1.0, 2.0, 3.0]
+
+
+def test_append_trims_partial_write(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append("SPY", [_bar(date(2024, 1, 1), 1.0)])
+    # Simulate a crash after a price column was written but before the date column
+    with open(tmp_path / "SPY" / "close.f8", "ab") as f:
+        np.array([99.0]).tofile(f)
+
+    store.append("SPY", [_bar(date(2024, 1, 2), 2.0)])
+
+    assert list(store.read("SPY")["close"]) == [1.0, 2.0]
+
+
+def test_update_fetches_only_missing_tail(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    yesterday = date.today() - timedelta(days=1)
+    provider = RecordingProvider([_bar(yesterday - timedelta(days=i), 50.0 + i) for i in range(5, 0, -1)] + [_bar(yesterday, 50.0)])
+
+    assert store.update("BTC-USD", provider, lookback=timedelta(days=10)) == 6
+    assert store.update("BTC-USD", provider) == 0
+    # Only a short overlap of stored bars is fetched again
+    assert provider.requests[-1][1] == yesterday - REFRESH_OVERLAP
+
+
+def test_update_rebuilds_history_after_a_split(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    today = date.today()
+    days = [today - timedelta(days=i) for i in range(20, 1, -1)]
+    provider = RecordingProvider([_bar(d, 100.0) for d in days])
+    store.update("NVDA", provider, lookback=timedelta(days=20))
+
+    # A 2:1 split: the provider now reports every past close halved
+    provider.bars = [_bar(d, 50.0) for d in days] + [_bar(today - timedelta(days=1), 51.0)]
+    assert store.update("NVDA", provider, lookback=timedelta(days=20)) == len(days) + 1
+
+    closes = store.read("NVDA")["close"]
+    assert list(closes) == [50.0] * len(days) + [51.0]
+    assert provider.requests[-1][1] == days[0]
+
+
+def test_read_during_rewrite_sees_aligned_columns(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    days = [date(2024, 1, 1) + timedelta(days=i) for i in range(200)]
+    store.append("AMD", [_bar(d, 10.0) for d in days])
+    errors = []
+
+    def rewrite():
+        for n in range(20):
+            store.rewrite("AMD", [_bar(d, 10.0 + n) for d in days[:100 + n * 5]])
+
+    writer = threading.Thread(target=rewrite)
+    writer.start()
+    while writer.is_alive():
+        try:
+            bars = store.read("AMD")
+            assert len({len(column) for column in bars.values()}) == 1
+        except Exception as e:
+            errors.append(e)
+    writer.join()
+
+    assert errors == []
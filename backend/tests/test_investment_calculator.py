@@ -0,0 +1,100 @@
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.investment_calculator import calculate_compound_interest, simulate_investment
+
+client = TestClient(app)
+
+
+def test_simulation_without_volatility_matches_deterministic_path():
+    expected = calculate_compound_interest(1000, 10, 7, 5000)["yearly_breakdown"]
+    result = simulate_investment(1000, 10, 7, 1e-9, 5000, simulations=1000, seed=1)
+
+    assert result["p5"] == pytest.approx(expected, rel=1e-6)
+    assert result["p95"] == pytest.approx(expected, rel=1e-6)
+    assert result["probability_of_loss"] == 0
+
+
+def test_simulation_bands_are_ordered_and_reproducible():
+    result = simulate_investment(500, 20, 8, 14, simulations=5001, seed=42)
+
+    assert len(result["p50"]) == 20
+    for year in range(20):
+        bands = [result[p][year] for p in ("p5", "p25", "p50", "p75", "p95")]
+        assert bands == sorted(bands)
+    assert simulate_investment(500, 20, 8, 14, simulations=5001, seed=42) == result
+
+
+def test_calculate_endpoint_simulation_mode():
+    payload = {"monthly_amount": 1000, "years": 5, "annual_return": 8}
+
+    plain = client.post("/api/v1/investment/calculate", json=payload).json()
+    simulated = client.post("/api/v1/investment/calculate", json={**payload, "simulate": True, "risk_profile": 4}).json()
+
+    assert plain["simulation"] is None
+    assert simulated["yearly_breakdown"] == plain["yearly_breakdown"]
+    assert simulated["simulation"]["volatility"] == 18.0
+    assert simulated["simulation"]["simulations"] == 10000
+    assert len(simulated["simulation"]["p95"]) == 5
+
+
+def test_scenario_grid_matches_single_calculations():
+    response = client.post("/api/v1/investment/scenarios", json={
+        "scenarios": [{"monthly_amount": 250, "years": 2, "annual_return": 5}],
+        "monthly_amount": [1000, 2000],
+        "years": {"start": 1, "stop": 3, "step": 2},
+        "annual_return": {"start": 4, "stop": 8, "step": 2},
+    })
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["columns"] == ["monthly_amount", "years", "annual_return", "initial_investment"]
+    assert len(body["scenarios"]) == 1 + 2 * 2 * 3
+    for row, future_value, yearly in zip(body["scenarios"], body["future_value"], body["yearly_breakdown"]):
+        expected = calculate_compound_interest(row[0], int(row[1]), row[2], row[3])
+        assert future_value == pytest.approx(expected["future_value"], abs=0.01)
+        assert yearly[:int(row[1])] == pytest.approx(expected["yearly_breakdown"], abs=0.01)
+        assert yearly[int(row[1]):] == [None] * (3 - int(row[1]))
+
+
+def test_scenario_grid_validation():
+    assert client.post("/api/v1/investment/scenarios", json={}).status_code == 422
+    assert client.post("/api/v1/investment/scenarios", json={"monthly_amount": [1000], "years": [5]}).status_code == 422
+    too_big = {"monthly_amount": {"start": 100, "stop": 50000, "step": 10}, "years": [10], "annual_return": [2, 3, 4]}
+    assert client.post("/api/v1/investment/scenarios", json=too_big).status_code == 422
+    reversed_range = {"monthly_amount": [1000], "years": {"start": 10, "stop": 9.5, "step": 1}, "annual_return": [5]}
+    assert client.post("/api/v1/investment/scenarios", json=reversed_range).status_code == 422
+
+
+def test_scenario_grid_with_tiny_step_is_rejected_quickly():
+    tiny_step = {"monthly_amount": {"start": 100, "stop": 50000, "step": 1e-9}, "years": [10], "annual_return": [5]}
+    started = time.perf_counter()
+    assert client.post("/api/v1/investment/scenarios", json=tiny_step).status_code == 422
+    assert time.perf_counter() - started < 1
+
+
+@pytest.mark.parametrize("solve_for, expected", [("monthly_amount", 1000), ("years", 3), ("annual_return", 7)])
+def test_goal_seek_inverts_the_calculator(solve_for, expected):
+    inputs = {"monthly_amount": 1000, "years": 3, "annual_return": 7, "initial_investment": 5000}
+    target = calculate_compound_interest(**inputs)["future_value"]
+    del inputs[solve_for]
+
+    response = client.post("/api/v1/investment/goal-seek", json={"solve_for": solve_for, "target_value": target, **inputs})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["value"] == pytest.approx(expected, rel=1e-5)
+    assert body["projected_value"] == pytest.approx(target, abs=0.01)
+
+
+def test_goal_seek_edge_cases():
+    from app.services.investment_calculator import solve_annual_return, solve_monthly_amount, solve_years
+
+    assert solve_monthly_amount(1000, 5, 5, initial_investment=5000) == 0  # already reached
+    assert solve_annual_return(12000, 1000, 1) == 0  # contributions alone suffice
+    assert solve_years(24000, 1000, 0) == 2
+    with pytest.raises(ValueError):
+        solve_annual_return(1e9, 100, 1)
+    response = client.post("/api/v1/investment/goal-seek", json={"solve_for": "years", "target_value": 1000})
+    assert response.status_code == 422
@@ -0,0 +1,96 @@
+import json
+from datetime import date
+import pytest
+from app.services.market_providers import (
+    Bar, FallbackProvider, FixtureProvider, MarketDataProvider, build_provider, get_prices_chunked, record_fixtures,
+)
+
+
+class StubProvider(MarketDataProvider):
+    name = "stub"
+
+    def __init__(self, prices=None, error=None):
+        self.prices = prices or {}
+        self.error = error
+        self.calls = []
+
+    def get_price(self, symbol):
+        self.calls.append(symbol)
+        if self.error:
+            raise self.error
+        return self.prices.get(symbol)
+
+    def get_history(self, symbol, start=None, end=None):
+        if self.error:
+            raise self.error
+        return [Bar(date(2024, 1, d), 1.0, 2.0, 0.5, float(d), 100.0) for d in (2, 3, 4) if not start or date(2024, 1, d) >= start]
+
+
+@pytest.fixture
+def fixture_dir(tmp_path):
+    (tmp_path / "history").mkdir()
+    (tmp_path / "quotes.json").write_text(json.dumps({"aapl": 190.5}))
+    (tmp_path / "history" / "MSFT.csv").write_text(
+        "date,open,high,low,close,volume\n"
+        "2024-01-02,370,375,368,372.5,1000\n"
+        "2024-01-03,372,374,369,370.1,900\n"
+    )
+    return tmp_path
+
+
+def test_fixture_provider_replays_quotes_and_history(fixture_dir):
+    provider = FixtureProvider(str(fixture_dir))
+
+    assert provider.get_price("AAPL") == 190.5
+    assert provider.get_price("MSFT") == 370.1  # last recorded close
+    assert provider.get_price("NOPE") is None
+    bars = provider.get_history("MSFT", start=date(2024, 1, 3))
+    assert [b.close for b in bars] == [370.1]
+
+
+def test_fallback_provider_tries_next_on_error_or_missing():
+    failing = StubProvider(error=ConnectionError("down"))
+    partial = StubProvider({"AAPL": 1.0})
+    full = StubProvider({"AAPL": 9.0, "MSFT": 2.0})
+    chain = FallbackProvider([failing, partial, full])
+
+    assert chain.get_price("AAPL") == 1.0
+    assert chain.get_prices(["AAPL", "MSFT"]) == {"AAPL": 1.0, "MSFT": 2.0}
+    assert full.calls == ["MSFT"]
+
+
+def test_fallback_provider_raises_when_every_provider_fails():
+    chain = FallbackProvider([StubProvider(error=ConnectionError("a")), StubProvider(error=TimeoutError("b"))])
+
+    with pytest.raises(TimeoutError):
+        chain.get_price("AAPL")
+
+
+def test_record_fixtures_round_trips(tmp_path):
+    record_fixtures(StubProvider({"AAPL": 5.0}), ["aapl"], str(tmp_path))
+    replay = FixtureProvider(str(tmp_path))
+
+    assert replay.get_price("AAPL") == 5.0
+    assert [b.close for b in replay.get_history("AAPL")] == [2.0, 3.0, 4.0]
+
+
+def test_build_provider():
+    assert build_provider(["yahoo"]).name == "yahoo"
+    assert isinstance(build_provider(["fixture", "yahoo_chart"], "/tmp"), FallbackProvider)
+    with pytest.raises(ValueError):
+        build_provider(["bloomberg"])
+
+
+def test_get_prices_chunked_merges_partial_results():
+    class FlakyProvider(StubProvider):
+        batch_size = 2
+
+        def get_prices(self, symbols):
+            if "C" in symbols:
+                raise ConnectionError("down")
+            return super().get_prices(symbols)
+
+    provider = FlakyProvider({"A": 1.0, "B": 2.0, "C": 3.0, "E": 5.0})
+    prices = get_prices_chunked(provider, ["A", "B", "C", "D", "E", "A"])
+
+    assert prices == {"A": 1.0, "B": 2.0, "C": None, "D": None, "E": 5.0}
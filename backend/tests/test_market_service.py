@@ -0,0 +1,313 @@
+import asyncio
+import sys
+import threading
+import time
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from unittest.mock import MagicMock, patch
+from app.services import market_service, market_calendar
+from app.services.market_providers import MarketDataProvider
+from app.services.price_cache import PriceCache, FRESH, STALE, MISS
+
+
+@pytest.fixture(autouse=True)
+def clear_price_cache():
+    market_service.clear_cache()
+    yield
+    market_service.clear_cache()
+
+
+@pytest.fixture
+def mock_yf():
+    """Stand-in for the yfinance module the Yahoo provider imports lazily."""
+    mock = MagicMock()
+    with patch.dict(sys.modules, {"yfinance": mock}):
+        yield mock
+
+
+def _mock_ticker(price):
+    ticker = MagicMock()
+    ticker.fast_info = {"lastPrice": price}
+    return ticker
+
+
+def test_get_current_price_async_uses_cache(mock_yf):
+    mock_yf.Ticker.return_value = _mock_ticker(123.45)
+
+    assert asyncio.run(market_service.get_current_price_async("aapl")) == 123.45
+    assert asyncio.run(market_service.get_current_price_async("AAPL")) == 123.45
+    mock_yf.Ticker.assert_called_once_with("AAPL")
+
+
+def test_slow_quote_does_not_block_event_loop(mock_yf):
+    def slow_ticker(symbol):
+        time.sleep(0.3)
+        return _mock_ticker(10.0)
+    mock_yf.Ticker.side_effect = slow_ticker
+
+    async def scenario():
+        ticks = 0
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+        beat = asyncio.create_task(heartbeat())
+        price = await market_service.get_current_price_async("SLOW")
+        beat.cancel()
+        return price, ticks
+
+    price, ticks = asyncio.run(scenario())
+    assert price == 10.0
+    assert ticks > 10
+
+
+def test_provider_concurrency_is_bounded(mock_yf):
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def ticker(symbol):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+        return _mock_ticker(1.0)
+    mock_yf.Ticker.side_effect = ticker
+
+    async def scenario():
+        symbols = [f"SYM{i}" for i in range(12)]
+        return await asyncio.gather(*(market_service.get_current_price_async(s) for s in symbols))
+
+    assert asyncio.run(scenario()) == [1.0] * 12
+    assert peak <= market_service.PROVIDER_CONCURRENCY["yahoo"]
+
+
+def test_concurrent_misses_share_one_fetch(mock_yf):
+    def slow_ticker(symbol):
+        time.sleep(0.1)
+        return _mock_ticker(42.0)
+    mock_yf.Ticker.side_effect = slow_ticker
+
+    async def scenario():
+        return await asyncio.gather(*(market_service.get_current_price_async("MSFT") for _ in range(50)))
+
+    assert asyncio.run(scenario()) == [42.0] * 50
+    assert mock_yf.Ticker.call_count == 1
+
+
+@patch("app.services.market_service._fetch_prices")
+@patch("app.services.market_service._fetch_price")
+def test_overlapping_batch_joins_inflight_fetch(mock_single, mock_batch):
+    def slow_single(symbol):
+        time.sleep(0.1)
+        return 1.0
+    mock_single.side_effect = slow_single
+    mock_batch.return_value = {"GOOGL": 2.0, "NVDA": 3.0}
+
+    async def scenario():
+        single = asyncio.create_task(market_service.get_current_price_async("AAPL"))
+        await asyncio.sleep(0)
+        batch = await market_service.get_multiple_prices_async(["AAPL", "GOOGL", "NVDA"])
+        return await single, batch
+
+    single, batch = asyncio.run(scenario())
+    assert single == 1.0
+    assert batch == {"AAPL": 1.0, "GOOGL": 2.0, "NVDA": 3.0}
+    mock_single.assert_called_once_with("AAPL")
+    mock_batch.assert_called_once_with(["GOOGL", "NVDA"])
+
+
+def test_large_batch_is_fetched_in_concurrent_chunks():
+    class ChunkedProvider(MarketDataProvider):
+        name = "fixture"
+        batch_size = 3
+
+        def __init__(self):
+            self.batches = []
+
+        def get_prices(self, symbols):
+            self.batches.append(list(symbols))
+            if "S4" in symbols:
+                raise ConnectionError("chunk failed")
+            return {s: float(s[1:]) for s in symbols}
+
+        def get_price(self, symbol):
+            raise ConnectionError("chunk failed")
+
+    provider = ChunkedProvider()
+    symbols = [f"S{i}" for i in range(8)]
+    with patch.object(market_service, "_provider", provider):
+        prices = asyncio.run(market_service.get_multiple_prices_async(symbols))
+
+    assert sorted(map(len, provider.batches)) == [2, 3, 3]
+    # The failed chunk comes back empty; the others are merged
+    assert prices == {"S0": 0.0, "S1": 1.0, "S2": 2.0, "S3": None, "S4": None, "S5": None, "S6": 6.0, "S7": 7.0}
+
+
+def test_price_cache_evicts_least_recently_used():
+    cache = PriceCache(max_entries=2, ttl=timedelta(minutes=5))
+    cache.set("A", 1.0)
+    cache.set("B", 2.0)
+    cache.get("A")
+    cache.set("C", 3.0)
+
+    assert cache.get("B") == (None, MISS)
+    assert cache.get("A") == (1.0, FRESH)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_price_cache_serves_stale_within_grace():
+    cache = PriceCache(max_entries=10, ttl=timedelta(minutes=5), stale_grace=timedelta(minutes=10))
+    cache.set("A", 1.0, ttl=timedelta(seconds=-1))
+    cache.set("B", 2.0, ttl=timedelta(minutes=-20))
+
+    assert cache.get("A") == (1.0, STALE)
+    assert cache.get("B") == (None, MISS)
+    stats = cache.stats()
+    assert stats["stale_hits"] == 1
+    assert stats["misses"] == 1
+
+
+@patch("app.services.market_service._fetch_price")
+def test_stale_price_is_served_while_refreshing(mock_fetch):
+    market_service._price_cache.set("AAPL", 100.0, ttl=timedelta(seconds=-1))
+    refreshed = threading.Event()
+    mock_fetch.side_effect = lambda symbol: refreshed.set()
+
+    assert market_service.get_current_price("AAPL") == 100.0
+    assert refreshed.wait(timeout=2)
+    mock_fetch.assert_called_once_with("AAPL")
+    assert market_service.get_cache_stats()["stale_hits"] == 1
+
+
+def test_stale_symbols_are_refreshed_in_one_batch():
+    class CountingProvider(MarketDataProvider):
+        name = "fixture"
+
+        def __init__(self):
+            self.batches = []
+            self.singles = []
+
+        def get_prices(self, symbols):
+            self.batches.append(list(symbols))
+            return {s: 2.0 for s in symbols}
+
+        def get_price(self, symbol):
+            self.singles.append(symbol)
+            return 2.0
+
+    provider = CountingProvider()
+    symbols = [f"S{i}" for i in range(20)]
+    for symbol in symbols:
+        market_service._price_cache.set(symbol, 1.0, ttl=timedelta(seconds=-1))
+
+    async def scenario():
+        prices = await market_service.get_multiple_prices_async(symbols)
+        await asyncio.gather(*market_service._fetch_tasks)
+        return prices
+
+    with patch.object(market_service, "_provider", provider):
+        assert asyncio.run(scenario()) == {s: 1.0 for s in symbols}
+
+    assert provider.batches == [symbols] and provider.singles == []
+    assert market_service._price_cache.peek("S0") == 2.0
+
+
+def test_closed_market_quote_is_cached_until_next_open():
+    ny = ZoneInfo("America/New_York")
+    saturday = datetime(2026, 10, 17, 12, 0, tzinfo=ny)
+    monday_open = datetime(2026, 10, 19, 9, 30, tzinfo=ny)
+    open_ttl = timedelta(minutes=5)
+
+    assert market_calendar.quote_ttl("AAPL", open_ttl, saturday) == monday_open - saturday
+    assert market_calendar.quote_ttl("BTC-USD", open_ttl, saturday) == open_ttl
+    assert market_calendar.quote_ttl("AAPL", open_ttl, datetime(2026, 10, 16, 12, 0, tzinfo=ny)) == open_ttl
+    # Thanksgiving: closed all day, next open is Friday morning
+    thanksgiving = datetime(2026, 11, 26, 12, 0, tzinfo=ny)
+    assert market_calendar.next_market_open("MSFT", thanksgiving) == datetime(2026, 11, 27, 9, 30, tzinfo=ny)
+
+
+def test_asset_class_detection():
+    assert market_calendar.get_asset_class("btc-usd") == market_calendar.CRYPTO
+    assert market_calendar.get_asset_class("TEVA.TA") == market_calendar.TASE_EQUITY
+    assert market_calendar.get_asset_class("BRK-B") == market_calendar.US_EQUITY
+    assert market_calendar.get_asset_class("VOD.L") == market_calendar.LSE_EQUITY
+    for symbol in ("GC=F", "EURUSD=X", "^GSPC", "7203.T"):
+        assert market_calendar.get_asset_class(symbol) == market_calendar.UNKNOWN
+
+
+def test_unknown_market_quote_uses_open_ttl():
+    sunday = datetime(2026, 11, 29, 12, 0, tzinfo=ZoneInfo("America/New_York"))
+    assert market_calendar.quote_ttl("GC=F", timedelta(minutes=5), sunday) == timedelta(minutes=5)
+    # A London listing is priced on London hours, not held until the next US open
+    london_close = datetime(2026, 11, 27, 17, 0, tzinfo=ZoneInfo("Europe/London"))
+    assert market_calendar.next_market_open("VOD.L", london_close) == datetime(2026, 11, 30, 8, 0, tzinfo=ZoneInfo("Europe/London"))
+
+
+def test_unknown_symbol_is_negatively_cached(mock_yf):
+    ticker = MagicMock()
+    ticker.fast_info = {}
+    ticker.history.return_value = pd.DataFrame()
+    mock_yf.Ticker.return_value = ticker
+
+    assert market_service.get_current_price("NOPE") is None
+    assert market_service.get_current_price("NOPE") is None
+    assert market_service.get_multiple_prices(["NOPE"]) == {"NOPE": None}
+    mock_yf.Ticker.assert_called_once_with("NOPE")
+
+
+def test_open_breaker_fails_fast_from_cache(mock_yf):
+    market_service._price_cache.set("AAPL", 150.0, ttl=timedelta(minutes=-30))
+    mock_yf.download.side_effect = ConnectionError("Yahoo is down")
+    mock_yf.Ticker.side_effect = ConnectionError("Yahoo is down")
+
+    symbols = ["AAPL"] + [f"SYM{i}" for i in range(9)]
+    prices = market_service.get_multiple_prices(symbols)
+
+    assert prices["AAPL"] == 150.0
+    assert market_service.get_cache_stats()["circuit_breaker"] == "open"
+    # Per-symbol fallback stops going upstream once the breaker trips
+    assert mock_yf.Ticker.call_count == market_service._breaker.failure_threshold - 1
+
+    mock_yf.Ticker.reset_mock()
+    assert market_service.get_current_price("AAPL") == 150.0
+    mock_yf.Ticker.assert_not_called()
+
+
+def test_half_open_trial_for_unknown_symbol_releases_breaker(mock_yf):
+    breaker = market_service._breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    breaker._opened_at = datetime.now() - breaker.reset_timeout
+
+    ticker = MagicMock()
+    ticker.fast_info = {}
+    ticker.history.return_value = pd.DataFrame()
+    mock_yf.Ticker.return_value = ticker
+    assert market_service.get_current_price("NEVERSEEN") is None
+
+    mock_yf.Ticker.return_value = _mock_ticker(42.0)
+    assert market_service.get_current_price("MSFT") == 42.0
+    assert breaker.state == "closed"
+
+
+def test_partial_batch_does_not_trip_breaker():
+    class PartialProvider(MarketDataProvider):
+        name = "fixture"
+
+        def get_prices(self, symbols):
+            return {"GOOD": 1.0}
+
+    for i in range(10):
+        market_service._price_cache.set(f"OLD{i}", 5.0)
+    with patch.object(market_service, "_provider", PartialProvider()):
+        prices = market_service._fetch_prices(["GOOD"] + [f"OLD{i}" for i in range(10)])
+
+    assert prices["GOOD"] == 1.0 and prices["OLD3"] == 5.0
+    assert market_service._breaker.state == "closed"
@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+from unittest.mock import MagicMock, patch
+import pytest
+from app.services import market_service, metadata_store
+from app.services.metadata_store import MetadataStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MetadataStore(str(tmp_path / "metadata.json"), timedelta(days=30))
+    with patch.object(metadata_store, "_store", store), patch.object(metadata_store, "_lookups", {}), \
+            patch.object(metadata_store, "_failed_lookups", set()):
+        yield store
+
+
+@pytest.fixture
+def provider():
+    provider = MagicMock()
+    provider.get_info.side_effect = lambda symbol: {"shortName": f"{symbol} Inc.", "sector": "Utilities", "exchange": "NYQ"}
+    provider.get_quote.return_value = {"regularMarketPrice": 10.0, "marketCap": 1e9}
+    with patch.object(market_service, "_provider", provider):
+        yield provider
+
+
+def test_seeded_sectors_need_no_network(store, provider):
+    assert metadata_store.get_sector("msft") == "Technology"  # RISK_LEVEL_STOCKS
+    assert metadata_store.get_sector("QQQ") == "ETF"  # SECTOR_MAP
+    provider.get_info.assert_not_called()
+    assert store.is_expired("MSFT")  # seeds are renewed by the background refresh
+
+
+def _wait_for_lookup(symbol):
+    future = metadata_store._lookups.get(symbol)
+    if future is not None:
+        future.result()
+
+
+def test_unknown_symbol_is_pending_until_fetched(store, provider):
+    assert metadata_store.get_sectors(["newco", "NEWCO"]) == {"NEWCO": "Pending"}
+    _wait_for_lookup("NEWCO")
+    assert metadata_store.get_sector("NEWCO") == "Utilities"
+    provider.get_info.assert_called_once_with("NEWCO")
+
+    provider.get_info.side_effect = lambda symbol: None
+    assert metadata_store.get_sector("ZZZZ") == "Pending"
+    _wait_for_lookup("ZZZZ")
+    # The provider had nothing, so it is not asked again today
+    assert metadata_store.get_sector("ZZZZ") == "Other"
+    assert provider.get_info.call_count == 2
+
+
+def test_refresh_persists_and_expires(store, provider, tmp_path):
+    assert metadata_store.refresh_metadata(["ko"]) == 1
+    assert not store.is_expired("KO")
+
+    reloaded = MetadataStore(str(tmp_path / "metadata.json"), timedelta(days=30))
+    assert reloaded.get("KO")["sector"] == "Utilities"
+    assert reloaded.get("KO")["name"] == "KO Inc."
+
+    with patch.object(metadata_store, "date") as fake_date:
+        fake_date.today.return_value = date.today() + timedelta(days=31)
+        fake_date.fromisoformat = date.fromisoformat
+        assert store.is_expired("KO")
+
+
+def test_stock_info_fetches_metadata_once(store, provider):
+    first = market_service.get_stock_info("abcd")
+    second = market_service.get_stock_info("ABCD")
+
+    assert first == second
+    assert first["name"] == "ABCD Inc." and first["sector"] == "Utilities"
+    assert first["currentPrice"] == 10.0 and first["marketCap"] == 1e9
+    provider.get_info.assert_called_once_with("ABCD")
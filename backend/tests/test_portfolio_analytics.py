@@ -0,0 +1,45 @@
+import numpy as np
+from app.services.portfolio_analytics import analyze_holdings, diversification_score, encode_labels
+
+
+def test_single_portfolio_figures():
+    codes, names = encode_labels(["Technology", "ETF", "Technology"])
+    result = analyze_holdings(
+        quantity=[2, 1, 1], cost_price=[100, 400, 0], price=[150, 400, 50], sector_code=codes,
+    )
+
+    assert names == ["Technology", "ETF"]
+    np.testing.assert_allclose(result.value, [300, 400, 50])
+    np.testing.assert_allclose(result.profit_loss_percent, [50, 0, 0])  # zero cost basis scores 0%
+    np.testing.assert_allclose(result.weight.sum(), 100)
+    np.testing.assert_allclose(result.sector_value[0], [350, 400])
+    np.testing.assert_array_equal(result.sector_count[0], [2, 1])
+    assert result.top_holding_weight[0] == result.weight.max()
+    np.testing.assert_allclose(result.hhi[0], (result.weight ** 2).sum())
+    assert result.sectors_held[0] == 2
+
+
+def test_batch_matches_per_portfolio_runs():
+    rng = np.random.default_rng(7)
+    lots = 500
+    quantity = rng.uniform(1, 10, lots)
+    cost = rng.uniform(10, 100, lots)
+    price = rng.uniform(10, 100, lots)
+    sector = rng.integers(0, 5, lots)
+    portfolio = rng.integers(0, 20, lots)
+
+    batch = analyze_holdings(quantity, cost, price, sector, portfolio, n_sectors=5, n_portfolios=20)
+
+    for p in (0, 7, 19):
+        mask = portfolio == p
+        single = analyze_holdings(quantity[mask], cost[mask], price[mask], sector[mask], n_sectors=5)
+        np.testing.assert_allclose(batch.weight[mask], single.weight)
+        np.testing.assert_allclose(batch.sector_value[p], single.sector_value[0])
+        np.testing.assert_allclose(batch.hhi[p], single.hhi[0])
+        assert batch.diversification_score[p] == single.diversification_score[0]
+
+
+def test_diversification_score_caps():
+    assert diversification_score(1, 1, 100) == 25
+    assert diversification_score(10, 5, 5) == 95
+    assert diversification_score(10, 5, 0) == 100
@@ -0,0 +1,32 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+from app.services import portfolio_service
+
+
+def _snapshot(**values):
+    return {"has_profile": True, "remaining_budget": 0.0, **values}
+
+
+@patch("app.services.portfolio_service.get_multiple_prices_async", new_callable=AsyncMock)
+@patch("app.services.portfolio_service.fetch_financial_snapshot", new_callable=AsyncMock)
+def test_recommendations_fit_the_remaining_budget(mock_snapshot, mock_prices):
+    mock_snapshot.return_value = _snapshot(remaining_budget=150.0)
+    mock_prices.side_effect = lambda tickers: {t.upper(): 100.0 + 100 * i for i, t in enumerate(tickers)}
+
+    result = asyncio.run(portfolio_service.get_stock_recommendations(3, "u1"))
+
+    assert result["remaining_budget"] == 150.0
+    assert [r["current_price"] for r in result["recommendations"]] == [100.0]
+    mock_snapshot.assert_awaited_once_with("u1")
+
+
+@patch("app.services.portfolio_service.get_multiple_prices_async", new_callable=AsyncMock)
+@patch("app.services.portfolio_service.fetch_financial_snapshot", new_callable=AsyncMock)
+def test_users_without_profile_are_not_limited(mock_snapshot, mock_prices):
+    mock_snapshot.return_value = _snapshot(has_profile=False)
+    mock_prices.side_effect = lambda tickers: {t.upper(): 100.0 for t in tickers}
+
+    result = asyncio.run(portfolio_service.get_stock_recommendations(3, "u1"))
+
+    assert result["recommendations"]
+    assert result["remaining_budget"] == 1000000.0
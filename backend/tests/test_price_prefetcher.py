@@ -0,0 +1,47 @@
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services import market_service, price_prefetcher
+
+
+def test_collect_prefetch_symbols_merges_held_and_recommended():
+    with patch.object(price_prefetcher, "_held_symbols", AsyncMock(return_value=["aapl", "ZZZZ", "ZZZZ"])):
+        symbols = asyncio.run(price_prefetcher.collect_prefetch_symbols())
+
+    assert "ZZZZ" in symbols and "AAPL" in symbols
+    assert len(symbols) == len(set(symbols))
+
+
+def test_collect_prefetch_symbols_survives_database_error():
+    with patch.object(price_prefetcher, "_held_symbols", AsyncMock(side_effect=RuntimeError("db down"))):
+        symbols = asyncio.run(price_prefetcher.collect_prefetch_symbols())
+
+    assert symbols  # recommended tickers are still prefetched
+
+
+def test_prefetch_prices_batches_requests():
+    symbols = [f"S{i}" for i in range(5)]
+    fetch = AsyncMock(side_effect=lambda batch: {s: 1.0 for s in batch})
+    with patch.object(price_prefetcher, "collect_prefetch_symbols", AsyncMock(return_value=symbols)), \
+         patch.object(price_prefetcher, "refresh_prices_async", fetch):
+        priced = asyncio.run(price_prefetcher.prefetch_prices(batch_size=2))
+
+    assert priced == 5
+    assert [call.args[0] for call in fetch.call_args_list] == [["S0", "S1"], ["S2", "S3"], ["S4"]]
+
+
+def test_prefetch_refreshes_only_symbols_due_before_next_run():
+    market_service.clear_cache()
+    market_service._price_cache.set("SOON", 1.0, ttl=timedelta(seconds=60))
+    market_service._price_cache.set("LATER", 1.0, ttl=timedelta(hours=1))
+    provider = MagicMock(batch_size=100)
+    provider.name = "fixture"
+    provider.get_prices.side_effect = lambda symbols: {s: 2.0 for s in symbols}
+    with patch.object(price_prefetcher, "collect_prefetch_symbols", AsyncMock(return_value=["NEW", "SOON", "LATER"])), \
+         patch.object(market_service, "_provider", provider):
+        priced = asyncio.run(price_prefetcher.prefetch_prices(batch_size=50, within=timedelta(minutes=5)))
+    market_service.clear_cache()
+
+    assert priced == 2
+    provider.get_prices.assert_called_once_with(["NEW", "SOON"])
+    provider.get_price.assert_not_called()
@@ -0,0 +1,47 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+from app.services import quote_stream
+from app.services.quote_stream import QuoteStream
+
+
+def test_one_refresh_serves_all_subscribers_with_changes_only():
+    prices = {"AAPL": 1.0, "MSFT": 2.0, "TSLA": 3.0}
+    fetch = AsyncMock(side_effect=lambda symbols: {s: prices[s] for s in symbols})
+
+    async def scenario():
+        stream = QuoteStream(interval=3600)
+        first = stream.subscribe(["aapl", "msft"])
+        second = stream.subscribe(["MSFT", "TSLA"])
+        await asyncio.sleep(0)  # let the shared loop run its first refresh
+
+        assert fetch.call_count == 1
+        assert fetch.call_args.args[0] == ["AAPL", "MSFT", "TSLA"]
+        assert await first.next_update(1) == {"AAPL": 1.0, "MSFT": 2.0}
+        assert await second.next_update(1) == {"MSFT": 2.0, "TSLA": 3.0}
+
+        prices["TSLA"] = 3.5
+        await stream.refresh()
+        assert await first.next_update(0.01) == {}
+        assert await second.next_update(1) == {"TSLA": 3.5}
+
+        # A late subscriber gets the last known prices immediately
+        third = stream.subscribe(["TSLA"])
+        assert await third.next_update(0.01) == {"TSLA": 3.5}
+
+        for sub in (first, second, third):
+            stream.unsubscribe(sub)
+        assert stream.subscriber_count() == 0
+        assert stream._last == {}
+
+    with patch.object(quote_stream, "get_multiple_prices_async", fetch):
+        asyncio.run(scenario())
+
+
+def test_slow_subscriber_receives_latest_price_only():
+    async def scenario():
+        sub = quote_stream.Subscription({"AAPL"})
+        sub.push({"AAPL": 1.0})
+        sub.push({"AAPL": 1.5})
+        assert await sub.next_update(1) == {"AAPL": 1.5}
+
+    asyncio.run(scenario())
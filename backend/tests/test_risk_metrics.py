@@ -0,0 +1,76 @@
+from unittest.mock import AsyncMock, patch
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services import risk_metrics
+
+client = TestClient(app)
+
+
+def _series(start, closes):
+    dates = np.arange(np.datetime64(start), np.datetime64(start) + len(closes))
+    return {"date": dates, "close": np.asarray(closes, dtype=float)}
+
+
+def test_metric_kernels_match_definitions():
+    rng = np.random.default_rng(1)
+    market = rng.normal(0.0005, 0.01, 1000)
+    asset = 1.5 * market + rng.normal(0, 0.002, 1000)
+
+    assert risk_metrics.beta(asset, market) == pytest.approx(np.cov(asset, market)[0, 1] / np.var(market, ddof=1))
+    np.testing.assert_allclose(
+        risk_metrics.beta(np.column_stack([asset, market]), market),
+        [risk_metrics.beta(asset, market), 1.0],
+    )
+    assert risk_metrics.annualized_volatility(market) == pytest.approx(market.std(ddof=1) * np.sqrt(252))
+    assert risk_metrics.historical_var(market, 0.95) == pytest.approx(-np.quantile(market, 0.05))
+    # Normal returns: both VaR estimates agree closely
+    assert risk_metrics.parametric_var(market, 0.95) == pytest.approx(risk_metrics.historical_var(market, 0.95), rel=0.1)
+
+
+def test_max_drawdown():
+    assert risk_metrics.max_drawdown([100, 120, 90, 130, 65]) == pytest.approx(0.5)
+    assert risk_metrics.max_drawdown([1, 2, 3]) == 0
+
+
+def test_portfolio_risk_aligns_histories():
+    closes = {
+        "AAA": _series("2024-01-01", [10, 11, 12, 11, 13]),
+        "BBB": _series("2024-01-03", [20, 20, 22]),  # listed two days later
+    }
+    benchmark = _series("2024-01-01", [100, 101, 102, 101, 104])
+
+    report = risk_metrics.portfolio_risk(closes, {"AAA": 1, "BBB": 2}, benchmark)
+
+    assert report["start"] == "2024-01-03" and report["observations"] == 2
+    values = np.array([12 + 40, 11 + 40, 13 + 44])
+    assert report["max_drawdown"] == pytest.approx(1 - 51 / 52)
+    assert report["volatility"] == pytest.approx(risk_metrics.annualized_volatility(values[1:] / values[:-1] - 1))
+    assert sum(h["weight"] for h in report["holdings"]) == pytest.approx(1)
+
+
+@patch("app.routers.analytics.fetch_assets", new_callable=AsyncMock)
+@patch("app.routers.analytics.load_closes")
+def test_risk_endpoint(mock_load, mock_assets):
+    mock_assets.return_value = [
+        {"symbol": "aaa", "amount": 1}, {"symbol": "AAA", "amount": 1}, {"symbol": "ZZZ", "amount": 5},
+    ]
+    rng = np.random.default_rng(2)
+    mock_load.return_value = {
+        "AAA": _series("2024-01-01", 50 * np.cumprod(1 + rng.normal(0, 0.01, 300))),
+        "SPY": _series("2024-01-01", 400 * np.cumprod(1 + rng.normal(0, 0.01, 300))),
+    }
+
+    response = client.get("/api/v1/analytics/risk", params={"user_id": "u1"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["observations"] == 299
+    assert body["missing_symbols"] == ["ZZZ"]
+    assert body["holdings"][0]["weight"] == 100.0
+    assert mock_load.call_args.args[0] == ["AAA", "ZZZ", "SPY"]
+
+    # Windows longer than the stored history are refused rather than silently cut
+    response = client.get("/api/v1/analytics/risk", params={"user_id": "u1", "years": 10})
+    assert response.status_code == 422
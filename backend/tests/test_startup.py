@@ -0,0 +1,57 @@
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+
+from profile_imports import HEAVY_MODULES, STARTUP_BUDGET_MS, profile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API = os.path.join(os.path.dirname(BACKEND), "api")
+
+
+def _loaded_after(code: str, modules):
+    """Which of `modules` a fresh interpreter has imported after running `code`."""
+    check = f"{code}\nimport sys\nprint(','.join(m for m in {list(modules)!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", check], capture_output=True, text=True, cwd=BACKEND, env=os.environ.copy())
+    assert result.returncode == 0, result.stderr
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def test_app_startup_skips_heavy_libraries():
+    assert _loaded_after("import app.main", list(HEAVY_MODULES)) == []
+
+
+def test_app_startup_within_import_budget():
+    total, _, loaded = profile("app.main")
+    assert not loaded & set(HEAVY_MODULES)
+    assert total * 1000 < STARTUP_BUDGET_MS
+
+
+def test_serverless_functions_import_supabase_lazily():
+    for name in ("analytics", "chat", "portfolio", "transactions", "recommendations"):
+        code = f"import importlib.util\nspec = importlib.util.spec_from_file_location('{name}', {os.path.join(API, name + '.py')!r})\nspec.loader.exec_module(importlib.util.module_from_spec(spec))"
+        assert _loaded_after(code, ["supabase", "httpx", "numpy"]) == [], name
+
+
+def test_serverless_bundle_includes_shared_backend_modules(tmp_path):
+    # Rebuild what Vercel ships: the /api functions plus vercel.json's includeFiles
+    root = os.path.dirname(BACKEND)
+    with open(os.path.join(root, "vercel.json")) as f:
+        pattern = json.load(f)["functions"]["api/*.py"]["includeFiles"]
+    shutil.copytree(API, tmp_path / "api")
+    for path in pathlib.Path(root).glob(pattern):
+        target = tmp_path / path.relative_to(root)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(path, target)
+
+    for name in ("analytics", "market", "portfolio"):
+        code = (
+            "import importlib.util\n"
+            f"spec = importlib.util.spec_from_file_location('{name}', {str(tmp_path / 'api' / (name + '.py'))!r})\n"
+            "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+            "import app.services.market_providers, app.services.portfolio_analytics, app.services.recommendation_data\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=tmp_path, env=os.environ.copy())
+        assert result.returncode == 0, f"{name}: {result.stderr}"
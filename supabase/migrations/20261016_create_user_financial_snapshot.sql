@@ -0,0 +1,71 @@
+-- One-call summary of a user's budget: cash put in so far (initial investment
+-- plus one monthly budget for every month started since sign-up), cost of
+-- open positions, realized P/L of closed ones, and what is left to invest.
+--
+-- months_passed counts the first-of-month dates after created_at, up to now,
+-- in UTC: (now year * 12 + now month) - (created year * 12 + created month).
+--
+-- Always returns one row; has_profile is false for users without a profile.
+-- SECURITY INVOKER, so row level security still applies to the caller.
+
+CREATE OR REPLACE FUNCTION public.get_user_financial_snapshot(p_user_id UUID)
+RETURNS TABLE (
+    has_profile BOOLEAN,
+    initial_investment NUMERIC,
+    monthly_budget NUMERIC,
+    created_at TIMESTAMPTZ,
+    months_passed INTEGER,
+    cash_injected NUMERIC,
+    invested_cost NUMERIC,
+    realized_gains NUMERIC,
+    remaining_budget NUMERIC
+)
+LANGUAGE sql
+STABLE
+SECURITY INVOKER
+SET search_path = public
+AS $$
+    WITH profile AS (
+        SELECT
+            p.initial_investment,
+            p.monthly_budget,
+            p.created_at,
+            GREATEST(0,
+                (EXTRACT(YEAR FROM timezone('utc', now())) * 12 + EXTRACT(MONTH FROM timezone('utc', now())))
+                - (EXTRACT(YEAR FROM timezone('utc', p.created_at)) * 12 + EXTRACT(MONTH FROM timezone('utc', p.created_at)))
+            )::INTEGER AS months_passed
+        FROM public.user_profiles p
+        WHERE p.user_id = p_user_id
+    ),
+    totals AS (
+        SELECT
+            (SELECT COALESCE(SUM(a.amount * a.price), 0) FROM public.assets a WHERE a.user_id = p_user_id) AS invested_cost,
+            (SELECT COALESCE(SUM(t.profit_loss), 0) FROM public.transactions t WHERE t.user_id = p_user_id) AS realized_gains
+    ),
+    cash AS (
+        SELECT
+            EXISTS (SELECT 1 FROM profile) AS has_profile,
+            COALESCE((SELECT initial_investment FROM profile), 0) AS initial_investment,
+            COALESCE((SELECT monthly_budget FROM profile), 0) AS monthly_budget,
+            (SELECT created_at FROM profile) AS created_at,
+            COALESCE((SELECT months_passed FROM profile), 0) AS months_passed
+    )
+    SELECT
+        cash.has_profile,
+        cash.initial_investment,
+        cash.monthly_budget,
+        cash.created_at,
+        cash.months_passed,
+        cash.initial_investment + cash.monthly_budget * cash.months_passed AS cash_injected,
+        totals.invested_cost,
+        totals.realized_gains,
+        GREATEST(0, cash.initial_investment + cash.monthly_budget * cash.months_passed
+            - totals.invested_cost + totals.realized_gains) AS remaining_budget
+    FROM cash, totals;
+$$;
+
+-- Both sums filter on user_id
+CREATE INDEX IF NOT EXISTS assets_user_id_idx ON public.assets(user_id);
+CREATE INDEX IF NOT EXISTS transactions_user_id_idx ON public.transactions(user_id);
+
+GRANT EXECUTE ON FUNCTION public.get_user_financial_snapshot(UUID) TO anon, authenticated, service_role;